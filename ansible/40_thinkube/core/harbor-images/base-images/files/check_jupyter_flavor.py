@@ -16,14 +16,38 @@ Usage in notebooks:
     # Or get current flavor and handle manually
     current = get_current_flavor()
     print(f"Running in {current} environment")
+
+    # Ask about capabilities without importing heavy packages
+    if flavor_supports('unsloth'):
+        ...
+    require_packages('peft', 'trl>=0.20')
 """
 
+import json
 import os
+import re
+import sys
 from pathlib import Path
 
 
 FLAVOR_FILE = Path.home() / '.jupyter_flavor'
 
+# Capability manifest of the kernel's own environment (the image's system
+# Python or a venv), written at build time by generate_capability_manifest.py.
+# THINKUBE_CAPABILITIES points at an explicit manifest instead.
+CAPABILITY_MANIFEST = Path(sys.prefix) / 'share' / 'thinkube' / 'capabilities.json'
+
+# Named capabilities and the distributions that provide them
+CAPABILITY_PACKAGES = {
+    'unsloth': ['unsloth'],
+    'qlora': ['bitsandbytes', 'peft'],
+    'fine-tuning': ['peft', 'trl'],
+    'quantization': ['nvidia-modelopt'],
+    'langchain': ['langchain'],
+    'crewai': ['crewai'],
+    'faiss': ['faiss-cpu'],
+}
+
 FLAVOR_DESCRIPTIONS = {
     'ml-gpu': 'Base ML/GPU environment (PyTorch, transformers, all service clients)',
     'agent-dev': 'Agent Development (LangChain, CrewAI, FAISS + ml-gpu)',
@@ -31,23 +55,183 @@ FLAVOR_DESCRIPTIONS = {
 }
 
 
+# (mtime_ns, size) of the flavor file and the flavor read from it
+_flavor_cache = None
+
+# Loaded capability manifest (False: looked for, none found)
+_manifest_cache = None
+
+
 def get_current_flavor():
     """
     Get the current Jupyter environment flavor.
 
+    Kernels running in an environment with a capability manifest report the
+    manifest's flavor (venv kernels share one flavor file with the image).
+    Otherwise the flavor file is used; it lives on the shared home volume, so
+    it is read once and re-read only when its mtime or size changes.
+
     Returns:
         str: The current flavor name ('ml-gpu', 'agent-dev', or 'fine-tuning')
 
     Raises:
         FileNotFoundError: If flavor file doesn't exist (not in Thinkube environment)
     """
-    if not FLAVOR_FILE.exists():
+    global _flavor_cache
+
+    manifest = load_capability_manifest()
+    if manifest is not None and manifest.get('flavor'):
+        return manifest['flavor']
+
+    try:
+        st = FLAVOR_FILE.stat()
+    except FileNotFoundError:
+        _flavor_cache = None
         raise FileNotFoundError(
             f"Jupyter flavor file not found at {FLAVOR_FILE}. "
             "Are you running in a Thinkube JupyterHub environment?"
-        )
+        ) from None
+
+    key = (st.st_mtime_ns, st.st_size)
+    if _flavor_cache is None or _flavor_cache[0] != key:
+        _flavor_cache = (key, FLAVOR_FILE.read_text().strip())
+    return _flavor_cache[1]
+
+
+def _normalize(name):
+    """PEP 503 normalized distribution name."""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def load_capability_manifest():
+    """
+    Load the capability manifest baked into the image.
+
+    The manifest is read once per process; it only changes when the
+    image or venv is rebuilt.
+
+    Returns:
+        dict: Manifest with 'flavor', 'packages' and 'features', or None if
+        this environment has none (capability checks then fall back to
+        installed package metadata)
+    """
+    global _manifest_cache
+
+    if _manifest_cache is None:
+        _manifest_cache = False
+        override = os.environ.get('THINKUBE_CAPABILITIES')
+        path = Path(override) if override else CAPABILITY_MANIFEST
+        try:
+            manifest = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        manifest['packages'] = {
+            _normalize(name): version for name, version in manifest.get('packages', {}).items()
+        }
+        manifest['path'] = str(path)
+        _manifest_cache = manifest
+    return _manifest_cache or None
+
+
+def installed_version(package):
+    """
+    Get the installed version of a distribution without importing it.
+
+    Packages recorded in the manifest are answered from it; anything else
+    (e.g., installed at runtime with %pip) is looked up in the installed
+    package metadata, which reads dist-info files only.
+
+    Args:
+        package (str): Distribution name (e.g., 'unsloth', 'nvidia-modelopt')
+
+    Returns:
+        str: Installed version, or None if not installed
+    """
+    manifest = load_capability_manifest()
+    if manifest is not None:
+        version = manifest['packages'].get(_normalize(package))
+        if version is not None:
+            return version
 
-    return FLAVOR_FILE.read_text().strip()
+    from importlib import metadata
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def flavor_supports(capability):
+    """
+    Check whether this environment supports a capability, without importing it.
+
+    Args:
+        capability (str): A hardware feature from the manifest ('cuda', 'fp8',
+            'nvfp4'), a named capability from CAPABILITY_PACKAGES ('unsloth',
+            'qlora', ...), or any distribution name
+
+    Returns:
+        bool: True if supported. Hardware features describe the torch build
+        baked into the image, not the GPU of this node; they are only known
+        from the manifest and count as unsupported without one.
+    """
+    manifest = load_capability_manifest()
+    if manifest is not None and capability in manifest.get('features', {}):
+        return bool(manifest['features'][capability])
+
+    packages = CAPABILITY_PACKAGES.get(capability, [capability])
+    return all(installed_version(package) is not None for package in packages)
+
+
+def _requirement_met(requirement):
+    """Return (name, installed version, satisfied) for 'name' or 'name<op>version'."""
+    try:
+        from packaging.requirements import Requirement
+        parsed = Requirement(requirement)
+        name, specifier = parsed.name, parsed.specifier
+    except ImportError:
+        name, specifier = re.split(r'[<>=!~;\[ ]', requirement, maxsplit=1)[0], None
+
+    version = installed_version(name)
+    if version is None:
+        return name, None, False
+    if not specifier:
+        return name, version, True
+    return name, version, specifier.contains(version, prereleases=True)
+
+
+def require_packages(*requirements, strict=True):
+    """
+    Validate that packages a notebook needs are installed, without importing them.
+
+    Args:
+        *requirements (str): Package names, optionally with a version specifier
+            (e.g., 'peft', 'trl>=0.20', 'transformers>=4.56,<5')
+        strict (bool): If True, raise an error when any is missing. If False, only print a warning.
+
+    Returns:
+        bool: True if all requirements are met, False otherwise
+
+    Raises:
+        EnvironmentError: If strict=True and a requirement is not met
+    """
+    unmet = []
+    for requirement in requirements:
+        name, version, satisfied = _requirement_met(requirement)
+        if not satisfied:
+            unmet.append(f"  {requirement} (installed: {version or 'no'})")
+
+    if not unmet:
+        return True
+
+    error_msg = (
+        "Missing required packages in this environment:\n"
+        + "\n".join(unmet)
+        + "\nSelect a kernel that provides them (see check_jupyter_flavor.get_flavor_info())."
+    )
+    if strict:
+        raise EnvironmentError(error_msg)
+    print(f"⚠️  Warning: {error_msg}")
+    return False
 
 
 def check_flavor(required_flavor, strict=True):
@@ -113,10 +297,14 @@ def get_flavor_info():
     except FileNotFoundError:
         current = None
 
+    manifest = load_capability_manifest()
     return {
         'current': current,
         'current_description': FLAVOR_DESCRIPTIONS.get(current, 'Not in Thinkube environment'),
         'available_flavors': FLAVOR_DESCRIPTIONS,
+        'capabilities': {name: flavor_supports(name) for name in CAPABILITY_PACKAGES},
+        'features': manifest.get('features', {}) if manifest else {},
+        'manifest': manifest['path'] if manifest else None,
     }
 
 
@@ -133,4 +321,8 @@ if __name__ == '__main__':
     for flavor, desc in info['available_flavors'].items():
         marker = "  ← (current)" if flavor == info['current'] else ""
         print(f"  • {flavor}: {desc}{marker}")
+    print()
+    print(f"Capabilities ({info['manifest'] or 'from installed packages'}):")
+    for name, supported in {**info['features'], **info['capabilities']}.items():
+        print(f"  {'✓' if supported else '✗'} {name}")
     print("=" * 70)
@@ -0,0 +1,157 @@
+# Copyright 2025 Alejandro Martínez Corriá and the Thinkube contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Capability Manifest Generator
+
+Records what a Python environment provides - installed package versions,
+CUDA/FP8/NVFP4 support and the Jupyter flavor - as a JSON manifest, so
+notebooks and helpers (check_jupyter_flavor, thinkube_models) can answer
+capability questions without importing heavy packages at runtime.
+
+Run it at image/venv build time with the environment's own interpreter.
+The manifest is written to <sys.prefix>/share/thinkube/capabilities.json,
+which is where check_jupyter_flavor looks for it and which moves with a
+relocated venv.
+
+Hardware features (cuda, fp8, nvfp4) describe what the installed torch
+build supports, from its CUDA version and compiled arch list. They say
+nothing about the GPU of the node a kernel later runs on: no GPU is
+visible during an image build, so ask torch.cuda at runtime for that.
+
+Usage:
+    python generate_capability_manifest.py --flavor ml-gpu
+    /path/to/venv/bin/python generate_capability_manifest.py --flavor fine-tuning
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+
+
+MANIFEST_PATH = Path(sys.prefix) / 'share' / 'thinkube' / 'capabilities.json'
+
+# Manifest layout version, bumped on incompatible changes
+SCHEMA_VERSION = 1
+
+# Lowest compute capability with FP8 tensor cores (Ada / Hopper)
+FP8_MIN_CAPABILITY = (8, 9)
+
+# Lowest compute capability with NVFP4 tensor cores (Blackwell, incl. GB10)
+NVFP4_MIN_CAPABILITY = (10, 0)
+
+
+def installed_packages():
+    """
+    Get every installed distribution and its version.
+
+    Returns:
+        dict: Distribution name -> version, sorted by name
+    """
+    packages = {}
+    for dist in metadata.distributions():
+        name = dist.metadata['Name']
+        if name:
+            # First one wins, as on sys.path (a venv shadows system site-packages)
+            packages.setdefault(name, dist.version)
+    return dict(sorted(packages.items(), key=lambda item: item[0].lower()))
+
+
+def _arch_capability(arch):
+    """Compute capability of a torch arch name like 'sm_90a' or 'sm_121'."""
+    digits = ''.join(c for c in arch.split('_', 1)[-1] if c.isdigit())
+    if len(digits) < 2:
+        return None
+    return int(digits[:-1]), int(digits[-1])
+
+
+def torch_features():
+    """
+    Inspect the installed torch build.
+
+    Returns:
+        tuple: (features dict, torch details dict or None if torch is not installed)
+    """
+    features = {'cuda': False, 'fp8': False, 'nvfp4': False}
+    try:
+        import torch
+    except ImportError:
+        return features, None
+
+    details = {
+        'version': torch.__version__,
+        'cuda': torch.version.cuda,
+        'arch_list': [],
+    }
+    if torch.version.cuda is None:
+        return features, details
+
+    features['cuda'] = True
+    details['arch_list'] = torch.cuda.get_arch_list()
+    capabilities = [c for c in map(_arch_capability, details['arch_list']) if c]
+
+    features['fp8'] = hasattr(torch, 'float8_e4m3fn') and any(
+        c >= FP8_MIN_CAPABILITY for c in capabilities
+    )
+    features['nvfp4'] = any(c >= NVFP4_MIN_CAPABILITY for c in capabilities)
+    return features, details
+
+
+def build_manifest(flavor):
+    """
+    Build the capability manifest for the running interpreter.
+
+    Args:
+        flavor (str): Jupyter flavor this environment implements (e.g., 'fine-tuning')
+
+    Returns:
+        dict: The manifest
+    """
+    features, torch_details = torch_features()
+    return {
+        'schema': SCHEMA_VERSION,
+        'flavor': flavor,
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'prefix': sys.prefix,
+        'features': features,
+        'torch': torch_details,
+        'packages': installed_packages(),
+    }
+
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    """
+    Write the manifest atomically, readable by every user.
+
+    Args:
+        manifest (dict): Manifest from build_manifest()
+        path (Path): Destination file
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text(json.dumps(manifest, indent=2) + '\n')
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the Thinkube capability manifest')
+    parser.add_argument('--flavor', required=True, help='Jupyter flavor of this environment')
+    parser.add_argument('--output', type=Path, default=MANIFEST_PATH,
+                        help=f"Manifest path (default: {MANIFEST_PATH})")
+    args = parser.parse_args()
+
+    manifest = build_manifest(args.flavor)
+    write_manifest(manifest, args.output)
+
+    features = ', '.join(f"{'✓' if on else '✗'} {name}" for name, on in manifest['features'].items())
+    print(f"✓ Capability manifest written to {args.output}")
+    print(f"  Flavor: {args.flavor}, {len(manifest['packages'])} packages")
+    print(f"  Features: {features}")
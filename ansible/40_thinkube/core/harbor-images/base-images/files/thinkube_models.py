@@ -6,7 +6,9 @@ Thinkube Model Registration Helper
 
 Provides a simple interface for:
 - Loading models from MLflow Model Registry (mirrored from HuggingFace)
-- Registering fine-tuned models with FP8 quantization
+- Registering fine-tuned models with FP8, NVFP4, INT8 or INT4 quantization
+- Registering LoRA adapters on top of a shared base model
+- Profiling each pipeline stage (time, I/O, peak memory) with profile_pipeline()
 
 Usage:
     from thinkube_models import load_model_for_finetuning, register_finetuned_model
@@ -25,17 +27,559 @@ Usage:
     )
 """
 
+import functools
+import json
 import os
+import shutil
+import threading
+import time
 import requests
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Optional, Literal
+from typing import List, Literal, Optional, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 # Staging path for models (shared with Argo workflows via JuiceFS)
 STAGING_PATH = Path.home() / "thinkube" / "mlflow" / ".staging"
 
-# Supported quantization formats
-QuantizationFormat = Literal["FP8", "NVFP4", "BF16"]
+# Concurrent shard writers used when staging checkpoints on JuiceFS
+STAGING_WRITE_WORKERS = int(os.environ.get('THINKUBE_STAGING_WRITE_WORKERS', 4))
+
+# Shard size for staged checkpoints; several shards let the writers run in parallel
+STAGING_SHARD_SIZE = os.environ.get('THINKUBE_STAGING_SHARD_SIZE', '2GB')
+
+# Written last into every staged model: file sizes and SHA-256 checksums
+STAGING_MANIFEST = "thinkube_manifest.json"
+
+# Content-addressed pool of unchanged base-model tensors, hard-linked into deduplicated models
+STAGING_BLOBS_PATH = STAGING_PATH / ".blobs"
+
+# Unchanged tensors of a partly changed base shard are pooled only from this size (bytes)
+DEDUP_MIN_BLOB_BYTES = int(os.environ.get('THINKUBE_DEDUP_MIN_BLOB_BYTES', 16 * 1024 * 1024))
+
+# Pooled blobs that no staged model links to any more are removed after this many seconds
+DEDUP_BLOB_TTL = int(os.environ.get('THINKUBE_DEDUP_BLOB_TTL', 24 * 3600))
+
+# Pre-tokenized calibration snapshots (on JuiceFS, shared by every pod)
+CALIBRATION_CACHE_PATH = Path.home() / "thinkube" / "mlflow" / ".calibration"
+
+# Built-in calibration corpora: name -> HuggingFace dataset and text field
+CALIBRATION_CORPORA = {
+    'cnn_dailymail': {'path': 'cnn_dailymail', 'name': '3.0.0', 'split': 'train', 'field': 'article'},
+}
+
+# Corpus used when no calibration data is given
+DEFAULT_CALIBRATION_CORPUS = 'cnn_dailymail'
+
+# Supported quantization formats ("BF16" means no quantization)
+QuantizationFormat = Literal["FP8", "NVFP4", "INT8_SQ", "INT4_AWQ", "W4A8_AWQ", "BF16"]
+
+# Quantization formats: name -> ModelOpt config (attribute of modelopt.torch.quantization
+# or a config dict) and a short description printed when quantizing
+QUANTIZATION_FORMATS = {
+    'FP8': {'config': 'FP8_DEFAULT_CFG', 'description': 'FP8 weights and activations (recommended for TensorRT-LLM)'},
+    'NVFP4': {'config': 'NVFP4_DEFAULT_CFG', 'description': '4-bit NVFP4; inference requires Blackwell GPU (GB10)'},
+    'INT8_SQ': {'config': 'INT8_SMOOTHQUANT_CFG', 'description': 'INT8 SmoothQuant weights and activations'},
+    'INT4_AWQ': {'config': 'INT4_AWQ_CFG', 'description': 'INT4 AWQ weight-only'},
+    'W4A8_AWQ': {'config': 'W4A8_AWQ_BETA_CFG', 'description': 'INT4 AWQ weights with FP8 activations'},
+}
+
+# Local index of resolved model locations (model name -> version, run, artifact path)
+MODEL_INDEX_PATH = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'thinkube' / 'model_index.json'
+
+# Seconds a resolved model is trusted before MLflow is asked for a newer version
+MODEL_INDEX_TTL = int(os.environ.get('THINKUBE_MODEL_INDEX_TTL', 3600))
+
+# MLflow artifact mount points, in the order they are probed:
+# - JupyterHub: /home/jovyan/thinkube/mlflow/artifacts/...
+# - TensorRT-LLM pods: /mlflow-models/artifacts/...
+MLFLOW_BASE_PATHS = [
+    Path('/home/jovyan/thinkube/mlflow'),  # JupyterHub mount
+    Path('/mlflow-models'),                 # GPU pod mount
+    Path.home() / 'thinkube' / 'mlflow',    # Generic home-based path
+]
+
+# Local (node disk, not JuiceFS) cache for prefetched models, and its size budget
+LOCAL_MODEL_CACHE_PATH = Path(os.environ.get('THINKUBE_MODEL_CACHE_DIR', '/var/tmp/thinkube-models'))
+LOCAL_MODEL_CACHE_BUDGET_GB = float(os.environ.get('THINKUBE_MODEL_CACHE_BUDGET_GB', 200))
+
+# Parallel readahead used to warm JuiceFS before weights are loaded
+READAHEAD_WORKERS = int(os.environ.get('THINKUBE_READAHEAD_WORKERS', 8))
+READAHEAD_CHUNK_SIZE = 64 * 1024 * 1024
+WEIGHT_FILE_PATTERNS = ('*.safetensors', '*.bin', '*.pt')
+
+# Catalog pages requested per call, and their local ETag cache
+CATALOG_PAGE_SIZE = 50
+CATALOG_CACHE_PATH = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'thinkube' / 'catalog'
+
+# Cached tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 30
+
+# Lifetime assumed for tokens whose response carries no expires_in
+DEFAULT_TOKEN_LIFETIME = 300
+
+# Host memory sampling interval while a pipeline profile is active (seconds)
+PROFILE_SAMPLE_INTERVAL = 0.05
+
+
+def _process_io() -> dict:
+    """Cumulative I/O counters of this process (empty where /proc is unavailable)."""
+    try:
+        with open('/proc/self/io') as f:
+            return {key: int(value) for key, value in (line.split(':') for line in f)}
+    except (OSError, ValueError):
+        return {}
+
+
+def _host_memory() -> int:
+    """Resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def _gpu_peak_memory(reset: bool = False) -> int:
+    """Peak CUDA memory allocated since the last reset, if torch is already in use."""
+    import sys
+    torch = sys.modules.get('torch')
+    if torch is None or not torch.cuda.is_available():
+        return 0
+    peak = sum(torch.cuda.max_memory_allocated(i) for i in range(torch.cuda.device_count()))
+    if reset:
+        for i in range(torch.cuda.device_count()):
+            torch.cuda.reset_peak_memory_stats(i)
+    return peak
+
+
+class PipelineProfile:
+    """
+    Per-stage spans recorded while profile_pipeline() is active.
+
+    Each span holds its stage name, parent stage, start offset and wall
+    time, bytes read/written by the process (syscall-level `bytes_*` and
+    storage-level `storage_*` from /proc/self/io), and peak host RSS and
+    CUDA memory. I/O counters are process-wide, so stages running in
+    parallel threads share them.
+    """
+
+    def __init__(self, sample_interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.spans = []
+        self.started_at = time.time()
+        self.total_s = None
+        self._start = time.perf_counter()
+        self._open = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(sample_interval,), name='thinkube-profile', daemon=True
+        )
+
+    def _sample(self, interval: float):
+        while not self._stop.wait(interval):
+            self._fold_memory(_host_memory(), 0)
+
+    def _fold_memory(self, host: int, gpu: int):
+        with self._lock:
+            for span in self._open:
+                span['peak_host_bytes'] = max(span['peak_host_bytes'], host)
+                span['peak_gpu_bytes'] = max(span['peak_gpu_bytes'], gpu)
+
+    def _begin(self, stage: str, parent: Optional[str], attributes: dict) -> dict:
+        span = {
+            'stage': stage,
+            'parent': parent,
+            'start_s': time.perf_counter() - self._start,
+            'wall_s': None,
+            'peak_host_bytes': 0,
+            'peak_gpu_bytes': 0,
+            **attributes,
+        }
+        with self._lock:
+            self._open.append(span)
+            self.spans.append(span)
+        return span
+
+    def _end(self, span: dict, wall_s: float, io: dict, error: Optional[BaseException]):
+        span['wall_s'] = wall_s
+        span.update(io)
+        if error is not None:
+            span['error'] = type(error).__name__
+        with self._lock:
+            self._open.remove(span)
+
+    def stages(self) -> dict:
+        """Totals per stage: count, wall time, bytes and peak memory."""
+        totals = {}
+        for span in self.spans:
+            if span['wall_s'] is None:
+                continue
+            total = totals.setdefault(span['stage'], {
+                'count': 0, 'wall_s': 0.0, 'bytes_read': 0, 'bytes_written': 0,
+                'storage_read': 0, 'storage_written': 0, 'peak_host_bytes': 0, 'peak_gpu_bytes': 0,
+            })
+            total['count'] += 1
+            for key in ('wall_s', 'bytes_read', 'bytes_written', 'storage_read', 'storage_written'):
+                total[key] += span.get(key, 0)
+            for key in ('peak_host_bytes', 'peak_gpu_bytes'):
+                total[key] = max(total[key], span[key])
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            'started_at': self.started_at,
+            'total_s': self.total_s,
+            'stages': self.stages(),
+            'spans': self.spans,
+        }
+
+    def to_json(self, path=None) -> str:
+        """Return the profile as JSON, also writing it to `path` if given."""
+        data = json.dumps(self.to_dict(), indent=2, default=str)
+        if path is not None:
+            Path(path).write_text(data)
+        return data
+
+    def log_to_mlflow(self, run_id: str = None, prefix: str = 'thinkube'):
+        """
+        Log per-stage totals as metrics of an MLflow run.
+
+        Metrics are named "<prefix>.<stage>.<metric>" (e.g., "thinkube.quantize.wall_s").
+
+        Args:
+            run_id: MLflow run ID (default: the active mlflow run, if any)
+            prefix: Metric name prefix (default: "thinkube")
+        """
+        if run_id is None:
+            import sys
+            mlflow = sys.modules.get('mlflow')
+            active = mlflow.active_run() if mlflow else None
+            if active is None:
+                raise ValueError("No run_id given and no active MLflow run")
+            run_id = active.info.run_id
+
+        timestamp = int(time.time() * 1000)
+        metrics = [
+            {'key': f"{prefix}.{stage}.{key}", 'value': float(value), 'timestamp': timestamp, 'step': 0}
+            for stage, total in self.stages().items()
+            for key, value in total.items()
+        ]
+        if self.total_s is not None:
+            metrics.append({'key': f"{prefix}.total_s", 'value': self.total_s, 'timestamp': timestamp, 'step': 0})
+
+        mlflow_url = get_mlflow_config()['tracking_uri']
+        # MLflow accepts at most 1000 metrics per batch
+        for i in range(0, len(metrics), 1000):
+            response = get_client().post(
+                f"{mlflow_url}/api/2.0/mlflow/runs/log-batch",
+                auth='mlflow',
+                json={'run_id': run_id, 'metrics': metrics[i:i + 1000]},
+            )
+            response.raise_for_status()
+        print(f"✓ Logged {len(metrics)} pipeline metrics to MLflow run {run_id}")
+
+    def report(self):
+        """Print per-stage totals, slowest first."""
+        print(f"Pipeline profile ({self.total_s or 0:.2f}s total):")
+        for stage, total in sorted(self.stages().items(), key=lambda item: -item[1]['wall_s']):
+            print(f"  {stage:24s} {total['wall_s']:8.2f}s  x{total['count']:<3d} "
+                  f"read {total['bytes_read'] / 1e6:9.1f} MB  written {total['bytes_written'] / 1e6:9.1f} MB  "
+                  f"host {total['peak_host_bytes'] / 1e9:6.2f} GB  gpu {total['peak_gpu_bytes'] / 1e9:6.2f} GB")
+
+
+_active_profiles = []
+_span_stack = threading.local()
+
+
+@contextmanager
+def profile_pipeline(sample_interval: float = PROFILE_SAMPLE_INTERVAL):
+    """
+    Record a span for every pipeline stage run inside the block.
+
+    Stages cover token fetches, MLflow lookups, path probing, readahead,
+    weight loading, calibration, quantization, export, registration and
+    waiting. Outside profile_pipeline() spans cost a list check.
+
+    Args:
+        sample_interval: Host memory sampling interval in seconds (default: 0.05)
+
+    Yields:
+        PipelineProfile
+
+    Example:
+        from thinkube_models import profile_pipeline
+
+        with profile_pipeline() as profile:
+            model, tokenizer = load_model_for_finetuning("unsloth/gpt-oss-20b")
+            register_finetuned_model(model, tokenizer, "my-model", "unsloth/gpt-oss-20b")
+
+        profile.report()
+        profile.to_json("profile.json")
+        profile.log_to_mlflow(run_id)
+    """
+    profile = PipelineProfile(sample_interval)
+    _gpu_peak_memory(reset=True)
+    profile._sampler.start()
+    _active_profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        _active_profiles.remove(profile)
+        profile._stop.set()
+        profile._sampler.join()
+        profile.total_s = time.perf_counter() - profile._start
+
+
+@contextmanager
+def stage_span(stage: str, **attributes):
+    """
+    Time a pipeline stage for every active profile_pipeline().
+
+    Usable as a context manager or a decorator; extra keyword arguments are
+    stored on the span.
+
+    Args:
+        stage: Stage name (e.g., "quantize")
+        **attributes: Extra span fields (e.g., quantization="FP8")
+    """
+    profiles = list(_active_profiles)
+    if not profiles:
+        yield
+        return
+
+    stack = getattr(_span_stack, 'stages', None)
+    if stack is None:
+        stack = _span_stack.stages = []
+    parent = stack[-1] if stack else None
+
+    # Fold the CUDA peak reached so far into the enclosing spans before resetting it
+    host, gpu = _host_memory(), _gpu_peak_memory(reset=True)
+    spans = []
+    for profile in profiles:
+        profile._fold_memory(host, gpu)
+        spans.append(profile._begin(stage, parent, attributes))
+        profile._fold_memory(host, 0)
+    io_before = _process_io()
+    start = time.perf_counter()
+    stack.append(stage)
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        stack.pop()
+        wall_s = time.perf_counter() - start
+        io_after = _process_io()
+        io = {
+            name: io_after.get(key, 0) - io_before.get(key, 0)
+            for name, key in (('bytes_read', 'rchar'), ('bytes_written', 'wchar'),
+                              ('storage_read', 'read_bytes'), ('storage_written', 'write_bytes'))
+        }
+        host, gpu = _host_memory(), _gpu_peak_memory()
+        for profile, span in zip(profiles, spans):
+            profile._fold_memory(host, gpu)
+            profile._end(span, wall_s, io, error)
+
+
+class ThinkubeClient:
+    """
+    Shared HTTP client for MLflow and thinkube-control.
+
+    All API calls go through one pooled keep-alive session with retry and
+    exponential backoff, and OAuth tokens are cached until shortly before
+    they expire. A notebook that polls or lists models therefore reuses the
+    same TCP/TLS connection and token instead of handshaking with Keycloak
+    on every request.
+
+    Use get_client() to obtain the process-wide instance.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        refresh_margin: int = TOKEN_REFRESH_MARGIN,
+    ):
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+        # Connection errors are retried for every method; status-based
+        # retries only apply to idempotent methods, so a registration POST
+        # is never submitted twice.
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.refresh_margin = refresh_margin
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def _cached_token(self, key, fetch):
+        """Return a cached token for `key`, calling `fetch()` when it is missing or expiring."""
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+
+            payload = fetch()
+            lifetime = int(payload.get('expires_in') or DEFAULT_TOKEN_LIFETIME)
+            expires_at = time.monotonic() + max(lifetime - self.refresh_margin, 0)
+            self._tokens[key] = (payload['access_token'], expires_at)
+            return payload['access_token']
+
+    def invalidate_tokens(self, service: str = None):
+        """Drop cached tokens for 'mlflow', 'control', or all services if None."""
+        with self._lock:
+            for key in list(self._tokens):
+                if service is None or key[0] == service:
+                    del self._tokens[key]
+
+    def mlflow_token(self):
+        """Get a (cached) authentication token for the MLflow API."""
+        config = get_mlflow_config()
+
+        if not config['token_url']:
+            return None
+
+        def fetch():
+            response = self.session.post(
+                config['token_url'],
+                data={
+                    'grant_type': 'password',
+                    'client_id': config['client_id'],
+                    'client_secret': config['client_secret'],
+                    'username': config['username'],
+                    'password': config['password'],
+                    'scope': 'openid'
+                },
+                verify=False,
+                timeout=30
+            )
+            response.raise_for_status()
+            return response.json()
+
+        try:
+            return self._cached_token(('mlflow', config['token_url'], config['username']),
+                                      stage_span('token.mlflow')(fetch))
+        except Exception as e:
+            print(f"Warning: Could not get MLflow token: {e}")
+            return None
+
+    def control_token(self):
+        """Get a (cached) authentication token for the thinkube-control API."""
+        # Try to get token from environment (set by service discovery)
+        token = os.environ.get('THINKUBE_CONTROL_TOKEN')
+        if token:
+            return token
+
+        # Try to read from JupyterHub auth
+        token_file = Path.home() / ".config" / "thinkube" / "token"
+        if token_file.exists():
+            return token_file.read_text().strip()
+
+        # Try to get from Keycloak using service account
+        keycloak_url = os.environ.get('KEYCLOAK_URL')
+        client_id = os.environ.get('KEYCLOAK_CLIENT_ID', 'thinkube-control')
+        client_secret = os.environ.get('KEYCLOAK_CLIENT_SECRET')
+
+        if not (keycloak_url and client_secret):
+            return None
+
+        realm = os.environ.get('KEYCLOAK_REALM', 'thinkube')
+        token_url = f"{keycloak_url}/realms/{realm}/protocol/openid-connect/token"
+
+        def fetch():
+            response = self.session.post(
+                token_url,
+                data={
+                    'grant_type': 'client_credentials',
+                    'client_id': client_id,
+                    'client_secret': client_secret
+                },
+                timeout=10
+            )
+            response.raise_for_status()
+            return response.json()
+
+        try:
+            return self._cached_token(('control', token_url, client_id), stage_span('token.control')(fetch))
+        except Exception as e:
+            print(f"Warning: Could not get token from Keycloak: {e}")
+            return None
+
+    def request(self, method: str, url: str, auth: str = None, **kwargs):
+        """
+        Send a request through the pooled session.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            auth: 'mlflow' or 'control' to attach a bearer token, or None
+            **kwargs: Passed through to requests (params, json, timeout, ...)
+
+        Returns:
+            requests.Response (not yet checked with raise_for_status)
+        """
+        kwargs.setdefault('timeout', 30)
+        if auth == 'mlflow':
+            kwargs.setdefault('verify', False)
+        headers = dict(kwargs.pop('headers', None) or {})
+
+        token = self._token(auth)
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        response = self.session.request(method, url, headers=headers, **kwargs)
+
+        # A token revoked or expired server-side: fetch a fresh one and retry once
+        if response.status_code == 401 and token:
+            self.invalidate_tokens(auth)
+            fresh = self._token(auth)
+            if fresh and fresh != token:
+                headers['Authorization'] = f'Bearer {fresh}'
+                response = self.session.request(method, url, headers=headers, **kwargs)
+
+        return response
+
+    def _token(self, auth):
+        if auth == 'mlflow':
+            return self.mlflow_token()
+        if auth == 'control':
+            return self.control_token()
+        return None
+
+    def get(self, url: str, auth: str = None, **kwargs):
+        return self.request('GET', url, auth=auth, **kwargs)
+
+    def post(self, url: str, auth: str = None, **kwargs):
+        return self.request('POST', url, auth=auth, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ThinkubeClient:
+    """Get the process-wide ThinkubeClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ThinkubeClient()
+    return _client
 
 
 def get_mlflow_config():
@@ -51,34 +595,372 @@ def get_mlflow_config():
 
 
 def get_mlflow_token():
-    """Get authentication token for MLflow API."""
-    config = get_mlflow_config()
+    """Get authentication token for MLflow API (cached until shortly before expiry)."""
+    return get_client().mlflow_token()
 
-    if not config['token_url']:
-        return None
+
+def _load_model_index():
+    """Read the resolved-model index, returning {} if it is missing or unreadable."""
+    try:
+        return json.loads(MODEL_INDEX_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_model_index(model_name: str, entry: Optional[dict]):
+    """Store (or with entry=None, drop) one model in the index, replacing the file atomically."""
+    _update_model_index_entries({model_name: entry})
+
+
+def _update_model_index_entries(entries: dict):
+    """Store several models in the index in one write; None values drop a model."""
+    index = _load_model_index()
+    for model_name, entry in entries.items():
+        if entry is None:
+            index.pop(model_name, None)
+        else:
+            index[model_name] = entry
 
     try:
-        response = requests.post(
-            config['token_url'],
-            data={
-                'grant_type': 'password',
-                'client_id': config['client_id'],
-                'client_secret': config['client_secret'],
-                'username': config['username'],
-                'password': config['password'],
-                'scope': 'openid'
-            },
-            verify=False,
-            timeout=30
+        MODEL_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = MODEL_INDEX_PATH.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(index, indent=2))
+        os.replace(tmp_path, MODEL_INDEX_PATH)
+    except OSError as e:
+        print(f"  Warning: Could not update model index: {e}")
+
+
+def invalidate_model_index(model_id: str = None):
+    """
+    Forget cached model resolutions.
+
+    Args:
+        model_id: Model to forget (e.g., "unsloth/gpt-oss-20b"), or None for all
+    """
+    if model_id is None:
+        MODEL_INDEX_PATH.unlink(missing_ok=True)
+    else:
+        _update_model_index(model_id.replace('/', '-'), None)
+
+
+@stage_span('resolve.path_probe')
+def _find_artifact_path(experiment_id: str, run_id: str) -> Path:
+    """Probe the MLflow mount points for a run's model artifacts."""
+    relative = Path('artifacts') / experiment_id / run_id / 'artifacts' / 'model'
+    for base_path in MLFLOW_BASE_PATHS:
+        candidate = base_path / relative
+        if candidate.exists():
+            return candidate
+
+    tried_paths = [str(p / relative) for p in MLFLOW_BASE_PATHS]
+    raise FileNotFoundError(
+        f"Model not found. Tried paths:\n" +
+        "\n".join(f"  - {p}" for p in tried_paths) +
+        f"\nThe model may not have been mirrored correctly."
+    )
+
+
+@stage_span('resolve.mlflow_search')
+def _search_latest_version(model_name: str) -> dict:
+    """Return the latest MLflow model version record for `model_name`."""
+    client = get_client()
+    if not client.mlflow_token():
+        raise RuntimeError(
+            "Could not authenticate with MLflow. "
+            "Ensure MLFLOW_* environment variables are set."
         )
-        response.raise_for_status()
-        return response.json()['access_token']
-    except Exception as e:
-        print(f"Warning: Could not get MLflow token: {e}")
-        return None
+
+    mlflow_url = get_mlflow_config()['tracking_uri']
+    response = client.get(
+        f"{mlflow_url}/api/2.0/mlflow/model-versions/search",
+        auth='mlflow',
+        params={'filter': f"name='{model_name}'"},
+    )
+    response.raise_for_status()
+
+    versions = response.json().get('model_versions', [])
+    if not versions:
+        raise ValueError(
+            f"Model '{model_name}' not found in MLflow registry. "
+            f"Please mirror the model first using thinkube-control."
+        )
+
+    return max(versions, key=lambda v: int(v['version']))
+
+
+def _search_latest_versions(model_names: list, max_workers: int) -> dict:
+    """
+    Return {model name: latest version record} for several models.
+
+    Uses one `name IN (...)` search; MLflow servers that reject IN filters
+    get one search per name, run concurrently. Unknown names are omitted.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    client = get_client()
+    if not client.mlflow_token():
+        raise RuntimeError(
+            "Could not authenticate with MLflow. "
+            "Ensure MLFLOW_* environment variables are set."
+        )
+
+    mlflow_url = get_mlflow_config()['tracking_uri']
+    names = ", ".join(f"'{name}'" for name in model_names)
+    versions = []
+    params = {'filter': f"name IN ({names})", 'max_results': 1000}
+    with stage_span('resolve.mlflow_search', models=len(model_names)):
+        while True:
+            response = client.get(
+                f"{mlflow_url}/api/2.0/mlflow/model-versions/search", auth='mlflow', params=params
+            )
+            if response.status_code == 400:
+                versions = None
+                break
+            response.raise_for_status()
+            page = response.json()
+            versions.extend(page.get('model_versions', []))
+            if not page.get('next_page_token'):
+                break
+            params['page_token'] = page['next_page_token']
+
+    if versions is None:
+        print(f"  MLflow does not support IN filters, searching {len(model_names)} models separately...")
+
+        def search(name):
+            try:
+                return _search_latest_version(name)
+            except ValueError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thinkube-resolve') as pool:
+            versions = [v for v in pool.map(search, model_names) if v is not None]
+
+    latest = {}
+    for version in versions:
+        current = latest.get(version['name'])
+        if current is None or int(version['version']) > int(current['version']):
+            latest[version['name']] = version
+    return latest
+
+
+@stage_span('resolve.mlflow_run')
+def _get_experiment_id(run_id: str) -> str:
+    """Look up the experiment that owns an MLflow run."""
+    mlflow_url = get_mlflow_config()['tracking_uri']
+    response = get_client().get(
+        f"{mlflow_url}/api/2.0/mlflow/runs/get",
+        auth='mlflow',
+        params={'run_id': run_id},
+    )
+    response.raise_for_status()
+    return response.json()['run']['info']['experiment_id']
 
 
-def load_model_for_finetuning(model_id: str, device_map: str = "auto"):
+@stage_span('resolve')
+def resolve_model(model_id: str, refresh: bool = False) -> dict:
+    """
+    Resolve a model ID to its latest MLflow version and JuiceFS artifact path.
+
+    Resolutions are kept in a local index (MODEL_INDEX_PATH). Within
+    MODEL_INDEX_TTL seconds a cached entry is returned without contacting
+    MLflow; after that MLflow is asked for the latest version, and the run
+    lookup and path probing are only repeated when a newer version exists.
+    If MLflow is unreachable, the last known resolution is used.
+
+    Args:
+        model_id: HuggingFace model ID (e.g., "unsloth/gpt-oss-20b")
+        refresh: If True, ignore the TTL and check MLflow for a newer version
+
+    Returns:
+        dict: name, version, run_id, experiment_id, path and resolved_at
+    """
+    model_name = model_id.replace('/', '-')
+    cached = _load_model_index().get(model_name)
+
+    if cached and not refresh and time.time() - cached['resolved_at'] < MODEL_INDEX_TTL:
+        if Path(cached['path']).exists():
+            print(f"  Using cached resolution: version {cached['version']} (run_id: {cached['run_id']})")
+            return cached
+
+    print(f"  Querying MLflow for model versions...")
+    try:
+        latest = _search_latest_version(model_name)
+    except ValueError:
+        _update_model_index(model_name, None)
+        raise
+    except (RuntimeError, requests.exceptions.RequestException) as e:
+        if cached and Path(cached['path']).exists():
+            print(f"  Warning: MLflow unavailable ({e})")
+            print(f"  Using last known version {cached['version']} (run_id: {cached['run_id']})")
+            return cached
+        raise
+
+    print(f"  Found version {latest['version']} (run_id: {latest['run_id']})")
+    entry = _index_entry(model_name, latest, cached)
+    _update_model_index(model_name, entry)
+    return entry
+
+
+def _index_entry(model_name: str, latest: dict, cached: Optional[dict]) -> dict:
+    """Build the index entry for a model's latest version, reusing the cached one if unchanged."""
+    run_id = latest['run_id']
+    if (cached and cached['version'] == latest['version'] and cached['run_id'] == run_id
+            and Path(cached['path']).exists()):
+        return dict(cached, resolved_at=time.time())
+
+    # Get run details to retrieve experiment_id, then find the artifacts on JuiceFS
+    experiment_id = _get_experiment_id(run_id)
+    return {
+        'name': model_name,
+        'version': latest['version'],
+        'run_id': run_id,
+        'experiment_id': experiment_id,
+        'path': str(_find_artifact_path(experiment_id, run_id)),
+        'resolved_at': time.time(),
+    }
+
+
+@stage_span('resolve')
+def resolve_models(
+    model_ids: List[str],
+    refresh: bool = False,
+    skip_missing: bool = False,
+    max_workers: int = 8
+) -> dict:
+    """
+    Resolve several model IDs at once (see resolve_model).
+
+    Models whose index entry is within MODEL_INDEX_TTL are answered
+    locally. The rest are looked up with a single MLflow search, and the
+    run lookups and path probes for new versions run concurrently. The
+    index is written once at the end.
+
+    Args:
+        model_ids: HuggingFace model IDs (e.g., ["unsloth/gpt-oss-20b", "Qwen/Qwen3-8B"])
+        refresh: If True, ignore the TTL and check MLflow for newer versions
+        skip_missing: If True, leave models that are not registered out of the result
+            instead of raising ValueError
+        max_workers: Concurrent run lookups (default: 8)
+
+    Returns:
+        dict: model ID -> resolution dict (name, version, run_id, experiment_id, path,
+            resolved_at), in the order of `model_ids`
+
+    Example:
+        from thinkube_models import resolve_models
+
+        for model_id, info in resolve_models(["unsloth/gpt-oss-20b", "Qwen/Qwen3-8B"]).items():
+            print(model_id, info['version'], info['path'])
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    names = {model_id: model_id.replace('/', '-') for model_id in dict.fromkeys(model_ids)}
+    index = _load_model_index()
+    resolved = {}
+    stale = []
+    for model_id, name in names.items():
+        cached = index.get(name)
+        if (cached and not refresh and time.time() - cached['resolved_at'] < MODEL_INDEX_TTL
+                and Path(cached['path']).exists()):
+            resolved[model_id] = cached
+        else:
+            stale.append(model_id)
+
+    print(f"Resolving {len(names)} models ({len(resolved)} from cache)...")
+    if stale:
+        try:
+            latest = _search_latest_versions([names[m] for m in stale], max_workers)
+        except (RuntimeError, requests.exceptions.RequestException) as e:
+            fallback = {m: index[names[m]] for m in stale
+                        if names[m] in index and Path(index[names[m]]['path']).exists()}
+            if len(fallback) < len(stale):
+                raise
+            print(f"  Warning: MLflow unavailable ({e}), using last known versions")
+            latest, stale = {}, []
+            resolved.update(fallback)
+
+        missing = [m for m in stale if names[m] not in latest]
+        if missing and not skip_missing:
+            _update_model_index_entries({names[m]: None for m in missing})
+            raise ValueError(
+                f"Models not found in MLflow registry: {', '.join(missing)}. "
+                f"Please mirror them first using thinkube-control."
+            )
+        for model_id in missing:
+            print(f"  ✗ Not registered: {model_id}")
+
+        found = [m for m in stale if names[m] in latest]
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thinkube-resolve') as pool:
+            entries = pool.map(
+                lambda m: _index_entry(names[m], latest[names[m]], index.get(names[m])), found
+            )
+            resolved.update(zip(found, entries))
+
+        updates = {names[m]: resolved[m] for m in found}
+        updates.update({names[m]: None for m in missing})
+        _update_model_index_entries(updates)
+
+    print(f"✓ Resolved {len(resolved)} models")
+    return {model_id: resolved[model_id] for model_id in names if model_id in resolved}
+
+
+def load_models(
+    model_ids: List[str],
+    tokenizers_only: bool = False,
+    device_map: str = "cpu",
+    max_workers: int = 4,
+    refresh: bool = False
+) -> dict:
+    """
+    Resolve and load several small models (or only their tokenizers) concurrently.
+
+    Loading uses transformers directly; use load_model_for_finetuning()
+    for models that will be fine-tuned with Unsloth.
+
+    Args:
+        model_ids: HuggingFace model IDs
+        tokenizers_only: If True, load only the tokenizers
+        device_map: Device mapping for model loading (default: "cpu")
+        max_workers: Models loaded at the same time (default: 4)
+        refresh: If True, ignore the resolved-model cache TTL
+
+    Returns:
+        dict: model ID -> tokenizer, or model ID -> (model, tokenizer)
+
+    Example:
+        from thinkube_models import load_models
+
+        tokenizers = load_models(EVAL_MODELS, tokenizers_only=True)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    resolved = resolve_models(model_ids, refresh=refresh)
+
+    def load(model_id):
+        path = str(resolved[model_id]['path'])
+        with stage_span('load', model=model_id):
+            tokenizer = AutoTokenizer.from_pretrained(path)
+            if tokenizers_only:
+                return tokenizer
+            model = AutoModelForCausalLM.from_pretrained(path, device_map=device_map, torch_dtype="auto")
+            return model, tokenizer
+
+    what = "tokenizers" if tokenizers_only else "models"
+    print(f"Loading {len(resolved)} {what} ({max_workers} at a time)...")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thinkube-load') as pool:
+        loaded = dict(zip(resolved, pool.map(load, resolved)))
+    print(f"✓ Loaded {len(loaded)} {what}")
+    return loaded
+
+
+def load_model_for_finetuning(
+    model_id: str,
+    device_map: str = "auto",
+    refresh: bool = False,
+    warm: bool = False,
+    prefetch: bool = False
+):
     """
     Load a model from MLflow Model Registry for fine-tuning.
 
@@ -88,6 +970,13 @@ def load_model_for_finetuning(model_id: str, device_map: str = "auto"):
     Args:
         model_id: HuggingFace model ID (e.g., "unsloth/gpt-oss-20b")
         device_map: Device mapping for model loading (default: "auto")
+        refresh: If True, bypass the resolved-model cache TTL (see resolve_model)
+        warm: If True, read the weight files from JuiceFS with parallel readahead
+            before loading (see warm_model_files). Off by default: it reads every
+            shard a second time, which only pays off when JuiceFS is cold; it is
+            never done for a local cache copy
+        prefetch: If True, copy the model to the local disk cache first (see prefetch_model);
+            an existing local copy is always used
 
     Returns:
         tuple: (model, tokenizer) ready for fine-tuning with Unsloth
@@ -101,305 +990,1225 @@ def load_model_for_finetuning(model_id: str, device_map: str = "auto"):
         # Then fine-tune with Unsloth as usual
         model = FastLanguageModel.get_peft_model(model, ...)
     """
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    print(f"Loading model from MLflow: {model_id}")
+    print(f"  MLflow model name: {model_id.replace('/', '-')}")
 
-    # Convert model_id to MLflow model name (replace / with -)
-    model_name = model_id.replace('/', '-')
+    resolved = resolve_model(model_id, refresh=refresh)
+    model_path = Path(resolved['path'])
 
-    print(f"Loading model from MLflow: {model_id}")
-    print(f"  MLflow model name: {model_name}")
+    local_copy = _local_model_copy(resolved)
+    if local_copy is None and prefetch:
+        local_copy = prefetch_model(model_id)
+    if local_copy is not None:
+        model_path = local_copy
+        print(f"  Using local cache: {model_path}")
+    else:
+        print(f"  Model path: {model_path}")
+        if warm:
+            warm_model_files(model_path)
 
-    # Get MLflow configuration and token
-    config = get_mlflow_config()
-    token = get_mlflow_token()
+    return _load_weights(model_path, device_map)
 
-    if not token:
-        raise RuntimeError(
-            "Could not authenticate with MLflow. "
-            "Ensure MLFLOW_* environment variables are set."
+
+def has_capability(capability: str) -> bool:
+    """
+    Check whether this kernel's environment provides a capability, without importing it.
+
+    Answers from the capability manifest baked into the image or venv (see
+    check_jupyter_flavor.flavor_supports); outside a Thinkube image, only
+    checks whether the package can be found.
+
+    Args:
+        capability: Package or feature name (e.g., "unsloth", "nvfp4")
+
+    Returns:
+        bool: True if available
+    """
+    try:
+        from check_jupyter_flavor import flavor_supports
+    except ImportError:
+        import importlib.util
+        return importlib.util.find_spec(capability) is not None
+    return flavor_supports(capability)
+
+
+@stage_span('load')
+def _load_weights(model_path: Path, device_map: str):
+    """Load a model directory with Unsloth, falling back to transformers."""
+    # Only environments that ship Unsloth pay for importing it (several seconds)
+    use_unsloth = has_capability('unsloth')
+    if use_unsloth:
+        try:
+            from unsloth import FastLanguageModel
+        except ImportError:
+            use_unsloth = False
+
+    # Load with Unsloth for efficient fine-tuning
+    # Unsloth handles MXFP4 models internally - it converts MXFP4 to NF4 for training
+    # when load_in_4bit=True. This is their "magic" for gpt-oss models.
+    if use_unsloth:
+        print(f"  Loading with Unsloth FastLanguageModel from: {model_path}")
+        print(f"  Using load_in_4bit=True (Unsloth handles MXFP4→NF4 conversion)")
+
+        model, tokenizer = FastLanguageModel.from_pretrained(
+            model_name=str(model_path),
+            dtype=None,
+            load_in_4bit=True,  # Unsloth converts MXFP4 to trainable NF4 internally
+            device_map=device_map,
         )
+        print(f"  ✓ Model loaded with Unsloth (ready for QLoRA fine-tuning)")
 
-    headers = {'Authorization': f'Bearer {token}'}
-    mlflow_url = config['tracking_uri']
+    else:
+        # Fallback to standard transformers if Unsloth not available
+        print(f"  Unsloth not available, loading with transformers...")
+        from transformers import AutoModelForCausalLM, AutoTokenizer
 
-    # Query MLflow for model versions
-    print(f"  Querying MLflow for model versions...")
-    response = requests.get(
-        f"{mlflow_url}/api/2.0/mlflow/model-versions/search",
-        params={'filter': f"name='{model_name}'"},
-        headers=headers,
-        verify=False,
-        timeout=30
-    )
-    response.raise_for_status()
+        tokenizer = AutoTokenizer.from_pretrained(str(model_path))
+        model = AutoModelForCausalLM.from_pretrained(
+            str(model_path),
+            device_map=device_map,
+            torch_dtype="auto",
+        )
+        print(f"  ✓ Model loaded successfully with transformers")
 
-    versions = response.json().get('model_versions', [])
-    if not versions:
+    return model, tokenizer
+
+
+def _weight_files(model_path: Path) -> list:
+    return sorted({p for pattern in WEIGHT_FILE_PATTERNS for p in Path(model_path).rglob(pattern)})
+
+
+def _read_range(path: Path, offset: int, length: int) -> int:
+    """Read one byte range into a scratch buffer, returning the bytes read."""
+    buffer = bytearray(min(length, READAHEAD_CHUNK_SIZE))
+    total = 0
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        while total < length:
+            view = memoryview(buffer)[:min(len(buffer), length - total)]
+            count = os.preadv(fd, [view], offset + total)
+            if count == 0:
+                break
+            total += count
+    finally:
+        os.close(fd)
+    return total
+
+
+@stage_span('warm')
+def warm_model_files(model_path, max_workers: int = READAHEAD_WORKERS) -> int:
+    """
+    Pull a model's weight files through the page cache with parallel readahead.
+
+    Transformers and Unsloth memory-map safetensors shards and fault them in
+    one shard after another, which leaves JuiceFS mostly idle on a cold
+    cache. This reads every shard in READAHEAD_CHUNK_SIZE ranges from
+    `max_workers` threads at once, so the subsequent mmap-based load is
+    served from memory.
+
+    Args:
+        model_path: Model directory
+        max_workers: Concurrent range reads (default: THINKUBE_READAHEAD_WORKERS or 8)
+
+    Returns:
+        int: Bytes read
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    files = _weight_files(model_path)
+    ranges = []
+    for path in files:
+        size = path.stat().st_size
+        if hasattr(os, 'posix_fadvise'):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        ranges.extend((path, offset, min(READAHEAD_CHUNK_SIZE, size - offset))
+                      for offset in range(0, size, READAHEAD_CHUNK_SIZE))
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thinkube-readahead') as pool:
+        total = sum(pool.map(lambda r: _read_range(*r), ranges))
+    elapsed = max(time.time() - start, 1e-6)
+    print(f"  Warmed {len(files)} weight files: {total / 1e9:.2f} GB in {elapsed:.1f}s "
+          f"({total / 1e6 / elapsed:.0f} MB/s)")
+    return total
+
+
+def _local_cache_entries() -> list:
+    """Complete entries in the local model cache, least recently used first."""
+    entries = []
+    for marker in LOCAL_MODEL_CACHE_PATH.glob('*/.thinkube_cache.json'):
+        try:
+            info = json.loads(marker.read_text())
+        except (OSError, ValueError):
+            continue
+        info['path'] = marker.parent
+        info['last_used'] = marker.stat().st_mtime
+        entries.append(info)
+    return sorted(entries, key=lambda e: e['last_used'])
+
+
+def _local_model_copy(resolved: dict) -> Optional[Path]:
+    """Return the local cached copy of a resolved model version, marking it as used."""
+    marker = LOCAL_MODEL_CACHE_PATH / f"{resolved['name']}-v{resolved['version']}" / '.thinkube_cache.json'
+    if not marker.exists():
+        return None
+    os.utime(marker)
+    return marker.parent
+
+
+@stage_span('prefetch')
+def prefetch_model(model_id: str, budget_gb: float = None, max_workers: int = READAHEAD_WORKERS) -> Path:
+    """
+    Copy a registered model from JuiceFS to the local disk cache.
+
+    Files are copied in parallel into LOCAL_MODEL_CACHE_PATH (set
+    THINKUBE_MODEL_CACHE_DIR to a local NVMe path). Least recently used
+    models are evicted to keep the cache within `budget_gb`.
+    load_model_for_finetuning() picks up local copies automatically.
+
+    Args:
+        model_id: HuggingFace model ID (e.g., "unsloth/gpt-oss-20b")
+        budget_gb: Cache size limit (default: THINKUBE_MODEL_CACHE_BUDGET_GB or 200)
+        max_workers: Concurrent file copies (default: THINKUBE_READAHEAD_WORKERS or 8)
+
+    Returns:
+        Path to the local copy
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    resolved = resolve_model(model_id)
+    local_copy = _local_model_copy(resolved)
+    if local_copy is not None:
+        print(f"  Already cached locally: {local_copy}")
+        return local_copy
+
+    source = Path(resolved['path'])
+    files = [p for p in source.rglob('*') if p.is_file()]
+    size = sum(p.stat().st_size for p in files)
+    budget = (budget_gb if budget_gb is not None else LOCAL_MODEL_CACHE_BUDGET_GB) * 1e9
+    if size > budget:
+        raise ValueError(f"Model is {size / 1e9:.1f} GB, larger than the cache budget ({budget / 1e9:.0f} GB)")
+
+    # Evict least recently used models until the new one fits
+    entries = _local_cache_entries()
+    used = sum(e.get('size', 0) for e in entries)
+    while entries and used + size > budget:
+        victim = entries.pop(0)
+        print(f"  Evicting {victim['path'].name} from local cache")
+        shutil.rmtree(victim['path'], ignore_errors=True)
+        used -= victim.get('size', 0)
+
+    print(f"Prefetching {model_id} ({size / 1e9:.2f} GB) to {LOCAL_MODEL_CACHE_PATH}...")
+    target = LOCAL_MODEL_CACHE_PATH / f"{resolved['name']}-v{resolved['version']}"
+    start = time.time()
+
+    def write(tmp_dir):
+        def copy(path):
+            destination = tmp_dir / path.relative_to(source)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, destination)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thinkube-prefetch') as pool:
+            list(pool.map(copy, files))
+        (tmp_dir / '.thinkube_cache.json').write_text(json.dumps({
+            'model_id': model_id, 'version': resolved['version'], 'source': str(source), 'size': size,
+        }))
+
+    _write_atomically(target, write)
+    elapsed = max(time.time() - start, 1e-6)
+    print(f"✓ Cached locally in {elapsed:.1f}s ({size / 1e6 / elapsed:.0f} MB/s): {target}")
+    return target
+
+
+def get_thinkube_control_url():
+    """Get thinkube-control API URL from environment."""
+    # Try service discovery first
+    url = os.environ.get('THINKUBE_CONTROL_URL')
+    if url:
+        return url.rstrip('/')
+
+    # Fallback to in-cluster service
+    return "http://backend.thinkube-control.svc.cluster.local:8000"
+
+
+def get_auth_token():
+    """Get authentication token for thinkube-control API (cached until shortly before expiry)."""
+    return get_client().control_token()
+
+
+def register_calibration_corpus(name: str, path: str, subset: str = None, split: str = "train", field: str = "text"):
+    """
+    Register a HuggingFace dataset as a named calibration corpus.
+
+    Registered names can be passed as `calib_data` to the quantizers; the
+    first time a corpus is used its texts are snapshotted under
+    CALIBRATION_CACHE_PATH so later runs need no network access.
+
+    Args:
+        name: Corpus name to use as `calib_data`
+        path: HuggingFace dataset path (e.g., "wikitext")
+        subset: Optional dataset configuration name (e.g., "wikitext-103-raw-v1")
+        split: Dataset split (default: "train")
+        field: Field holding the text (default: "text")
+    """
+    CALIBRATION_CORPORA[name] = {'path': path, 'name': subset, 'split': split, 'field': field}
+
+
+def _write_atomically(target: Path, write):
+    """Run `write(tmp_dir)` and rename the result to `target`; a concurrent writer that finishes first wins."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = target.parent / f".{target.name}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+    try:
+        write(tmp_dir)
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.rename(tmp_dir, target)
+    except OSError:
+        if not target.exists():
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _corpus_texts(corpus: str, num_samples: int) -> list:
+    """Return `num_samples` texts of a registered corpus, snapshotting them on first use."""
+    if corpus not in CALIBRATION_CORPORA:
         raise ValueError(
-            f"Model '{model_name}' not found in MLflow registry. "
-            f"Please mirror the model first using thinkube-control."
+            f"Unknown calibration corpus: {corpus}. "
+            f"Available: {', '.join(CALIBRATION_CORPORA)}"
         )
 
-    # Get latest version
-    latest = max(versions, key=lambda v: int(v['version']))
-    run_id = latest['run_id']
-    print(f"  Found version {latest['version']} (run_id: {run_id})")
+    snapshot = CALIBRATION_CACHE_PATH / corpus / 'texts'
+    try:
+        texts = json.loads((snapshot / 'texts.json').read_text())
+        if len(texts) >= num_samples:
+            return texts[:num_samples]
+    except (OSError, ValueError):
+        pass
 
-    # Get run details to retrieve experiment_id
-    run_response = requests.get(
-        f"{mlflow_url}/api/2.0/mlflow/runs/get",
-        params={'run_id': run_id},
-        headers=headers,
-        verify=False,
-        timeout=30
-    )
-    run_response.raise_for_status()
-    experiment_id = run_response.json()['run']['info']['experiment_id']
-
-    # Construct model path on JuiceFS
-    # Try multiple possible mount points for different environments:
-    # - JupyterHub: /home/jovyan/thinkube/mlflow/artifacts/...
-    # - TensorRT-LLM pods: /mlflow-models/artifacts/...
-    possible_base_paths = [
-        Path('/home/jovyan/thinkube/mlflow'),  # JupyterHub mount
-        Path('/mlflow-models'),                 # GPU pod mount
-        Path.home() / 'thinkube' / 'mlflow',    # Generic home-based path
-    ]
-
-    model_path = None
-    for base_path in possible_base_paths:
-        candidate = base_path / 'artifacts' / experiment_id / run_id / 'artifacts' / 'model'
-        if candidate.exists():
-            model_path = candidate
-            break
-
-    if model_path is None:
-        tried_paths = [str(p / 'artifacts' / experiment_id / run_id / 'artifacts' / 'model')
-                       for p in possible_base_paths]
-        raise FileNotFoundError(
-            f"Model not found. Tried paths:\n" +
-            "\n".join(f"  - {p}" for p in tried_paths) +
-            f"\nThe model may not have been mirrored correctly."
+    # Stream only the samples we need instead of loading the whole split
+    from datasets import load_dataset
+    from itertools import islice
+
+    spec = CALIBRATION_CORPORA[corpus]
+    print(f"  Downloading {num_samples} samples of calibration corpus '{corpus}'...")
+    dataset = load_dataset(spec['path'], spec['name'], split=spec['split'], streaming=True)
+    texts = [item[spec['field']][:1024] for item in islice(dataset, num_samples)]
+
+    _write_atomically(snapshot, lambda d: (d / 'texts.json').write_text(json.dumps(texts)))
+    print(f"  ✓ Calibration corpus snapshotted to {snapshot}")
+    return texts
+
+
+def _tokenizer_key(tokenizer) -> str:
+    """Identify a tokenizer by name and vocabulary, so fine-tunes that add tokens get their own snapshot."""
+    import hashlib
+    vocab = json.dumps(sorted(tokenizer.get_vocab().items()))
+    digest = hashlib.sha256(f"{type(tokenizer).__name__}:{vocab}".encode()).hexdigest()[:12]
+    name = Path(str(getattr(tokenizer, 'name_or_path', '') or 'tokenizer')).name
+    return f"{name}-{digest}"
+
+
+def load_calibration_tokens(tokenizer, corpus: str = DEFAULT_CALIBRATION_CORPUS,
+                            num_samples: int = 128, max_length: int = 512):
+    """
+    Load a pre-tokenized calibration set, building the snapshot on first use.
+
+    Token ids are stored under CALIBRATION_CACHE_PATH, keyed by corpus,
+    tokenizer and max_length, as a flat token array plus per-sample
+    offsets. Both are memory-mapped on reuse, so repeat registrations skip
+    the download and the tokenization entirely.
+
+    Args:
+        tokenizer: The tokenizer
+        corpus: Registered corpus name (default: "cnn_dailymail")
+        num_samples: Number of calibration samples (default: 128)
+        max_length: Truncation length in tokens (default: 512)
+
+    Returns:
+        tuple: (tokens, offsets) numpy arrays; sample i is tokens[offsets[i]:offsets[i+1]]
+    """
+    import numpy as np
+
+    snapshot = CALIBRATION_CACHE_PATH / corpus / f"{_tokenizer_key(tokenizer)}-L{max_length}"
+    try:
+        offsets = np.load(snapshot / 'offsets.npy', mmap_mode='r')
+        if len(offsets) - 1 >= num_samples:
+            tokens = np.load(snapshot / 'tokens.npy', mmap_mode='r')
+            print(f"  Using pre-tokenized calibration set: {snapshot}")
+            return tokens, offsets[:num_samples + 1]
+    except (OSError, ValueError):
+        pass
+
+    texts = _corpus_texts(corpus, num_samples)
+    print(f"  Tokenizing {len(texts)} calibration samples...")
+    input_ids = tokenizer(texts, truncation=True, max_length=max_length)['input_ids']
+    offsets = np.zeros(len(input_ids) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(ids) for ids in input_ids])
+    tokens = np.fromiter((t for ids in input_ids for t in ids), dtype=np.int32, count=int(offsets[-1]))
+
+    def write(tmp_dir):
+        np.save(tmp_dir / 'tokens.npy', tokens)
+        np.save(tmp_dir / 'offsets.npy', offsets)
+
+    try:
+        _write_atomically(snapshot, write)
+    except OSError as e:
+        print(f"  Warning: Could not save calibration snapshot: {e}")
+    return tokens, offsets
+
+
+def iter_token_batches(tokens, offsets, batch_size: int = 8, pad_token_id: int = 0, device=None):
+    """
+    Yield padded batches from a pre-tokenized calibration set.
+
+    Samples are bucketed by length and each batch is padded only to its own
+    longest sample, as in iter_calibration_batches().
+
+    Args:
+        tokens: Flat token id array (see load_calibration_tokens)
+        offsets: Sample boundaries into `tokens`
+        batch_size: Samples per forward pass (default: 8)
+        pad_token_id: Token id used for padding (default: 0)
+        device: Device to move each batch to (default: leave on CPU)
+
+    Yields:
+        dict: input_ids and attention_mask for one batch
+    """
+    import numpy as np
+    import torch
+
+    lengths = np.diff(offsets)
+    order = np.argsort(lengths, kind='stable')
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        width = int(lengths[rows].max())
+        input_ids = torch.full((len(rows), width), pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for row, i in enumerate(rows):
+            sample = torch.from_numpy(np.asarray(tokens[offsets[i]:offsets[i + 1]], dtype=np.int64))
+            input_ids[row, :len(sample)] = sample
+            attention_mask[row, :len(sample)] = 1
+
+        batch = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if device is not None:
+            batch = {k: v.to(device) for k, v in batch.items()}
+        yield batch
+
+
+def _calibration_texts(calib_data, num_samples: int):
+    """Pick up to `num_samples` calibration texts from a list or HuggingFace Dataset."""
+    if isinstance(calib_data, list):
+        return calib_data[:num_samples]
+    # Assume it's a HuggingFace Dataset
+    return [item.get("text", item.get("article", str(item)))[:1024]
+            for item in calib_data.select(range(min(num_samples, len(calib_data))))]
+
+
+def iter_calibration_batches(tokenizer, texts, batch_size: int = 8, max_length: int = 512, device=None):
+    """
+    Yield tokenized calibration batches one at a time.
+
+    Texts are bucketed by length so each batch is padded only to its own
+    longest sample, and every batch is tokenized and moved to `device` only
+    when the calibration loop asks for it. Device memory therefore holds a
+    single batch regardless of how many samples are used.
+
+    Args:
+        tokenizer: The tokenizer
+        texts: List of calibration strings
+        batch_size: Samples per forward pass (default: 8)
+        max_length: Truncation length in tokens (default: 512)
+        device: Device to move each batch to (default: leave on CPU)
+
+    Yields:
+        dict: Tokenizer output (input_ids, attention_mask, ...) for one batch
+    """
+    # Character length is a cheap proxy for token length and needs no
+    # up-front tokenization pass.
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        batch = tokenizer(
+            [texts[i] for i in order[start:start + batch_size]],
+            return_tensors="pt",
+            padding="longest",
+            truncation=True,
+            max_length=max_length
         )
+        if device is not None:
+            batch = {k: v.to(device) for k, v in batch.items()}
+        yield batch
 
-    print(f"  Model path: {model_path}")
 
-    # Load with Unsloth for efficient fine-tuning
-    # Unsloth handles MXFP4 models internally - it converts MXFP4 to NF4 for training
-    # when load_in_4bit=True. This is their "magic" for gpt-oss models.
-    try:
-        from unsloth import FastLanguageModel
+@stage_span('calibration.prepare')
+def prepare_calibration(
+    tokenizer,
+    calib_data=None,
+    num_samples: int = 128,
+    batch_size: int = 8,
+    max_length: int = 512
+):
+    """
+    Prepare a calibration loop that can be shared by several quantization formats.
+
+    Calibration data is selected (and, for named corpora, downloaded and
+    tokenized) once here. The returned loop streams batches to the model's
+    device on every call, so passing it to quantize_model() for several
+    formats reuses the same data without preparing it again.
+
+    Args:
+        tokenizer: The tokenizer
+        calib_data: List of strings, a Dataset, or a registered corpus name (default: cnn_dailymail)
+        num_samples: Number of calibration samples (default: 128)
+        batch_size: Calibration batch size (default: 8)
+        max_length: Maximum calibration sample length in tokens (default: 512)
+
+    Returns:
+        callable: forward_loop(model) as expected by ModelOpt
+    """
+    if calib_data is None or isinstance(calib_data, str):
+        # Named corpus: memory-mapped pre-tokenized snapshot
+        tokens, offsets = load_calibration_tokens(
+            tokenizer, calib_data or DEFAULT_CALIBRATION_CORPUS, num_samples, max_length
+        )
+        pad_token_id = tokenizer.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = tokenizer.eos_token_id or 0
+
+        def batches(device):
+            return iter_token_batches(tokens, offsets, batch_size, pad_token_id, device)
+    else:
+        texts = _calibration_texts(calib_data, num_samples)
+
+        def batches(device):
+            return iter_calibration_batches(tokenizer, texts, batch_size, max_length, device)
+
+    @stage_span('calibration.forward')
+    def forward_loop(model):
+        import torch
+        device = next(model.parameters()).device
+        with torch.no_grad():
+            for batch in batches(device):
+                model(**batch)
+
+    return forward_loop
+
+
+def register_quantization_format(name: str, config, description: str = ""):
+    """
+    Add a quantization format to QUANTIZATION_FORMATS.
+
+    Args:
+        name: Format name to pass as `quantization` (e.g., "FP8_KV")
+        config: ModelOpt config dict, or the name of a config in modelopt.torch.quantization
+        description: Short description printed when quantizing
+    """
+    QUANTIZATION_FORMATS[name] = {'config': config, 'description': description}
+
+
+def _release_memory():
+    """Return freed tensors' memory to the allocator and the GPU."""
+    import gc
+    gc.collect()
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def _quantization_format(name: str) -> dict:
+    if name not in QUANTIZATION_FORMATS:
+        raise ValueError(
+            f"Unsupported quantization format: {name}. "
+            f"Use one of: {', '.join(QUANTIZATION_FORMATS)}, or 'BF16'"
+        )
+    return QUANTIZATION_FORMATS[name]
+
+
+@stage_span('quantize')
+def quantize_model(
+    model,
+    tokenizer,
+    quantization: str = "FP8",
+    calibration=None,
+    calib_data=None,
+    num_samples: int = 128,
+    batch_size: int = 8,
+    max_length: int = 512
+):
+    """
+    Quantize a model with NVIDIA ModelOpt using a registered format.
+
+    The model is quantized in place. To produce several formats from one
+    fine-tune, build the calibration once with prepare_calibration() and
+    pass it to each call (see register_finetuned_model with a list of formats).
+
+    Args:
+        model: The fine-tuned model (HuggingFace PreTrainedModel)
+        tokenizer: The tokenizer
+        quantization: Format name from QUANTIZATION_FORMATS (default: "FP8")
+        calibration: Loop from prepare_calibration(); built from the calib_* arguments if None
+        calib_data: Optional calibration data (see prepare_calibration)
+        num_samples: Number of calibration samples (default: 128)
+        batch_size: Calibration batch size (default: 8)
+        max_length: Maximum calibration sample length in tokens (default: 512)
+
+    Returns:
+        Quantized model ready for export
+    """
+    import torch
+    import modelopt.torch.quantization as mtq
+
+    spec = _quantization_format(quantization)
+    config = spec['config']
+    if isinstance(config, str):
+        config = getattr(mtq, config)
+
+    print(f"Quantizing model to {quantization} format...")
+    if spec['description']:
+        print(f"  {spec['description']}")
+
+    if calibration is None:
+        print(f"  Using {num_samples} calibration samples")
+        calibration = prepare_calibration(tokenizer, calib_data, num_samples, batch_size, max_length)
+
+    print(f"  Applying {quantization} quantization with calibration...")
+    with torch.no_grad():
+        quantized_model = mtq.quantize(model, config, calibration)
+
+    print(f"  ✓ {quantization} quantization complete")
+    return quantized_model
+
+
+def quantize_model_fp8(
+    model,
+    tokenizer,
+    calib_data=None,
+    num_samples: int = 128,
+    batch_size: int = 8,
+    max_length: int = 512
+):
+    """
+    Quantize a model to FP8 format using NVIDIA ModelOpt.
+
+    This produces a HuggingFace-compatible checkpoint that TensorRT-LLM can
+    load directly with optimized FP8 inference.
+
+    Args:
+        model: The fine-tuned model (HuggingFace PreTrainedModel)
+        tokenizer: The tokenizer
+        calib_data: Optional calibration data: list of strings, a Dataset, or the
+            name of a registered calibration corpus (default: cnn_dailymail)
+        num_samples: Number of calibration samples (default: 128)
+        batch_size: Calibration batch size (default: 8)
+        max_length: Maximum calibration sample length in tokens (default: 512)
+
+    Returns:
+        Quantized model ready for saving
+    """
+    return quantize_model(
+        model, tokenizer, "FP8",
+        calib_data=calib_data, num_samples=num_samples, batch_size=batch_size, max_length=max_length
+    )
+
+
+def quantize_model_nvfp4(
+    model,
+    tokenizer,
+    calib_data=None,
+    num_samples: int = 128,
+    batch_size: int = 8,
+    max_length: int = 512
+):
+    """
+    Quantize a model to NVFP4 format using NVIDIA ModelOpt.
+
+    NVFP4 provides 4-bit quantization for maximum compression.
+    Note: Requires Blackwell GPU (GB10) for inference.
+
+    Args:
+        model: The fine-tuned model (HuggingFace PreTrainedModel)
+        tokenizer: The tokenizer
+        calib_data: Optional calibration data (see quantize_model_fp8)
+        num_samples: Number of calibration samples (default: 128)
+        batch_size: Calibration batch size (default: 8)
+        max_length: Maximum calibration sample length in tokens (default: 512)
+
+    Returns:
+        Quantized model ready for saving
+    """
+    return quantize_model(
+        model, tokenizer, "NVFP4",
+        calib_data=calib_data, num_samples=num_samples, batch_size=batch_size, max_length=max_length
+    )
+
+
+def _sha256_file(path: Path) -> str:
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(16 * 1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fsync_path(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _ParallelShardWriter:
+    """
+    Write safetensors shards concurrently while transformers saves a model.
+
+    transformers writes shards one after another through
+    `modeling_utils.safe_save_file`. Inside `patch()` that call only queues
+    the shard: worker threads serialize it, hash the bytes and write the
+    file, so several shards stream to JuiceFS at once. The number of shards
+    in flight is bounded by the worker count to keep host memory flat.
+
+    The hook is installed process-wide (ModelOpt's export reaches
+    safe_save_file through transformers), but only calls made from the
+    context that entered `patch()` are redirected. Every other caller, such
+    as a notebook saving a model while a background registration runs, gets
+    the original functions and behaviour.
+    """
+
+    # Writer staging in the current thread/context, if any
+    _active = ContextVar('thinkube_shard_writer', default=None)
+    # Number of active patch() blocks across threads, and the functions they replaced
+    _lock = threading.Lock()
+    _users = 0
+    _originals = None
+
+    def __init__(self, max_workers: int = STAGING_WRITE_WORKERS, skip=(), hold=()):
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thinkube-staging')
+        self.slots = threading.BoundedSemaphore(max_workers)
+        self.futures = []
+        # Tensors provided by linked base-model shards are left out of the written shards;
+        # tensors to pool are kept aside (by reference) for the pooled blobs
+        self.skip = set(skip)
+        self.hold = set(hold)
+        self.held = {}
+        self.written = {}
+        # False when transformers could not be hooked and saved every tensor itself
+        self.redirected = False
+
+    def _write(self, tensors, filename, metadata):
+        import hashlib
+        from safetensors.torch import save
+        try:
+            data = save(tensors, metadata=metadata)
+            with open(filename, 'wb') as f:
+                f.write(data)
+            return Path(filename).name, {'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+        finally:
+            self.slots.release()
+
+    def save_file(self, tensors, filename, metadata=None):
+        if self.skip or self.hold:
+            self.held.update((k, v) for k, v in tensors.items() if k in self.hold)
+            tensors = {k: v for k, v in tensors.items() if k not in self.skip and k not in self.hold}
+            if not tensors:
+                return
+        self.written[Path(filename).name] = list(tensors)
+        self.slots.acquire()
+        self.futures.append(self.executor.submit(self._write, tensors, filename, metadata))
+
+    @classmethod
+    def _install(cls, modeling_utils):
+        """Route transformers' shard writes through the writer active in the caller's context."""
+        original_save_file = modeling_utils.safe_save_file
+        original_save_pretrained = modeling_utils.PreTrainedModel.save_pretrained
+
+        @functools.wraps(original_save_file)
+        def safe_save_file(tensors, filename, metadata=None):
+            writer = cls._active.get()
+            if writer is None:
+                return original_save_file(tensors, filename, metadata=metadata)
+            return writer.save_file(tensors, filename, metadata)
+
+        @functools.wraps(original_save_pretrained)
+        def save_pretrained(model, *args, **kwargs):
+            if cls._active.get() is not None:
+                kwargs.setdefault('max_shard_size', STAGING_SHARD_SIZE)
+            return original_save_pretrained(model, *args, **kwargs)
+
+        cls._originals = (original_save_file, original_save_pretrained)
+        modeling_utils.safe_save_file = safe_save_file
+        modeling_utils.PreTrainedModel.save_pretrained = save_pretrained
+
+    @contextmanager
+    def patch(self):
+        try:
+            import transformers.modeling_utils as modeling_utils
+        except ImportError:
+            yield
+            return
+
+        if getattr(modeling_utils, 'safe_save_file', None) is None:
+            # Layout changed in this transformers version: save serially
+            yield
+            return
+
+        cls = type(self)
+        with cls._lock:
+            if cls._users == 0:
+                cls._install(modeling_utils)
+            cls._users += 1
+        token = cls._active.set(self)
+        self.redirected = True
+        try:
+            yield
+        finally:
+            cls._active.reset(token)
+            with cls._lock:
+                cls._users -= 1
+                if cls._users == 0:
+                    modeling_utils.safe_save_file, modeling_utils.PreTrainedModel.save_pretrained = cls._originals
+                    cls._originals = None
+
+    def wait(self) -> dict:
+        """Wait for all queued shards; return {file name: {size, sha256}}."""
+        try:
+            return dict(future.result() for future in self.futures)
+        finally:
+            self.executor.shutdown(wait=True)
+
 
-        print(f"  Loading with Unsloth FastLanguageModel from: {model_path}")
-        print(f"  Using load_in_4bit=True (Unsloth handles MXFP4→NF4 conversion)")
+_SAFETENSORS_DTYPES = {
+    'float64': 'F64', 'float32': 'F32', 'float16': 'F16', 'bfloat16': 'BF16',
+    'float8_e4m3fn': 'F8_E4M3', 'float8_e5m2': 'F8_E5M2',
+    'int64': 'I64', 'int32': 'I32', 'int16': 'I16', 'int8': 'I8', 'uint8': 'U8', 'bool': 'BOOL',
+}
 
-        model, tokenizer = FastLanguageModel.from_pretrained(
-            model_name=str(model_path),
-            dtype=None,
-            load_in_4bit=True,  # Unsloth converts MXFP4 to trainable NF4 internally
-            device_map=device_map,
-        )
-        print(f"  ✓ Model loaded with Unsloth (ready for QLoRA fine-tuning)")
 
-    except ImportError:
-        # Fallback to standard transformers if Unsloth not available
-        print(f"  Unsloth not available, loading with transformers...")
-        from transformers import AutoModelForCausalLM, AutoTokenizer
+def _hash_safetensors_file(path: Path) -> dict:
+    """
+    Hash a safetensors file and each tensor in it, in one sequential read.
 
-        tokenizer = AutoTokenizer.from_pretrained(str(model_path))
-        model = AutoModelForCausalLM.from_pretrained(
-            str(model_path),
-            device_map=device_map,
-            torch_dtype="auto",
-        )
-        print(f"  ✓ Model loaded successfully with transformers")
+    Returns:
+        dict: size, sha256 of the file, and tensors: {name: {dtype, shape, sha256}}
+    """
+    import hashlib
+    import struct
+
+    file_digest = hashlib.sha256()
+    tensors = {}
+    with open(path, 'rb') as f:
+        prefix = f.read(8)
+        header_bytes = f.read(struct.unpack('<Q', prefix)[0])
+        file_digest.update(prefix)
+        file_digest.update(header_bytes)
+        header = json.loads(header_bytes)
+        header.pop('__metadata__', None)
+
+        position = 0
+        for tensor_name, info in sorted(header.items(), key=lambda item: item[1]['data_offsets'][0]):
+            begin, end = info['data_offsets']
+            if begin > position:
+                file_digest.update(f.read(begin - position))
+            digest = hashlib.sha256()
+            remaining = end - begin
+            while remaining:
+                chunk = f.read(min(remaining, 16 * 1024 * 1024))
+                digest.update(chunk)
+                file_digest.update(chunk)
+                remaining -= len(chunk)
+            tensors[tensor_name] = {'dtype': info['dtype'], 'shape': info['shape'], 'sha256': digest.hexdigest()}
+            position = end
+        for chunk in iter(lambda: f.read(16 * 1024 * 1024), b''):
+            file_digest.update(chunk)
+
+    return {'size': path.stat().st_size, 'sha256': file_digest.hexdigest(), 'tensors': tensors}
+
+
+def _base_tensor_index(base_model: str) -> dict:
+    """
+    Per-tensor hashes of a registered model's safetensors shards.
 
-    return model, tokenizer
+    Computed once per model version (one read of the checkpoint) and cached
+    next to the resolved-model index.
 
+    Returns:
+        dict: path of the artifact directory and shards: {file name: _hash_safetensors_file()}
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
-def get_thinkube_control_url():
-    """Get thinkube-control API URL from environment."""
-    # Try service discovery first
-    url = os.environ.get('THINKUBE_CONTROL_URL')
-    if url:
-        return url.rstrip('/')
+    resolved = resolve_model(base_model)
+    cache_file = MODEL_INDEX_PATH.parent / 'tensor_index' / f"{resolved['name']}-v{resolved['version']}.json"
+    try:
+        index = json.loads(cache_file.read_text())
+        if index['path'] == resolved['path']:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    base_dir = Path(resolved['path'])
+    shard_paths = sorted(base_dir.glob('*.safetensors'))
+    print(f"  Hashing {len(shard_paths)} base model shards (once per version)...")
+    with ThreadPoolExecutor(max_workers=STAGING_WRITE_WORKERS) as pool:
+        hashes = list(pool.map(_hash_safetensors_file, shard_paths))
+    index = {'path': str(base_dir), 'shards': {p.name: h for p, h in zip(shard_paths, hashes)}}
 
-    # Fallback to in-cluster service
-    return "http://backend.thinkube-control.svc.cluster.local:8000"
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(index))
+    except OSError as e:
+        print(f"  Warning: Could not cache base model hashes: {e}")
+    return index
 
 
-def get_auth_token():
-    """Get authentication token for thinkube-control API."""
-    # Try to get token from environment (set by service discovery)
-    token = os.environ.get('THINKUBE_CONTROL_TOKEN')
-    if token:
-        return token
-
-    # Try to read from JupyterHub auth
-    token_file = Path.home() / ".config" / "thinkube" / "token"
-    if token_file.exists():
-        return token_file.read_text().strip()
-
-    # Try to get from Keycloak using service account
-    keycloak_url = os.environ.get('KEYCLOAK_URL')
-    client_id = os.environ.get('KEYCLOAK_CLIENT_ID', 'thinkube-control')
-    client_secret = os.environ.get('KEYCLOAK_CLIENT_SECRET')
-
-    if keycloak_url and client_secret:
-        try:
-            realm = os.environ.get('KEYCLOAK_REALM', 'thinkube')
-            token_url = f"{keycloak_url}/realms/{realm}/protocol/openid-connect/token"
+def _tensor_sha256(tensor) -> str:
+    """SHA-256 of a tensor's raw bytes, as they are laid out in a safetensors file."""
+    import hashlib
+    import torch
+    data = tensor.detach().contiguous().cpu().reshape(-1).view(torch.uint8)
+    return hashlib.sha256(data.numpy()).hexdigest()
 
-            response = requests.post(
-                token_url,
-                data={
-                    'grant_type': 'client_credentials',
-                    'client_id': client_id,
-                    'client_secret': client_secret
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()['access_token']
-        except Exception as e:
-            print(f"Warning: Could not get token from Keycloak: {e}")
 
-    return None
+# Prefixes a wrapper adds to (PEFT) or a headless body drops from checkpoint tensor names
+_WRAPPER_PREFIXES = ('base_model.model.', 'model.')
 
 
-def quantize_model_fp8(model, tokenizer, calib_data=None, num_samples: int = 128):
+def _base_name_map(base_names, state_dict) -> dict:
     """
-    Quantize a model to FP8 format using NVIDIA ModelOpt.
-
-    This produces a HuggingFace-compatible checkpoint that TensorRT-LLM can
-    load directly with optimized FP8 inference.
+    Map base checkpoint tensor names to the names in `state_dict`.
 
-    Args:
-        model: The fine-tuned model (HuggingFace PreTrainedModel)
-        tokenizer: The tokenizer
-        calib_data: Optional calibration dataset (list of strings or Dataset)
-        num_samples: Number of calibration samples (default: 128)
+    Tries the names as they are and with each wrapper prefix added or
+    stripped, and keeps whichever matches the most tensors.
 
     Returns:
-        Quantized model ready for saving
+        dict: {base tensor name: state_dict name} for the names that match
     """
-    import torch
-    import modelopt.torch.quantization as mtq
-    from datasets import load_dataset
+    renames = [lambda name: name]
+    for prefix in _WRAPPER_PREFIXES:
+        renames.append(lambda name, prefix=prefix: prefix + name)
+        renames.append(lambda name, prefix=prefix: name[len(prefix):] if name.startswith(prefix) else None)
 
-    print("Quantizing model to FP8 format...")
-    print(f"  Using {num_samples} calibration samples")
+    best = {}
+    for rename in renames:
+        mapping = {name: rename(name) for name in base_names if rename(name) in state_dict}
+        if len(mapping) > len(best):
+            best = mapping
+    return best
 
-    # Prepare calibration data
-    if calib_data is None:
-        print("  Loading default calibration dataset (cnn_dailymail)...")
-        dataset = load_dataset("cnn_dailymail", "3.0.0", split="train")
-        calib_texts = [item["article"][:1024] for item in dataset.select(range(num_samples))]
-    elif isinstance(calib_data, list):
-        calib_texts = calib_data[:num_samples]
-    else:
-        # Assume it's a HuggingFace Dataset
-        calib_texts = [item.get("text", item.get("article", str(item)))[:1024]
-                       for item in calib_data.select(range(min(num_samples, len(calib_data))))]
-
-    # Tokenize calibration data
-    print("  Tokenizing calibration data...")
-    calib_tokens = tokenizer(
-        calib_texts,
-        return_tensors="pt",
-        padding=True,
-        truncation=True,
-        max_length=512
-    )
 
-    # Move to GPU if available
-    device = next(model.parameters()).device
-    calib_tokens = {k: v.to(device) for k, v in calib_tokens.items()}
+def plan_deduplication(model, base_model: str) -> dict:
+    """
+    Find the tensors of `model` that are unchanged from the base model.
+
+    Tensors are compared by dtype, shape and SHA-256 against the base
+    model's registered artifacts, after lining up tensor names that a
+    wrapper prefixed or a headless body shortened (`model.`). Base shards
+    whose every tensor is unchanged are hard-linked as they are. The
+    unchanged tensors of the other shards - in a merged LoRA fine-tune the
+    embeddings, norms, LM head and every projection LoRA did not target -
+    are grouped per base shard into content-addressed blobs under
+    STAGING_BLOBS_PATH. Fine-tunes that leave the same tensors unchanged
+    hard-link one blob instead of each writing the bytes again. Groups
+    smaller than DEDUP_MIN_BLOB_BYTES are written normally.
+
+    Every tensor that matches a base tensor by name, dtype and shape is
+    hashed, i.e. one read of those weights in memory.
 
-    # Define calibration forward loop
-    def forward_loop(model):
-        with torch.no_grad():
-            for i in range(0, len(calib_texts), 8):  # Batch size 8
-                batch = {k: v[i:i+8] for k, v in calib_tokens.items()}
-                if batch["input_ids"].shape[0] > 0:
-                    model(**batch)
+    Args:
+        model: The fine-tuned HuggingFace model
+        base_model: Model ID the fine-tune started from (e.g., "unsloth/gpt-oss-20b")
 
-    # Apply FP8 quantization
-    print("  Applying FP8 quantization with calibration...")
-    config = mtq.FP8_DEFAULT_CFG
+    Returns:
+        dict: Plan to pass as staging_writer(dedup_plan=...), with
+            - shards: {base shard path: shard info} to hard-link whole
+            - groups: {base shard name: {tensor name: {dtype, shape, sha256}}} to pool
+    """
+    base = _base_tensor_index(base_model)
+    state_dict = model.state_dict()
+
+    base_names = [name for shard in base['shards'].values() for name in shard['tensors']]
+    names = _base_name_map(base_names, state_dict)
+    if base_names and not names:
+        print(f"  Warning: no tensor names of {base_model} occur in the model "
+              f"(e.g. {base_names[0]!r} vs {next(iter(state_dict), None)!r}); nothing deduplicated")
+        return {'shards': {}, 'groups': {}}
+
+    plan = {'shards': {}, 'groups': {}}
+    unchanged_tensors = unchanged_bytes = 0
+    for file_name, shard in base['shards'].items():
+        unchanged = {}
+        group_bytes = 0
+        for tensor_name, meta in shard['tensors'].items():
+            tensor = state_dict.get(names.get(tensor_name))
+            if (tensor is None
+                    or _SAFETENSORS_DTYPES.get(str(tensor.dtype).replace('torch.', '')) != meta['dtype']
+                    or list(tensor.shape) != meta['shape']
+                    or _tensor_sha256(tensor) != meta['sha256']):
+                continue
+            unchanged[names[tensor_name]] = meta
+            group_bytes += tensor.numel() * tensor.element_size()
+        unchanged_tensors += len(unchanged)
+        unchanged_bytes += group_bytes
+
+        # A whole base shard can only be linked if the fine-tune uses the same names
+        if len(unchanged) == len(shard['tensors']) and all(names[t] == t for t in shard['tensors']):
+            plan['shards'][Path(base['path']) / file_name] = shard
+        elif unchanged and group_bytes >= DEDUP_MIN_BLOB_BYTES:
+            plan['groups'][file_name] = unchanged
+
+    print(f"  {unchanged_tensors} of {len(state_dict)} tensors unchanged ({unchanged_bytes / 1e9:.2f} GB): "
+          f"{len(plan['shards'])} base shards to link, {len(plan['groups'])} tensor groups to pool")
+    return plan
+
+
+def _link_file(source: Path, target: Path):
+    """Hard-link `source` to `target`, copying where links are unsupported."""
+    try:
+        os.link(source, target)
+    except FileNotFoundError:
+        # The source itself is gone (a pruned blob); the caller recreates it
+        raise
+    except OSError:
+        shutil.copyfile(source, target)
 
-    with torch.no_grad():
-        quantized_model = mtq.quantize(model, config, forward_loop)
 
-    print("  ✓ FP8 quantization complete")
-    return quantized_model
+def _link_base_shards(target_dir: Path, linked: dict) -> dict:
+    """Hard-link unchanged base shards into `target_dir`, copying where links are unsupported."""
+    files = {}
+    for source, shard in linked.items():
+        target = target_dir / f"base-{source.name}"
+        _link_file(source, target)
+        files[target.name] = {'size': shard['size'], 'sha256': shard['sha256'], 'linked_from': str(source)}
+    return files
 
 
-def quantize_model_nvfp4(model, tokenizer, calib_data=None, num_samples: int = 128):
+def _pool_blob(tensors: dict, metas: dict) -> tuple:
     """
-    Quantize a model to NVFP4 format using NVIDIA ModelOpt.
+    Find or create the pooled blob holding exactly `tensors`.
 
-    NVFP4 provides 4-bit quantization for maximum compression.
-    Note: Requires Blackwell GPU (GB10) for inference.
+    A blob is named by the hash of its tensors' names, dtypes, shapes and
+    contents, so fine-tunes that leave the same base tensors unchanged find
+    the same file. A <key>.json next to it records the blob's size and
+    SHA-256 for the staging manifest, without reading the blob.
 
     Args:
-        model: The fine-tuned model (HuggingFace PreTrainedModel)
-        tokenizer: The tokenizer
-        calib_data: Optional calibration dataset
-        num_samples: Number of calibration samples (default: 128)
+        tensors: {tensor name: tensor} to store
+        metas: {tensor name: {dtype, shape, sha256}} from plan_deduplication
 
     Returns:
-        Quantized model ready for saving
+        tuple: (blob path, {size, sha256}, True if an existing blob was reused)
     """
-    import torch
-    import modelopt.torch.quantization as mtq
-    from datasets import load_dataset
+    import hashlib
+    from safetensors.torch import save
+
+    key = hashlib.sha256(json.dumps(
+        sorted([name, metas[name]['dtype'], metas[name]['shape'], metas[name]['sha256']] for name in tensors)
+    ).encode()).hexdigest()
+    blob = STAGING_BLOBS_PATH / f"{key}.safetensors"
+    info_path = STAGING_BLOBS_PATH / f"{key}.json"
+    try:
+        info = json.loads(info_path.read_text())
+        if blob.stat().st_size == info['size']:
+            return blob, info, True
+    except (OSError, ValueError, KeyError):
+        pass
+
+    data = save(tensors)
+    info = {'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+    STAGING_BLOBS_PATH.mkdir(parents=True, exist_ok=True)
+    for path, content in ((blob, data), (info_path, json.dumps(info).encode())):
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    return blob, info, False
+
+
+def _link_pooled_groups(target_dir: Path, groups: dict, held: dict) -> tuple:
+    """
+    Hard-link a pooled blob for each group of unchanged tensors into `target_dir`.
 
-    print("Quantizing model to NVFP4 format...")
-    print(f"  Using {num_samples} calibration samples")
-    print("  Note: NVFP4 inference requires Blackwell GPU (GB10)")
-
-    # Prepare calibration data (same as FP8)
-    if calib_data is None:
-        print("  Loading default calibration dataset (cnn_dailymail)...")
-        dataset = load_dataset("cnn_dailymail", "3.0.0", split="train")
-        calib_texts = [item["article"][:1024] for item in dataset.select(range(num_samples))]
-    elif isinstance(calib_data, list):
-        calib_texts = calib_data[:num_samples]
-    else:
-        calib_texts = [item.get("text", item.get("article", str(item)))[:1024]
-                       for item in calib_data.select(range(min(num_samples, len(calib_data))))]
-
-    # Tokenize calibration data
-    print("  Tokenizing calibration data...")
-    calib_tokens = tokenizer(
-        calib_texts,
-        return_tensors="pt",
-        padding=True,
-        truncation=True,
-        max_length=512
-    )
+    Returns:
+        tuple: ({file name: manifest entry}, {file name: tensor names}, bytes reused from the pool)
+    """
+    files, tensor_names, reused_bytes = {}, {}, 0
+    for metas in groups.values():
+        tensors = {name: held[name] for name in metas if name in held}
+        if not tensors:
+            continue
+        blob, info, reused = _pool_blob(tensors, metas)
+        target = target_dir / f"blob-{blob.stem[:16]}.safetensors"
+        try:
+            _link_file(blob, target)
+        except FileNotFoundError:
+            # Pruned between lookup and link; write it again
+            (STAGING_BLOBS_PATH / f"{blob.stem}.json").unlink(missing_ok=True)
+            blob, info, reused = _pool_blob(tensors, metas)
+            _link_file(blob, target)
+        files[target.name] = {'size': info['size'], 'sha256': info['sha256'], 'linked_from': str(blob)}
+        tensor_names[target.name] = list(tensors)
+        if reused:
+            reused_bytes += info['size']
+    return files, tensor_names, reused_bytes
+
+
+def _prune_blob_pool(max_age: float = DEDUP_BLOB_TTL):
+    """Remove pooled blobs older than `max_age` seconds that no model directory links to."""
+    now = time.time()
+    for blob in STAGING_BLOBS_PATH.glob('*.safetensors'):
+        try:
+            st = blob.stat()
+            if st.st_nlink == 1 and now - st.st_mtime > max_age:
+                (STAGING_BLOBS_PATH / f"{blob.stem}.json").unlink(missing_ok=True)
+                blob.unlink()
+        except OSError:
+            continue
 
-    device = next(model.parameters()).device
-    calib_tokens = {k: v.to(device) for k, v in calib_tokens.items()}
 
-    def forward_loop(model):
-        with torch.no_grad():
-            for i in range(0, len(calib_texts), 8):
-                batch = {k: v[i:i+8] for k, v in calib_tokens.items()}
-                if batch["input_ids"].shape[0] > 0:
-                    model(**batch)
+def _write_shard_index(target_dir: Path, written: dict, linked: dict):
+    """Write model.safetensors.index.json covering written and linked shards ({file name: tensor names})."""
+    if 'model.safetensors' in written:
+        # Loaders prefer a single model.safetensors over the index; make it a shard
+        os.rename(target_dir / 'model.safetensors', target_dir / 'model-00001-of-00001.safetensors')
+        written['model-00001-of-00001.safetensors'] = written.pop('model.safetensors')
 
-    # Apply NVFP4 quantization
-    print("  Applying NVFP4 quantization with calibration...")
-    config = mtq.NVFP4_DEFAULT_CFG
+    weight_map = {}
+    for file_name, tensor_names in [*written.items(), *linked.items()]:
+        weight_map.update({tensor_name: file_name for tensor_name in tensor_names})
 
-    with torch.no_grad():
-        quantized_model = mtq.quantize(model, config, forward_loop)
+    total_size = sum((target_dir / f).stat().st_size for f in set(weight_map.values()))
+    (target_dir / 'model.safetensors.index.json').write_text(json.dumps(
+        {'metadata': {'total_size': total_size}, 'weight_map': dict(sorted(weight_map.items()))}, indent=2
+    ))
 
-    print("  ✓ NVFP4 quantization complete")
-    return quantized_model
+
+@contextmanager
+def staging_writer(name: str, max_workers: int = STAGING_WRITE_WORKERS, dedup_plan: dict = None):
+    """
+    Stage a model directory atomically, writing safetensors shards in parallel.
+
+    Yields a temporary directory next to STAGING_PATH / name. Anything
+    saved there with transformers' save_pretrained (including ModelOpt's
+    export_hf_checkpoint) is split into STAGING_SHARD_SIZE shards that are
+    written concurrently. When the block exits cleanly, every file is
+    fsynced once, a STAGING_MANIFEST with per-file sizes and SHA-256
+    checksums is written, and the directory is renamed into place. The
+    registration workflow therefore never sees a half-written model. On
+    error the temporary directory is removed.
+
+    With `dedup_plan` (from plan_deduplication), tensors that are unchanged
+    from the base model are not written into the model's own shards:
+    unchanged base shards are hard-linked in, the other unchanged tensors
+    come from hard-linked pooled blobs, and the shard index points at both.
+    The manifest's linked_bytes counts what was reused rather than written.
+
+    Args:
+        name: Model name (directory under STAGING_PATH)
+        max_workers: Concurrent shard writers (default: THINKUBE_STAGING_WRITE_WORKERS or 4)
+        dedup_plan: Optional plan of unchanged base shards and tensor groups to link
+
+    Example:
+        with staging_writer("my-model") as tmp_dir:
+            model.save_pretrained(tmp_dir)
+            tokenizer.save_pretrained(tmp_dir)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    final_dir = STAGING_PATH / name
+    tmp_dir = STAGING_PATH / f".{name}.partial-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    shards = (dedup_plan or {}).get('shards', {})
+    groups = (dedup_plan or {}).get('groups', {})
+    writer = _ParallelShardWriter(
+        max_workers,
+        skip=[t for shard in shards.values() for t in shard['tensors']],
+        hold=[t for metas in groups.values() for t in metas],
+    )
+    try:
+        with writer.patch():
+            yield tmp_dir
+        files = writer.wait()
+        linked_bytes = None
+        if (shards or groups) and not writer.redirected:
+            print("  Note: could not hook transformers' shard writer; saved without dedup")
+        elif shards or groups:
+            if 'model.safetensors' in files:
+                files['model-00001-of-00001.safetensors'] = files.pop('model.safetensors')
+            linked = {f"base-{source.name}": list(shard['tensors']) for source, shard in shards.items()}
+            files.update(_link_base_shards(tmp_dir, shards))
+            pooled_files, pooled_tensors, reused_bytes = _link_pooled_groups(tmp_dir, groups, writer.held)
+            writer.held.clear()
+            files.update(pooled_files)
+            linked.update(pooled_tensors)
+            _write_shard_index(tmp_dir, writer.written, linked)
+            linked_bytes = sum(shard['size'] for shard in shards.values()) + reused_bytes
+
+        # Checksum whatever was not written by the shard writers (configs, tokenizer, ...)
+        pending = [p for p in tmp_dir.rglob('*') if p.is_file() and str(p.relative_to(tmp_dir)) not in files]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for path, digest in zip(pending, pool.map(_sha256_file, pending)):
+                files[str(path.relative_to(tmp_dir))] = {'size': path.stat().st_size, 'sha256': digest}
+
+        manifest = {
+            'name': name,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'total_bytes': sum(f['size'] for f in files.values()),
+            'files': dict(sorted(files.items())),
+        }
+        if linked_bytes is not None:
+            manifest['linked_bytes'] = linked_bytes
+        (tmp_dir / STAGING_MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+        # One fsync pass over the finished tree instead of syncing every write
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(_fsync_path, [p for p in tmp_dir.rglob('*') if p.is_file()]))
+        _fsync_path(tmp_dir)
+
+        old_dir = None
+        if final_dir.exists():
+            old_dir = STAGING_PATH / f".{name}.old-{os.getpid()}"
+            os.rename(final_dir, old_dir)
+        os.rename(tmp_dir, final_dir)
+        _fsync_path(STAGING_PATH)
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        if groups:
+            _prune_blob_pool()
+    except BaseException:
+        writer.executor.shutdown(wait=True)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _unwrap_model(model):
+    """
+    The HuggingFace model inside an Unsloth/PEFT wrapper, LM head included.
+
+    A CausalLM's own `.model` is its headless body, so only wrappers that
+    are not HuggingFace models themselves are unwrapped through `.model`.
+    """
+    if hasattr(model, 'get_base_model'):
+        return model.get_base_model()
+    try:
+        from transformers import PreTrainedModel
+    except ImportError:
+        return model
+    inner = getattr(model, 'model', None)
+    if not isinstance(model, PreTrainedModel) and isinstance(inner, PreTrainedModel):
+        return inner
+    return model
 
 
 def save_model_to_staging(model, tokenizer, name: str, save_method: str = "merged_16bit"):
@@ -416,16 +2225,16 @@ def save_model_to_staging(model, tokenizer, name: str, save_method: str = "merge
         Path to the saved model directory
     """
     staging_dir = STAGING_PATH / name
-    staging_dir.mkdir(parents=True, exist_ok=True)
 
     print(f"Saving model to staging: {staging_dir}")
 
     # Use Unsloth's save method
-    model.save_pretrained_merged(
-        str(staging_dir),
-        tokenizer,
-        save_method=save_method,
-    )
+    with staging_writer(name) as tmp_dir:
+        model.save_pretrained_merged(
+            str(tmp_dir),
+            tokenizer,
+            save_method=save_method,
+        )
 
     print(f"✓ Model saved to staging: {staging_dir}")
     return staging_dir
@@ -439,20 +2248,28 @@ def register_finetuned_model(
     task: str = "text-generation",
     server_type: str = "tensorrt-llm",
     description: str = None,
-    quantization: QuantizationFormat = "FP8",
+    quantization: Union[QuantizationFormat, List[QuantizationFormat]] = "FP8",
     calib_data=None,
     num_calib_samples: int = 128,
+    calib_batch_size: int = 8,
+    calib_max_length: int = 512,
+    dedup: bool = False,
     wait: bool = False
 ):
     """
     Save and register a fine-tuned model in the Thinkube Model Catalog.
 
     This function:
-    1. Quantizes the model to FP8/NVFP4 format (for TensorRT-LLM optimization)
+    1. Quantizes the model (for TensorRT-LLM optimization)
     2. Saves the quantized model to the staging area (JuiceFS shared with Argo)
     3. Calls the thinkube-control API to register it in MLflow
     4. Optionally waits for registration to complete
 
+    When `quantization` is a list, calibration data is prepared once and
+    each format is exported and registered as "<name>-<format>". Every
+    format except the last quantizes a copy of the model, so this needs
+    room for one extra copy of the weights on the model's device.
+
     Args:
         model: The fine-tuned model (Unsloth FastLanguageModel or HuggingFace model)
         tokenizer: The tokenizer
@@ -461,9 +2278,14 @@ def register_finetuned_model(
         task: Model task (default: "text-generation")
         server_type: Target server (default: "tensorrt-llm")
         description: Optional description
-        quantization: Quantization format - "FP8" (recommended), "NVFP4", or "BF16"
-        calib_data: Optional calibration dataset for quantization
+        quantization: Format from QUANTIZATION_FORMATS - "FP8" (recommended), "NVFP4",
+            "INT8_SQ", "INT4_AWQ", "W4A8_AWQ" - or "BF16"; or a list of formats
+        calib_data: Optional calibration data (see prepare_calibration)
         num_calib_samples: Number of calibration samples (default: 128)
+        calib_batch_size: Calibration batch size (default: 8)
+        calib_max_length: Maximum calibration sample length in tokens (default: 512)
+        dedup: If True, BF16 exports hard-link tensors that are unchanged from the base
+            model instead of rewriting them (see plan_deduplication)
         wait: If True, wait for registration to complete
 
     Returns:
@@ -472,6 +2294,7 @@ def register_finetuned_model(
             - workflow_id: Argo workflow name
             - status: Current status
             - message: Status message
+        For a list of formats, a list of these dicts in the same order.
 
     Example:
         from thinkube_models import register_finetuned_model
@@ -486,53 +2309,186 @@ def register_finetuned_model(
             quantization="FP8"
         )
         print(f"Registration started: {result['workflow_id']}")
+
+        # Export FP8 and NVFP4 variants from one calibration setup
+        results = register_finetuned_model(
+            model, tokenizer, "gpt-oss-tool-use", "unsloth/gpt-oss-20b",
+            quantization=["FP8", "NVFP4"]
+        )
     """
+    formats = [quantization] if isinstance(quantization, str) else list(quantization)
+    for fmt in formats:
+        if fmt != "BF16":
+            _quantization_format(fmt)
+    duplicates = sorted({fmt for fmt in formats if formats.count(fmt) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate quantization formats: {', '.join(duplicates)}")
+
     # Step 1: Get the HuggingFace model from Unsloth if needed
-    # Unsloth's FastLanguageModel wraps the actual model
-    hf_model = model
-    if hasattr(model, 'model'):
-        hf_model = model.model
-    elif hasattr(model, 'get_base_model'):
-        hf_model = model.get_base_model()
-
-    # Step 2: Apply quantization if requested
-    if quantization == "FP8":
-        print(f"Applying FP8 quantization for TensorRT-LLM optimization...")
-        quantized_model = quantize_model_fp8(hf_model, tokenizer, calib_data, num_calib_samples)
-    elif quantization == "NVFP4":
-        print(f"Applying NVFP4 quantization for maximum compression...")
-        quantized_model = quantize_model_nvfp4(hf_model, tokenizer, calib_data, num_calib_samples)
-    elif quantization == "BF16":
-        print(f"Skipping quantization, saving in BF16 format...")
-        quantized_model = hf_model
-    else:
-        raise ValueError(f"Unsupported quantization format: {quantization}. Use 'FP8', 'NVFP4', or 'BF16'")
+    hf_model = _unwrap_model(model)
+
+    # Export BF16 first: quantization modifies the model in place
+    formats.sort(key=lambda fmt: fmt != "BF16")
+    calibration = None
+    if any(fmt != "BF16" for fmt in formats):
+        print(f"Preparing calibration data ({num_calib_samples} samples)...")
+        calibration = prepare_calibration(
+            tokenizer, calib_data, num_calib_samples, calib_batch_size, calib_max_length
+        )
+    last_quantized = max((i for i, fmt in enumerate(formats) if fmt != "BF16"), default=None)
+
+    results = {}
+    for i, fmt in enumerate(formats):
+        variant_name = name if len(formats) == 1 else f"{name}-{fmt.lower().replace('_', '-')}"
+
+        # Step 2: Apply quantization if requested
+        _report_progress('quantizing', quantization=fmt, name=variant_name)
+        if fmt == "BF16":
+            print(f"Skipping quantization, saving in BF16 format...")
+            quantized_model = hf_model
+        else:
+            source = hf_model
+            if i != last_quantized:
+                import copy
+                source = copy.deepcopy(hf_model)
+            quantized_model = quantize_model(source, tokenizer, fmt, calibration=calibration)
+
+        # Step 3: Save model to staging using ModelOpt export for quantized models
+        _report_progress('saving', quantization=fmt, name=variant_name)
+        dedup_plan = None
+        if dedup and fmt == "BF16":
+            print(f"Comparing tensors with base model {base_model}...")
+            dedup_plan = plan_deduplication(hf_model, base_model)
+        elif dedup:
+            print(f"  Note: {fmt} weights differ from the base model; dedup applies to BF16 only")
+        _save_to_staging(quantized_model, tokenizer, variant_name, fmt, dedup_plan=dedup_plan)
+        if quantized_model is not hf_model:
+            # Free this copy before the next format makes another one
+            del source, quantized_model
+            _release_memory()
+
+        # Step 4: Call thinkube-control API to register in MLflow
+        _report_progress('registering', quantization=fmt, name=variant_name)
+        results[fmt] = _submit_registration(
+            variant_name, base_model, task, server_type, description, fmt, wait
+        )
 
-    # Step 3: Save model to staging using ModelOpt export for quantized models
+    if isinstance(quantization, str):
+        return results[quantization]
+    return [results[fmt] for fmt in quantization]
+
+
+def register_lora_adapter(
+    model,
+    tokenizer,
+    name: str,
+    base_model: str,
+    task: str = "text-generation",
+    server_type: str = "vllm",
+    description: str = None,
+    wait: bool = False
+):
+    """
+    Register only the LoRA adapter of a fine-tune, referencing its base model.
+
+    Nothing is merged, quantized or exported: the adapter weights (a few
+    hundred MB at most) are staged together with the tokenizer and a
+    thinkube_adapter.json that pins the exact base model version. Serving
+    applies the adapter on top of the shared base weights, so many
+    fine-tunes of one base need only one copy of it in GPU memory.
+
+    Args:
+        model: The fine-tuned PEFT/Unsloth model (not merged)
+        tokenizer: The tokenizer
+        name: Adapter name for the catalog (e.g., "gpt-oss-tool-use-lora")
+        base_model: Base model ID registered in MLflow (e.g., "unsloth/gpt-oss-20b")
+        task: Model task (default: "text-generation")
+        server_type: Target server; must support LoRA adapters (default: "vllm")
+        description: Optional description
+        wait: If True, wait for registration to complete
+
+    Returns:
+        dict: Registration job info (see register_finetuned_model)
+
+    Example:
+        result = register_lora_adapter(
+            model, tokenizer,
+            name="gpt-oss-tool-use-lora",
+            base_model="unsloth/gpt-oss-20b",
+        )
+    """
+    if not hasattr(model, 'peft_config'):
+        raise ValueError(
+            "Model has no LoRA adapter. Register merged models with register_finetuned_model()."
+        )
+
+    # Pin the base version the adapter was trained against
+    base = resolve_model(base_model)
+    print(f"Registering LoRA adapter on {base_model} (version {base['version']})")
+
+    staging_dir = STAGING_PATH / name
+    print(f"Saving adapter to staging: {staging_dir}")
+    _report_progress('saving', quantization='LORA', name=name)
+    with staging_writer(name) as tmp_dir:
+        model.save_pretrained(str(tmp_dir))
+        tokenizer.save_pretrained(str(tmp_dir))
+        (tmp_dir / 'thinkube_adapter.json').write_text(json.dumps({
+            'adapter_format': 'peft-lora',
+            'base_model': base_model,
+            'base_model_name': base['name'],
+            'base_model_version': base['version'],
+            'base_model_run_id': base['run_id'],
+        }, indent=2))
+    print(f"✓ Adapter saved to staging: {staging_dir}")
+
+    _report_progress('registering', quantization='LORA', name=name)
+    full_description = f"{description or f'Fine-tuned from {base_model}'} (LoRA adapter)"
+    return _submit_registration(
+        name, base_model, task, server_type, full_description, "BF16", wait,
+        extra={
+            'artifact_type': 'lora-adapter',
+            'base_model_version': base['version'],
+        }
+    )
+
+
+@stage_span('export')
+def _save_to_staging(model, tokenizer, name: str, quantization: str, dedup_plan: dict = None) -> Path:
+    """Write a (quantized) model and its tokenizer to STAGING_PATH / name."""
     staging_dir = STAGING_PATH / name
-    staging_dir.mkdir(parents=True, exist_ok=True)
 
     print(f"Saving model to staging: {staging_dir}")
 
-    if quantization in ["FP8", "NVFP4"]:
-        # Use ModelOpt's HuggingFace export for quantized models
-        from modelopt.torch.export import export_hf_checkpoint
-        export_hf_checkpoint(quantized_model, str(staging_dir))
-        tokenizer.save_pretrained(str(staging_dir))
-    else:
-        # Save BF16 model directly
-        quantized_model.save_pretrained(str(staging_dir))
-        tokenizer.save_pretrained(str(staging_dir))
+    with staging_writer(name, dedup_plan=dedup_plan) as tmp_dir:
+        if quantization != "BF16":
+            # Use ModelOpt's HuggingFace export for quantized models
+            from modelopt.torch.export import export_hf_checkpoint
+            export_hf_checkpoint(model, str(tmp_dir))
+        else:
+            # Save BF16 model directly
+            model.save_pretrained(str(tmp_dir))
+        tokenizer.save_pretrained(str(tmp_dir))
 
     print(f"✓ Model saved to staging: {staging_dir}")
+    if dedup_plan:
+        manifest = json.loads((staging_dir / STAGING_MANIFEST).read_text())
+        print(f"  Reused unchanged base tensors: {manifest.get('linked_bytes', 0) / 1e9:.2f} GB not rewritten")
+    return staging_dir
 
-    # Step 4: Call thinkube-control API to register in MLflow
-    api_url = get_thinkube_control_url()
-    token = get_auth_token()
 
-    headers = {"Content-Type": "application/json"}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+@stage_span('register')
+def _submit_registration(
+    name: str,
+    base_model: str,
+    task: str,
+    server_type: str,
+    description: Optional[str],
+    quantization: str,
+    wait: bool,
+    extra: dict = None
+) -> dict:
+    """Ask thinkube-control to register a staged model in MLflow."""
+    api_url = get_thinkube_control_url()
 
     # Include quantization info in description
     quant_info = f" ({quantization})" if quantization != "BF16" else ""
@@ -546,17 +2502,17 @@ def register_finetuned_model(
         "task": task,
         "server_type": server_type,
         "description": full_description,
-        "quantization": quantization
+        "quantization": quantization,
+        **(extra or {})
     }
 
     print(f"Registering model with thinkube-control...")
 
     try:
-        response = requests.post(
+        response = get_client().post(
             f"{api_url}/api/v1/models/register",
-            headers=headers,
+            auth='control',
             json=payload,
-            timeout=30
         )
         response.raise_for_status()
         result = response.json()
@@ -577,80 +2533,343 @@ def register_finetuned_model(
         raise
 
 
-def wait_for_registration(workflow_id: str, timeout: int = 600, poll_interval: int = 10):
+def _check_registration(workflow_id: str) -> dict:
+    """Fetch the current status of a registration workflow."""
+    response = get_client().get(
+        f"{get_thinkube_control_url()}/api/v1/models/mirrors/{workflow_id}",
+        auth='control',
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def _registration_finished(status: dict) -> bool:
+    if status['is_complete']:
+        print(f"✓ Registration complete: {status['model_id']}")
+        return True
+    if status['is_failed']:
+        print(f"✗ Registration failed: {status.get('error_message', 'Unknown error')}")
+        return True
+    return False
+
+
+@stage_span('wait')
+def wait_for_registration(
+    workflow_id: str,
+    timeout: int = 600,
+    poll_interval: float = 2,
+    max_poll_interval: float = 30,
+    progress_callback=None
+):
     """
     Wait for a registration job to complete.
 
+    Status checks start every `poll_interval` seconds and back off
+    exponentially to `max_poll_interval`, so short jobs finish promptly
+    while long exports are not polled needlessly.
+
     Args:
         workflow_id: The Argo workflow ID
         timeout: Maximum seconds to wait (default: 600)
-        poll_interval: Seconds between status checks (default: 10)
+        poll_interval: Seconds before the first status check (default: 2)
+        max_poll_interval: Upper bound for the backoff (default: 30)
+        progress_callback: Optional callable receiving each status dict
 
     Returns:
         dict: Final job status
     """
-    import time
-
-    api_url = get_thinkube_control_url()
-    token = get_auth_token()
-
-    headers = {}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-
     start_time = time.time()
+    delay = poll_interval
 
     while time.time() - start_time < timeout:
+        time.sleep(min(delay, max(timeout - (time.time() - start_time), 0)))
+        delay = min(delay * 2, max_poll_interval)
+
         try:
-            response = requests.get(
-                f"{api_url}/api/v1/models/mirrors/{workflow_id}",
-                headers=headers,
-                timeout=10
-            )
-            response.raise_for_status()
-            status = response.json()
-
-            if status['is_complete']:
-                print(f"✓ Registration complete: {status['model_id']}")
-                return status
-            elif status['is_failed']:
-                print(f"✗ Registration failed: {status.get('error_message', 'Unknown error')}")
-                return status
-            else:
-                elapsed = int(time.time() - start_time)
-                print(f"  Waiting... ({elapsed}s) - Status: {status['status']}")
+            status = _check_registration(workflow_id)
+        except Exception as e:
+            print(f"  Warning: Could not check status: {e}")
+            continue
+
+        _report_progress('waiting', **status)
+        if progress_callback is not None:
+            progress_callback(status)
+
+        if _registration_finished(status):
+            return status
+        elapsed = int(time.time() - start_time)
+        print(f"  Waiting... ({elapsed}s) - Status: {status['status']}")
+
+    print(f"✗ Timeout waiting for registration (>{timeout}s)")
+    return {"status": "timeout", "workflow_id": workflow_id}
+
+
+async def wait_for_registration_async(
+    workflow_id: str,
+    timeout: int = 600,
+    poll_interval: float = 2,
+    max_poll_interval: float = 30,
+    progress_callback=None
+):
+    """
+    Asyncio variant of wait_for_registration() that never blocks the event loop.
+
+    Example:
+        status = await wait_for_registration_async(result['workflow_id'])
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    delay = poll_interval
+
+    while loop.time() - start_time < timeout:
+        await asyncio.sleep(min(delay, max(timeout - (loop.time() - start_time), 0)))
+        delay = min(delay * 2, max_poll_interval)
 
+        try:
+            status = await asyncio.to_thread(_check_registration, workflow_id)
         except Exception as e:
             print(f"  Warning: Could not check status: {e}")
+            continue
 
-        time.sleep(poll_interval)
+        if progress_callback is not None:
+            progress_callback(status)
+        if _registration_finished(status):
+            return status
 
     print(f"✗ Timeout waiting for registration (>{timeout}s)")
     return {"status": "timeout", "workflow_id": workflow_id}
 
 
-def list_registered_models():
+# Background registrations run one at a time: each export already saturates the GPU
+_registration_executor = None
+_progress_state = threading.local()
+
+
+def _report_progress(stage: str, **info):
+    """Forward a pipeline stage to the RegistrationJob running on this thread, if any."""
+    job = getattr(_progress_state, 'job', None)
+    if job is not None:
+        job._update(stage, info)
+
+
+class RegistrationJob:
     """
-    List all registered models in the catalog.
+    Handle for a registration running in the background.
+
+    Returned by register_finetuned_model_async(). Mirrors
+    concurrent.futures.Future (done, result, exception) and can be awaited
+    from asyncio code.
+
+    Attributes:
+        name: Model name being registered
+        stage: Current stage - "queued", "quantizing", "saving", "registering",
+            "waiting", "complete" or "failed"
+        info: Details reported with the current stage (e.g., workflow status)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stage = 'queued'
+        self.info = {}
+        self.future = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def add_progress_callback(self, callback):
+        """Call `callback(job)` whenever the job moves to a new stage or reports status."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def _update(self, stage: str, info: dict):
+        with self._lock:
+            self.stage = stage
+            self.info = info
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"  Warning: Progress callback failed: {e}")
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: float = None):
+        """Block until the registration finishes and return its result."""
+        return self.future.result(timeout)
+
+    def exception(self, timeout: float = None):
+        return self.future.exception(timeout)
+
+    def __await__(self):
+        import asyncio
+        return asyncio.wrap_future(self.future).__await__()
+
+    def __repr__(self):
+        return f"<RegistrationJob {self.name!r} stage={self.stage}>"
+
+
+def register_finetuned_model_async(model, tokenizer, name: str, base_model: str, **kwargs) -> RegistrationJob:
+    """
+    Run register_finetuned_model() on a background thread.
+
+    The notebook kernel stays free while the model is quantized, exported
+    and registered. Do not modify or free the model until the job is done.
+    Accepts the same arguments as register_finetuned_model(); `wait`
+    defaults to True here so the result is the final registration status.
 
     Returns:
-        list: List of model info dictionaries
+        RegistrationJob: Handle with done(), result(), progress callbacks; awaitable
+
+    Example:
+        job = register_finetuned_model_async(model, tokenizer, "gpt-oss-tool-use", "unsloth/gpt-oss-20b")
+        job.add_progress_callback(lambda j: print(j.stage, j.info.get('status', '')))
+        # ... start the next experiment ...
+        status = job.result()        # or: status = await job
     """
-    api_url = get_thinkube_control_url()
-    token = get_auth_token()
+    global _registration_executor
+    from concurrent.futures import ThreadPoolExecutor
+
+    kwargs.setdefault('wait', True)
+    if _registration_executor is None:
+        _registration_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thinkube-register')
+
+    job = RegistrationJob(name)
+
+    def run():
+        _progress_state.job = job
+        try:
+            result = register_finetuned_model(model, tokenizer, name, base_model, **kwargs)
+        except BaseException as e:
+            job._update('failed', {'error': str(e)})
+            raise
+        finally:
+            _progress_state.job = None
+        statuses = result if isinstance(result, list) else [result]
+        failed = any(r.get('is_failed') or r.get('status') == 'timeout' for r in statuses)
+        job._update('failed' if failed else 'complete', result if isinstance(result, dict) else {'results': result})
+        return result
+
+    job.future = _registration_executor.submit(run)
+    return job
+
+
+def _get_catalog_page(url: str, params: dict, use_cache: bool) -> dict:
+    """GET one catalog page, revalidating a locally cached copy with If-None-Match."""
+    import hashlib
 
+    key = hashlib.sha256(json.dumps([url, sorted(params.items())]).encode()).hexdigest()[:32]
+    cache_file = CATALOG_CACHE_PATH / f"{key}.json"
+    cached = None
     headers = {}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+    if use_cache:
+        try:
+            cached = json.loads(cache_file.read_text())
+            headers['If-None-Match'] = cached['etag']
+        except (OSError, ValueError, KeyError):
+            cached = None
+
+    response = get_client().get(url, auth='control', params=params, headers=headers, timeout=10)
+    if response.status_code == 304 and cached is not None:
+        return cached['body']
+    response.raise_for_status()
+    body = response.json()
+
+    etag = response.headers.get('ETag')
+    if use_cache and etag:
+        try:
+            CATALOG_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            tmp_file.write_text(json.dumps({'etag': etag, 'body': body}))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"  Warning: Could not cache catalog page: {e}")
+    return body
+
+
+def iter_registered_models(
+    task: str = None,
+    server_type: str = None,
+    quantization: str = None,
+    base_model: str = None,
+    page_size: int = CATALOG_PAGE_SIZE,
+    use_cache: bool = True
+):
+    """
+    Iterate over catalog models, fetching pages lazily.
+
+    Filters are sent to thinkube-control and also applied locally, so they
+    work with servers that ignore them. Pages are requested with
+    skip/limit; a server that returns the whole catalog in one response is
+    handled as a single page. Each page is cached under
+    CATALOG_CACHE_PATH and revalidated with If-None-Match, so an unchanged
+    page costs a 304 instead of a full download.
+
+    Args:
+        task: Only models with this task (e.g., "text-generation")
+        server_type: Only models for this server (e.g., "tensorrt-llm")
+        quantization: Only models with this quantization (e.g., "FP8")
+        base_model: Only fine-tunes of this base model (e.g., "unsloth/gpt-oss-20b")
+        page_size: Models requested per page (default: 50)
+        use_cache: If True, use conditional requests and the local page cache
+
+    Yields:
+        dict: Model info, as returned by list_registered_models()
+
+    Raises:
+        requests.exceptions.RequestException: If the catalog cannot be fetched
+
+    Example:
+        from thinkube_models import iter_registered_models
+
+        for model in iter_registered_models(task="text-generation", quantization="FP8"):
+            print(model['name'])
+    """
+    url = f"{get_thinkube_control_url()}/api/v1/models/catalog"
+    filters = {
+        key: value for key, value in (
+            ('task', task), ('server_type', server_type),
+            ('quantization', quantization), ('base_model', base_model),
+        ) if value is not None
+    }
+
+    skip = 0
+    previous_first = None
+    while True:
+        body = _get_catalog_page(url, {**filters, 'skip': skip, 'limit': page_size}, use_cache)
+        models = body.get('models', [])
+
+        # A server without pagination answers every page with the full list
+        if models and models[0] == previous_first:
+            return
+        previous_first = models[0] if models else None
+
+        for model in models:
+            if all(model.get(key) == value for key, value in filters.items()):
+                yield model
+
+        skip += len(models)
+        total = body.get('total')
+        if len(models) != page_size or (total is not None and skip >= total):
+            return
 
+
+def list_registered_models(**filters):
+    """
+    List all registered models in the catalog.
+
+    Args:
+        **filters: Optional task, server_type, quantization or base_model
+            (see iter_registered_models)
+
+    Returns:
+        list: List of model info dictionaries
+    """
     try:
-        response = requests.get(
-            f"{api_url}/api/v1/models/catalog",
-            headers=headers,
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()['models']
+        return list(iter_registered_models(**filters))
     except Exception as e:
         print(f"✗ Failed to list models: {e}")
         return []
@@ -669,3 +2888,22 @@ def get_staging_path(name: str = None):
     if name:
         return STAGING_PATH / name
     return STAGING_PATH
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m thinkube_models', description='Thinkube model helpers')
+    commands = parser.add_subparsers(dest='command', required=True)
+    prefetch_parser = commands.add_parser('prefetch', help='Copy a model to the local disk cache')
+    prefetch_parser.add_argument('model_id')
+    prefetch_parser.add_argument('--budget-gb', type=float, default=None)
+    commands.add_parser('cache', help='List locally cached models')
+    args = parser.parse_args()
+
+    if args.command == 'prefetch':
+        prefetch_model(args.model_id, budget_gb=args.budget_gb)
+    else:
+        for entry in reversed(_local_cache_entries()):
+            print(f"{entry['path'].name:60s} {entry.get('size', 0) / 1e9:8.2f} GB  "
+                  f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))}")
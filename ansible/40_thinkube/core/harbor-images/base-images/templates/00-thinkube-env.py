@@ -10,12 +10,74 @@ Automatically loads environment variables from multiple sources:
 3. User secrets from thinkube-control (notebooks/.secrets.env)
 
 These variables become available via os.environ in all notebook cells.
+
+The parsed result is cached in a local file (ENV_CACHE_FILE, mode 0600)
+keyed by each source's path, mtime and size, so a kernel start only
+stats the files on JuiceFS unless one of them changed.
+
+Running kernels can pick up rewritten files without a restart: call
+watch_thinkube_environment() in a notebook (or set THINKUBE_ENV_WATCH=1)
+to poll the files' mtimes on a background thread and apply changed keys
+to os.environ. refresh_thinkube_environment() does one check on demand.
+
+THINKUBE_ENV_MODE selects how the files are loaded:
+- eager (default): load and report at kernel start
+- lazy (opt-in, for batch kernels that start often and may never need
+  the variables): give os.environ a thin overlay that loads the files
+  quietly on the first lookup of a missing key (or iteration/copy of
+  os.environ)
+- off: do nothing
+The lazy overlay lives in Python only. Forked children (os.fork,
+multiprocessing) still see the variables because the load runs before
+the fork, but subprocess and os.system children started before the first
+load do not; touch os.environ first (e.g. dict(os.environ)) if needed.
+
+`python 00-thinkube-env.py --check-budget` measures kernel startup cost
+in each mode against ENV_STARTUP_BUDGET_MS and exits non-zero if it is
+over. The image build only reports the result (timings on a busy build
+host are noise); tests/test_thinkube_env.py enforces the budgets against
+representative env files.
 """
 
+import json
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 
+# Local (not JuiceFS) cache of the merged environment, private to this user
+ENV_CACHE_FILE = Path(os.environ.get('XDG_RUNTIME_DIR') or '/tmp') / f'thinkube-env-{os.getuid()}.json'
+ENV_CACHE_VERSION = 1
+
+# Seconds between mtime checks of the env files when watching is enabled
+ENV_WATCH_INTERVAL = float(os.environ.get('THINKUBE_ENV_WATCH_INTERVAL', 10))
+
+# Startup budget (milliseconds) checked by --check-budget, per mode
+ENV_STARTUP_BUDGET_MS = {
+    'eager': float(os.environ.get('THINKUBE_ENV_BUDGET_EAGER_MS', 25)),
+    'lazy': float(os.environ.get('THINKUBE_ENV_BUDGET_LAZY_MS', 3)),
+}
+
+# What the last load applied (source keys, merged variables), plus the watcher and fork hook
+_env_state = {'keys': None, 'applied': {}, 'watcher': None, 'fork_hook': False}
+_env_lock = threading.Lock()
+
+
+def env_sources():
+    """The environment files in load order (later files override earlier ones)."""
+    home = Path.home()
+    return [
+        # 1. Core service endpoints from Docker image
+        (home / '.thinkube_env', 'core service endpoints from .thinkube_env'),
+        # 2. Service endpoints from service discovery (the init container
+        #    writes service-env-jh.sh). Loaded after the image defaults on
+        #    purpose: the discovered endpoint is the deployed one.
+        (home / '.config' / 'thinkube' / 'service-env-jh.sh', 'service endpoints from service-env-jh.sh'),
+        # 3. User secrets from thinkube-control
+        (home / 'thinkube' / 'notebooks' / '.secrets.env', 'user secrets from thinkube-control'),
+    ]
+
 
 def parse_env_file(file_path):
     """Parse a shell environment file and return dict of variables."""
@@ -66,47 +128,309 @@ def parse_env_file(file_path):
     return env_vars
 
 
-def load_thinkube_environment():
+def source_key(file_path):
+    """(path, mtime, size) of a source file, or (path, None, None) if it is missing."""
+    try:
+        st = file_path.stat()
+    except OSError:
+        return [str(file_path), None, None]
+    return [str(file_path), st.st_mtime_ns, st.st_size]
+
+
+def read_env_cache(keys):
+    """Return the cached parse if it was made from exactly these source files."""
+    try:
+        fd = os.open(ENV_CACHE_FILE, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+    try:
+        st = os.fstat(fd)
+        # Only trust a private file we created ourselves (/tmp is shared)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            return None
+        with os.fdopen(fd, 'r') as f:
+            fd = None
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+    if cache.get('version') != ENV_CACHE_VERSION or cache.get('keys') != keys:
+        return None
+    return cache['sources']
+
+
+def write_env_cache(keys, sources):
+    """Store the parse atomically in a 0600 file; failures only cost the next start a re-parse."""
+    tmp_path = ENV_CACHE_FILE.with_name(f'{ENV_CACHE_FILE.name}.{os.getpid()}.tmp')
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': ENV_CACHE_VERSION, 'keys': keys, 'sources': sources}, f,
+                      separators=(',', ':'))
+        os.replace(tmp_path, ENV_CACHE_FILE)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def read_thinkube_environment():
+    """
+    Parse the environment files, using the local cache when none changed.
+
+    Returns a list of (label, variables or None if the file is missing)
+    in load order, whether the cache was used, and the source keys.
+    """
+    sources = env_sources()
+    keys = [source_key(path) for path, _ in sources]
+
+    cached = read_env_cache(keys)
+    if cached is not None:
+        return [(label, env_vars) for (_, label), env_vars in zip(sources, cached)], True, keys
+
+    parsed = [parse_env_file(path) if key[1] is not None else None
+              for (path, _), key in zip(sources, keys)]
+    write_env_cache(keys, parsed)
+    return [(label, env_vars) for (_, label), env_vars in zip(sources, parsed)], False, keys
+
+
+def merge_sources(sources):
+    merged = {}
+    for _, env_vars in sources:
+        merged.update(env_vars or {})
+    return merged
+
+
+def load_thinkube_environment(quiet=False):
     """Load all Thinkube environment variables into os.environ."""
-    home = Path.home()
+    start = time.perf_counter()
+    sources, from_cache, keys = read_thinkube_environment()
     loaded_count = 0
+    with _env_lock:
+        _env_state['keys'] = keys
+        _env_state['applied'] = merge_sources(sources)
 
-    # 1. Load core service endpoints from Docker image
-    thinkube_env = home / '.thinkube_env'
-    if thinkube_env.exists():
-        env_vars = parse_env_file(thinkube_env)
-        os.environ.update(env_vars)
-        loaded_count += len(env_vars)
-        print(f"✓ Loaded {len(env_vars)} core service endpoints from .thinkube_env")
-
-    # 2. Load service endpoints from service discovery (the init container
-    #    writes service-env-jh.sh). Loaded after the image defaults on
-    #    purpose: the discovered endpoint is the deployed one.
-    service_env = home / '.config' / 'thinkube' / 'service-env-jh.sh'
-    if service_env.exists():
-        env_vars = parse_env_file(service_env)
+    for label, env_vars in sources:
+        if env_vars is None:
+            continue
         os.environ.update(env_vars)
         loaded_count += len(env_vars)
-        print(f"✓ Loaded {len(env_vars)} service endpoints from service-env-jh.sh")
-
-    # 3. Load user secrets from thinkube-control
-    secrets_env = home / 'thinkube' / 'notebooks' / '.secrets.env'
-    if secrets_env.exists():
-        env_vars = parse_env_file(secrets_env)
-        os.environ.update(env_vars)
-        loaded_count += len(env_vars)
-        print(f"✓ Loaded {len(env_vars)} user secrets from thinkube-control")
+        if not quiet:
+            print(f"✓ Loaded {len(env_vars)} {label}")
 
+    if quiet:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    timing = f"{elapsed_ms:.1f} ms, {'cached' if from_cache else 'parsed'}"
     if loaded_count > 0:
-        print(f"\n✅ Thinkube environment ready: {loaded_count} total variables loaded")
+        print(f"\n✅ Thinkube environment ready: {loaded_count} total variables loaded ({timing})")
         print("   Access via: import os; os.environ['VARIABLE_NAME']")
     else:
-        print("ℹ No Thinkube environment files found (this is normal on first startup)")
+        print(f"ℹ No Thinkube environment files found (this is normal on first startup) ({timing})")
+
+
+def refresh_thinkube_environment(quiet=False):
+    """
+    Apply changes to the env files since the last load to os.environ.
+
+    Only keys whose value changed are touched. Keys that disappeared from
+    the files are removed, and keys set to something else in the notebook
+    since the last load are left alone. Only key names are reported;
+    values may be secrets.
+
+    Returns:
+        dict: 'changed', 'removed' and 'skipped' key lists (all empty if nothing changed)
+    """
+    diff = {'changed': [], 'removed': [], 'skipped': []}
+    ensure_thinkube_environment()
+    with _env_lock:
+        keys = [source_key(path) for path, _ in env_sources()]
+        if keys == _env_state['keys']:
+            return diff
+
+        sources, _, keys = read_thinkube_environment()
+        previous = _env_state['applied']
+        current = merge_sources(sources)
+
+        for key in sorted(set(previous) | set(current)):
+            old, new = previous.get(key), current.get(key)
+            if old == new:
+                continue
+            if os.environ.get(key) != old:
+                diff['skipped'].append(key)
+            elif new is None:
+                del os.environ[key]
+                diff['removed'].append(key)
+            else:
+                os.environ[key] = new
+                diff['changed'].append(key)
+
+        _env_state['keys'] = keys
+        _env_state['applied'] = current
+
+    if not quiet and any(diff.values()):
+        parts = [f"{name} {', '.join(names)}" for name, names in diff.items() if names]
+        print(f"🔄 Thinkube environment updated: {'; '.join(parts)}")
+    return diff
+
+
+class EnvWatcher(threading.Thread):
+    """Background thread polling the env files' mtimes."""
+
+    def __init__(self, interval):
+        super().__init__(name='thinkube-env-watcher', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                refresh_thinkube_environment()
+            except Exception as e:
+                print(f"Warning: Could not refresh Thinkube environment: {e}", file=sys.stderr)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def watch_thinkube_environment(interval=ENV_WATCH_INTERVAL):
+    """
+    Keep os.environ in sync with the env files while the kernel runs.
+
+    The files live on JuiceFS, where changes made by other pods do not
+    raise inotify events, so their mtimes are polled every `interval`
+    seconds (three stat calls per check).
+    """
+    with _env_lock:
+        if _env_state['watcher'] is not None:
+            _env_state['watcher'].stop()
+        _env_state['watcher'] = EnvWatcher(interval)
+        _env_state['watcher'].start()
+    print(f"👀 Watching Thinkube environment files (every {interval:g}s)")
+
+
+def stop_watching_thinkube_environment():
+    with _env_lock:
+        if _env_state['watcher'] is not None:
+            _env_state['watcher'].stop()
+            _env_state['watcher'] = None
+
+
+_lazy_lock = threading.RLock()
+_lazy_pending = False
+
+
+class LazyEnviron(os._Environ):
+    """os.environ that loads the Thinkube env files on the first miss, then steps aside."""
+
+    def __getitem__(self, key):
+        try:
+            return os._Environ.__getitem__(self, key)
+        except KeyError:
+            if not ensure_thinkube_environment():
+                raise
+        return os._Environ.__getitem__(self, key)
+
+    def __iter__(self):
+        ensure_thinkube_environment()
+        return os._Environ.__iter__(self)
+
+    def __len__(self):
+        ensure_thinkube_environment()
+        return os._Environ.__len__(self)
+
+    def copy(self):
+        ensure_thinkube_environment()
+        return os._Environ.copy(self)
+
+
+def ensure_thinkube_environment():
+    """Run a pending lazy load; True if this call loaded the environment."""
+    global _lazy_pending
+    if not _lazy_pending:
+        return False
+    with _lazy_lock:
+        if not _lazy_pending:
+            return False
+        _lazy_pending = False
+        # Plain os.environ again, so the load below (and later lookups) bypass the overlay
+        os.environ.__class__ = os._Environ
+        try:
+            load_thinkube_environment(quiet=True)
+        except Exception as e:
+            print(f"Warning: Could not load Thinkube environment: {e}", file=sys.stderr)
+        return True
+
+
+def install_lazy_environment():
+    global _lazy_pending
+    _lazy_pending = True
+    os.environ.__class__ = LazyEnviron
+    # A forked child inherits the C-level environment, so load it first
+    if not _env_state['fork_hook']:
+        os.register_at_fork(before=ensure_thinkube_environment)
+        _env_state['fork_hook'] = True
+
+
+def startup_mode():
+    mode = os.environ.get('THINKUBE_ENV_MODE', 'eager').lower()
+    if mode not in ('eager', 'lazy', 'off'):
+        print(f"Warning: unknown THINKUBE_ENV_MODE {mode!r}, loading eagerly", file=sys.stderr)
+        return 'eager'
+    return mode
+
+
+def measure_startup(mode, runs=5, env=None):
+    """Best time (ms) of the hook over `runs` fresh interpreters in `mode`."""
+    import subprocess
+
+    # Modules an IPython kernel has already imported are loaded before the timer starts
+    code = (
+        "import json, pathlib, subprocess, threading, time; "
+        f"source = compile(open({__file__!r}).read(), {__file__!r}, 'exec'); "
+        "start = time.perf_counter(); "
+        "exec(source, dict(__name__='thinkube_env_budget')); "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    env = dict(os.environ if env is None else env, THINKUBE_ENV_MODE=mode)
+    env.pop('THINKUBE_ENV_WATCH', None)
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+                                text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def check_startup_budget(runs=5):
+    """Measure the hook in fresh interpreters per mode; 0 if every mode is within budget."""
+    failed = False
+    for mode, budget in ENV_STARTUP_BUDGET_MS.items():
+        best = measure_startup(mode, runs)
+        ok = best <= budget
+        failed = failed or not ok
+        print(f"{'✓' if ok else '✗'} {mode}: {best:.2f} ms (budget {budget:g} ms)")
+    return 1 if failed else 0
 
 
 # Auto-load environment when kernel starts
-try:
-    load_thinkube_environment()
-except Exception as e:
-    print(f"❌ Error loading Thinkube environment: {e}", file=sys.stderr)
-    print("   Notebooks will work, but service credentials may not be available", file=sys.stderr)
+_mode = startup_mode()
+# Read before the lazy overlay is installed: a missing key there would trigger the load
+_watch = os.environ.get('THINKUBE_ENV_WATCH', '').lower() in ('1', 'true', 'yes')
+if __name__ == '__main__' and sys.argv[1:2] == ['--check-budget']:
+    sys.exit(check_startup_budget())
+elif _mode == 'lazy':
+    install_lazy_environment()
+elif _mode == 'eager':
+    try:
+        load_thinkube_environment()
+    except Exception as e:
+        print(f"❌ Error loading Thinkube environment: {e}", file=sys.stderr)
+        print("   Notebooks will work, but service credentials may not be available", file=sys.stderr)
+
+if _mode != 'off' and _watch:
+    watch_thinkube_environment()
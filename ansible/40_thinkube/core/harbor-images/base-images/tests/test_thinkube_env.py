@@ -0,0 +1,113 @@
+# Copyright 2025 Alejandro Martínez Corriá and the Thinkube contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Tests for the Jupyter kernel startup hook (templates/00-thinkube-env.py).
+
+Every test runs the hook in a fresh interpreter against a temporary HOME
+holding representative env files: the image's .thinkube_env rendered from
+thinkube_env.j2, a service discovery file and a user secrets file.
+
+Run with: python -m pytest ansible/40_thinkube/core/harbor-images/base-images/tests
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_IMAGES = Path(__file__).resolve().parent.parent
+HOOK = BASE_IMAGES / 'templates' / '00-thinkube-env.py'
+
+# Budgets are wall-clock times, so shared CI runners get this much headroom
+BUDGET_MARGIN = float(os.environ.get('THINKUBE_ENV_BUDGET_MARGIN', 2))
+
+# Sizes of the generated files, in line with a cluster running the optional services
+SERVICE_VARIABLES = 80
+SECRET_VARIABLES = 20
+
+
+def load_hook(monkeypatch):
+    """Import the hook as a module without running its startup load."""
+    monkeypatch.setenv('THINKUBE_ENV_MODE', 'off')
+    spec = importlib.util.spec_from_file_location('thinkube_env_hook', HOOK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def kernel_env(tmp_path):
+    """Environment of a kernel whose HOME holds representative env files."""
+    home = tmp_path / 'home'
+    runtime = tmp_path / 'run'
+    runtime.mkdir(mode=0o700)
+
+    core = (BASE_IMAGES / 'thinkube_env.j2').read_text().replace('{{ domain_name }}', 'thinkube.example')
+    (home / '.config' / 'thinkube').mkdir(parents=True)
+    (home / '.thinkube_env').write_text(core)
+
+    services = ['#!/bin/bash', '# Auto-generated from service discovery ConfigMaps']
+    for i in range(SERVICE_VARIABLES):
+        services.append(f'export SERVICE_{i}_URL="https://service-{i}.thinkube.example:8443/api"')
+    (home / '.config' / 'thinkube' / 'service-env-jh.sh').write_text('\n'.join(services) + '\n')
+
+    (home / 'thinkube' / 'notebooks').mkdir(parents=True)
+    secrets = [f"SECRET_{i}='{'x' * 40}'" for i in range(SECRET_VARIABLES)]
+    (home / 'thinkube' / 'notebooks' / '.secrets.env').write_text('\n'.join(secrets) + '\n')
+
+    env = {k: v for k, v in os.environ.items() if not k.startswith('THINKUBE_ENV_')}
+    env.update(HOME=str(home), XDG_RUNTIME_DIR=str(runtime))
+    return env
+
+
+def run_kernel(env, code):
+    """Run the hook the way IPython runs startup files, then `code`; return stdout."""
+    script = f"import os, subprocess\nexec(open({str(HOOK)!r}).read(), dict(__name__='__main__'))\n{code}"
+    result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True,
+                            text=True, check=True)
+    return result.stdout
+
+
+@pytest.mark.parametrize('mode', ['eager', 'lazy'])
+def test_startup_within_budget(monkeypatch, kernel_env, mode):
+    hook = load_hook(monkeypatch)
+    # The first start parses the files and writes the cache; measure_startup takes the best run
+    run_kernel(dict(kernel_env, THINKUBE_ENV_MODE='eager'), '')
+
+    best = hook.measure_startup(mode, runs=5, env=kernel_env)
+
+    budget = hook.ENV_STARTUP_BUDGET_MS[mode]
+    assert best <= budget * BUDGET_MARGIN, f"{mode}: {best:.2f} ms, budget {budget:g} ms"
+
+
+def test_eager_is_the_default(kernel_env):
+    stdout = run_kernel(kernel_env, "print(type(os.environ).__name__)")
+    assert 'Thinkube environment ready' in stdout
+    assert stdout.splitlines()[-1] == '_Environ'
+
+
+def test_subprocess_sees_variables(kernel_env):
+    stdout = run_kernel(kernel_env, "subprocess.run(['sh', '-c', 'echo $SERVICE_0_URL $SECRET_0'])")
+    assert stdout.splitlines()[-1] == f"https://service-0.thinkube.example:8443/api {'x' * 40}"
+
+
+def test_lazy_forked_child_sees_variables(kernel_env):
+    env = dict(kernel_env, THINKUBE_ENV_MODE='lazy')
+    code = (
+        "pid = os.fork()\n"
+        "if pid == 0:\n"
+        "    os.execvp('sh', ['sh', '-c', 'echo $POSTGRES_HOST'])\n"
+        "os.waitpid(pid, 0)\n"
+    )
+    stdout = run_kernel(env, code)
+    assert stdout.splitlines()[-1] == 'postgres.thinkube.example'
+
+
+def test_lazy_loads_on_first_miss(kernel_env):
+    env = dict(kernel_env, THINKUBE_ENV_MODE='lazy')
+    stdout = run_kernel(env, "print(os.environ['SECRET_1'])\nprint(type(os.environ).__name__)")
+    assert stdout.splitlines() == ['x' * 40, '_Environ']
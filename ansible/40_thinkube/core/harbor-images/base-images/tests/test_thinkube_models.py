@@ -0,0 +1,153 @@
+# Copyright 2025 Alejandro Martínez Corriá and the Thinkube contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Tests for deduplicated staging in files/thinkube_models.py.
+
+A small Llama (with a real-sized 32k vocabulary) stands in for the base
+model registered in MLflow. Fine-tunes are LoRA adapters on Unsloth's
+default target modules, given trained-looking weights and merged, so
+every decoder layer changes while the embeddings, norms and LM head do
+not. MLflow and the registration API are replaced by the temp directory.
+
+Run with: python -m pytest ansible/40_thinkube/core/harbor-images/base-images/tests
+"""
+
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip('torch')
+transformers = pytest.importorskip('transformers')
+peft = pytest.importorskip('peft')
+
+MODULE = Path(__file__).resolve().parent.parent / 'files' / 'thinkube_models.py'
+
+BASE_MODEL = 'thinkube/tiny-llama'
+
+# Unsloth's default LoRA targets
+LORA_TARGETS = ['q_proj', 'k_proj', 'v_proj', 'o_proj', 'gate_proj', 'up_proj', 'down_proj']
+
+
+class Tokenizer:
+    """Stands in for a tokenizer; staging only calls save_pretrained."""
+
+    def save_pretrained(self, path):
+        Path(path, 'tokenizer_config.json').write_text('{}')
+
+
+@pytest.fixture
+def tm(tmp_path, monkeypatch):
+    """thinkube_models with staging, caches and MLflow redirected to tmp_path."""
+    spec = importlib.util.spec_from_file_location('thinkube_models', MODULE)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, 'thinkube_models', module)
+    spec.loader.exec_module(module)
+
+    monkeypatch.setattr(module, 'STAGING_PATH', tmp_path / 'staging')
+    monkeypatch.setattr(module, 'STAGING_BLOBS_PATH', tmp_path / 'staging' / '.blobs')
+    monkeypatch.setattr(module, 'MODEL_INDEX_PATH', tmp_path / 'cache' / 'model_index.json')
+    base_dir = tmp_path / 'mlflow' / 'tiny-llama'
+    monkeypatch.setattr(module, 'resolve_model', lambda model_id, refresh=False: {
+        'name': 'tiny-llama', 'version': '1', 'run_id': 'run', 'path': str(base_dir),
+    })
+    monkeypatch.setattr(module, '_submit_registration', lambda name, *args, **kwargs: {'job_id': name})
+    module.base_dir = base_dir
+    return module
+
+
+@pytest.fixture
+def base(tm):
+    torch.manual_seed(0)
+    config = transformers.LlamaConfig(
+        vocab_size=32000, hidden_size=256, intermediate_size=688, num_hidden_layers=4,
+        num_attention_heads=4, num_key_value_heads=2, tie_word_embeddings=False,
+    )
+    model = transformers.LlamaForCausalLM(config).to(torch.bfloat16)
+    model.save_pretrained(tm.base_dir)
+    return model
+
+
+def merged_finetune(base, seed):
+    """Merge a LoRA adapter with non-zero (as if trained) weights into a copy of `base`."""
+    import copy
+    torch.manual_seed(seed)
+    model = peft.get_peft_model(copy.deepcopy(base), peft.LoraConfig(r=8, target_modules=LORA_TARGETS))
+    for name, param in model.named_parameters():
+        if 'lora_B' in name:
+            torch.nn.init.normal_(param, std=0.02)
+    return model.merge_and_unload()
+
+
+def staged(tm, name):
+    directory = tm.STAGING_PATH / name
+    return directory, json.loads((directory / tm.STAGING_MANIFEST).read_text())
+
+
+def assert_loads_back(directory, model):
+    loaded = transformers.LlamaForCausalLM.from_pretrained(directory, torch_dtype=torch.bfloat16)
+    expected = model.state_dict()
+    assert loaded.state_dict().keys() == expected.keys()
+    for name, tensor in loaded.state_dict().items():
+        assert torch.equal(tensor, expected[name]), name
+
+
+def test_merged_finetunes_share_unchanged_tensors(tm, base):
+    first, second = merged_finetune(base, 1), merged_finetune(base, 2)
+
+    tm.register_finetuned_model(first, Tokenizer(), 'tuned-a', BASE_MODEL, quantization='BF16', dedup=True)
+    tm.register_finetuned_model(second, Tokenizer(), 'tuned-b', BASE_MODEL, quantization='BF16', dedup=True)
+
+    dir_a, manifest_a = staged(tm, 'tuned-a')
+    dir_b, manifest_b = staged(tm, 'tuned-b')
+    # The first fine-tune writes the pooled blob; the second only links it
+    assert manifest_a['linked_bytes'] == 0
+    embeddings = 2 * 32000 * 256 * 2
+    assert manifest_b['linked_bytes'] > embeddings
+
+    blobs_a = sorted(dir_a.glob('blob-*.safetensors'))
+    blobs_b = sorted(dir_b.glob('blob-*.safetensors'))
+    assert len(blobs_a) == len(blobs_b) == 1
+    assert os.path.samefile(blobs_a[0], blobs_b[0])
+    weight_map = json.loads((dir_b / 'model.safetensors.index.json').read_text())['weight_map']
+    for name in ('model.embed_tokens.weight', 'lm_head.weight', 'model.norm.weight'):
+        assert weight_map[name] == blobs_b[0].name
+    assert weight_map['model.layers.0.self_attn.q_proj.weight'] != blobs_b[0].name
+
+    assert_loads_back(dir_a, first)
+    assert_loads_back(dir_b, second)
+
+
+def test_unchanged_base_shard_is_linked(tm, base):
+    # Re-registering the base model itself links its shard instead of writing it
+    tm.register_finetuned_model(base, Tokenizer(), 'copy', BASE_MODEL, quantization='BF16', dedup=True)
+
+    directory, manifest = staged(tm, 'copy')
+    assert manifest['linked_bytes'] == (tm.base_dir / 'model.safetensors').stat().st_size
+    assert os.path.samefile(directory / 'base-model.safetensors', tm.base_dir / 'model.safetensors')
+    assert_loads_back(directory, base)
+
+
+def test_plan_matches_names_without_wrapper_prefix(tm, base, monkeypatch):
+    finetune = merged_finetune(base, 1)
+    # Without lm_head the unchanged tensors fall just under the default pooling size
+    monkeypatch.setattr(tm, 'DEDUP_MIN_BLOB_BYTES', 0)
+
+    plan = tm.plan_deduplication(finetune.model, BASE_MODEL)
+
+    (group,) = plan['groups'].values()
+    assert 'embed_tokens.weight' in group and 'norm.weight' in group
+    assert not plan['shards']
+
+
+def test_register_keeps_the_lm_head(tm, base):
+    # A CausalLM's `.model` is its headless body; the staged checkpoint must keep lm_head
+    tm.register_finetuned_model(base, Tokenizer(), 'plain', BASE_MODEL, quantization='BF16')
+
+    directory, manifest = staged(tm, 'plain')
+    assert 'linked_bytes' not in manifest
+    assert_loads_back(directory, base)
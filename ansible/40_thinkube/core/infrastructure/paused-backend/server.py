@@ -2,79 +2,285 @@
 """
 Paused backend server for Thinkube services.
 Shows a nice "Resource Optimized" page when services are scaled to zero.
+
+Every paused service routes here, so the server is a single asyncio
+event loop (stdlib only) with HTTP/1.1 keep-alive: thousands of idle or
+held connections cost a few KB each rather than a thread. Pages are
+rendered once per host: an LRU cache keeps the HTML with its gzip (and
+brotli, when available) encodings and an ETag, and browsers revalidate
+with If-None-Match. /healthz and /readyz serve the kubelet probes; on
+SIGTERM readiness fails first and connections are drained.
+
+With WAKE_MODE set, the first request to a paused host also asks
+Kubernetes (scale the matching Deployment/StatefulSet from zero) or
+thinkube-control to start the service. A burst of requests produces a
+single scale call, and the page refreshes itself (or, with
+WAKE_RESPONSE=hold, the request is held) until the service is ready.
+Kubernetes mode only looks in the namespaces listed in WAKE_NAMESPACES,
+which is where wake-rbac.yaml lets the service account scale workloads.
+
+/metrics exposes Prometheus counters, latency histograms and last-access
+times per host, and ACCESS_LOG_SAMPLE_RATE enables sampled JSON access
+logs written from a background thread.
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from collections import OrderedDict
+from http import HTTPStatus
+import asyncio
+import email.utils
+import gzip
+import hashlib
+import html
+import json
+import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
+import signal
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
 
-class PausedHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        # Return 200 OK (not 503) so nginx knows we handled it
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.end_headers()
-        
-        # Extract service name from Host header
-        host = self.headers.get('Host', '')
-        service = host.split('.')[0] if '.' in host else 'service'
-        
-        # Get domain for dashboard link
-        domain = '.'.join(host.split('.')[1:]) if '.' in host else 'thinkube.com'
-        
-        html = f"""<!DOCTYPE html>
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Hosts whose rendered pages are kept in memory
+PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 256))
+
+# Seconds an idle keep-alive connection stays open, and a stalled write may take
+IDLE_TIMEOUT = int(os.environ.get('IDLE_TIMEOUT', 30))
+WRITE_TIMEOUT = int(os.environ.get('WRITE_TIMEOUT', 30))
+
+# Memory use: baseline of the process (interpreter, page cache, assets) and
+# per idle keep-alive connection (measured ~8 KB, padded for headroom)
+BASE_MEMORY_BYTES = 32 * 1024 * 1024
+CONNECTION_MEMORY_BYTES = 10 * 1024
+
+
+def default_max_connections():
+    """Connections that fit in the container memory limit (MEMORY_LIMIT_BYTES), or 10000 without one."""
+    limit = int(os.environ.get('MEMORY_LIMIT_BYTES', 0) or 0)
+    if limit <= 0:
+        return 10000
+    return max(100, (limit - BASE_MEMORY_BYTES) // CONNECTION_MEMORY_BYTES)
+
+
+# Open connections accepted at once; beyond this new connections are closed
+# instead of pushing the pod into an OOM kill
+MAX_CONNECTIONS = int(os.environ.get('MAX_CONNECTIONS', 0)) or default_max_connections()
+
+# Per-connection memory bounds: request head, discarded request body, unsent response data
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+WRITE_BUFFER_BYTES = 64 * 1024
+
+# On SIGTERM: seconds to keep serving with /readyz failing, then to let in-flight requests finish
+SHUTDOWN_DELAY = float(os.environ.get('SHUTDOWN_DELAY', 2))
+SHUTDOWN_GRACE = float(os.environ.get('SHUTDOWN_GRACE', 10))
+
+# Wake-on-request: off, kubernetes (scale workloads from zero) or control (thinkube-control API)
+WAKE_MODE = os.environ.get('WAKE_MODE', 'off')
+
+# refresh: answer at once with a self-refreshing page; hold: keep the request open until
+# ready (or WAKE_HOLD_TIMEOUT), then answer with a page that refreshes almost immediately
+WAKE_RESPONSE = os.environ.get('WAKE_RESPONSE', 'refresh')
+
+# Seconds after a wake request during which further requests do not trigger another one
+WAKE_DEBOUNCE = int(os.environ.get('WAKE_DEBOUNCE', 60))
+
+# Longest a request is held with WAKE_RESPONSE=hold, and the refresh interval of the waking page
+WAKE_HOLD_TIMEOUT = int(os.environ.get('WAKE_HOLD_TIMEOUT', 25))
+WAKE_REFRESH_SECONDS = int(os.environ.get('WAKE_REFRESH_SECONDS', 5))
+
+# Refresh delay once a held request sees the service ready: endpoints and the
+# ingress can lag behind readiness, so the browser retries instead of redirecting
+WAKE_READY_REFRESH_SECONDS = int(os.environ.get('WAKE_READY_REFRESH_SECONDS', 1))
+
+# kubernetes mode: label selector ({service} is the first label of the host) and replicas to start
+WAKE_SELECTOR = os.environ.get('WAKE_SELECTOR', 'app.kubernetes.io/name={service}')
+WAKE_REPLICAS = int(os.environ.get('WAKE_REPLICAS', 1))
+
+# kubernetes mode: comma-separated namespaces of the paused apps (one Role each, see wake-rbac.yaml)
+WAKE_NAMESPACES = [ns.strip() for ns in os.environ.get('WAKE_NAMESPACES', '').split(',') if ns.strip()]
+
+# control mode: thinkube-control endpoints ({service} is the first label of the host)
+WAKE_CONTROL_URL = os.environ.get(
+    'WAKE_CONTROL_URL', 'http://backend.thinkube-control.svc.cluster.local:8000/api/v1/services/{service}/start'
+)
+WAKE_CONTROL_STATUS_URL = os.environ.get('WAKE_CONTROL_STATUS_URL', '')
+WAKE_CONTROL_TOKEN = os.environ.get('WAKE_CONTROL_TOKEN', '')
+
+# Hosts tracked individually in /metrics; further hosts are counted as host="other"
+METRICS_MAX_HOSTS = int(os.environ.get('METRICS_MAX_HOSTS', 200))
+
+# Request latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Fraction of requests written as JSON access log lines (0 disables access logs)
+ACCESS_LOG_SAMPLE_RATE = float(os.environ.get('ACCESS_LOG_SAMPLE_RATE', 0))
+
+SERVICE_ACCOUNT_DIR = '/var/run/secrets/kubernetes.io/serviceaccount'
+
+PAUSED_BADGE = 'Resource Optimized'
+PAUSED_MESSAGE = """This service is currently <strong>paused</strong> to optimize resource allocation
+                            for active development and experiments."""
+PAUSED_HINT = 'Enable this service from the Thinkube Control dashboard when needed.'
+
+WAKING_BADGE = 'Starting'
+WAKING_MESSAGE = """This service was <strong>paused</strong> and is starting up again.
+                            This page reloads automatically when it is ready."""
+WAKING_HINT = 'Starting usually takes a few seconds; large models can take a few minutes.'
+
+# Stylesheet for the page: the Thinkube theme plus the few Tailwind/daisyUI
+# classes it uses. Minified once at startup and inlined, so the page renders
+# in one round-trip with no external fetches (works in air-gapped clusters).
+PAGE_CSS = """
+/* Thinkube theme (daisyUI variable names, HSL components) */
+[data-theme="thinkube"] {
+    --p: 211 100% 50%;
+    --pf: 211 100% 45%;
+    --pc: 0 0% 100%;
+    --s: 158 64% 52%;
+    --sf: 158 64% 47%;
+    --sc: 0 0% 100%;
+    --a: 36 100% 50%;
+    --af: 36 100% 45%;
+    --ac: 0 0% 100%;
+    --n: 217 24% 17%;
+    --nf: 217 24% 12%;
+    --nc: 0 0% 100%;
+    --b1: 229 24% 21%;
+    --b2: 229 24% 17%;
+    --b3: 229 24% 13%;
+    --bc: 0 0% 100%;
+    --in: 198 93% 60%;
+    --inc: 198 100% 12%;
+    --rounded-box: 1rem;
+    --rounded-btn: 0.5rem;
+    --rounded-badge: 1.9rem;
+}
+
+/* Base */
+*, ::before, ::after { box-sizing: border-box; border: 0 solid; }
+html {
+    line-height: 1.5;
+    -webkit-text-size-adjust: 100%;
+    font-family: ui-sans-serif, system-ui, -apple-system, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
+    background-color: hsl(var(--b1));
+    color: hsl(var(--bc));
+}
+body { margin: 0; line-height: inherit; }
+h1, h2, p { margin: 0; font-size: inherit; font-weight: inherit; }
+strong { font-weight: 700; }
+a { color: inherit; text-decoration: inherit; }
+svg { display: block; vertical-align: middle; }
+
+/* Components (the subset of daisyUI the page uses) */
+.hero { display: grid; width: 100%; place-items: center; background-size: cover; background-position: center; }
+.hero-content { z-index: 0; display: flex; align-items: center; justify-content: center; max-width: 80rem; gap: 1rem; padding: 1rem; }
+.card { position: relative; display: flex; flex-direction: column; border-radius: var(--rounded-box); }
+.card-body { display: flex; flex: 1 1 auto; flex-direction: column; padding: 2rem; gap: 0.5rem; }
+.card-title { display: flex; align-items: center; gap: 0.5rem; font-size: 1.25rem; line-height: 1.75rem; font-weight: 600; }
+.card-actions { display: flex; flex-wrap: wrap; align-items: flex-start; gap: 0.5rem; }
+.badge {
+    display: inline-flex; align-items: center; justify-content: center;
+    height: 1.25rem; padding: 0 0.563rem; font-size: 0.875rem; line-height: 1.25rem;
+    border-radius: var(--rounded-badge); border: 1px solid hsl(var(--b2));
+    background-color: hsl(var(--b1)); color: hsl(var(--bc));
+}
+.badge-info { border-color: transparent; background-color: hsl(var(--in)); color: hsl(var(--inc)); }
+.badge-lg { height: 1.5rem; padding: 0 0.688rem; font-size: 1rem; line-height: 1.5rem; }
+.btn {
+    display: inline-flex; flex-shrink: 0; align-items: center; justify-content: center;
+    height: 3rem; min-height: 3rem; padding: 0 1rem; gap: 0.5rem;
+    border-radius: var(--rounded-btn); border: 1px solid transparent;
+    font-size: 0.875rem; font-weight: 600; line-height: 1em; text-align: center;
+    cursor: pointer; user-select: none; transition: background-color 0.2s, transform 0.2s;
+}
+.btn:active { transform: scale(0.97); }
+.btn-primary { background-color: hsl(var(--p)); border-color: hsl(var(--p)); color: hsl(var(--pc)); }
+.btn-primary:hover { background-color: hsl(var(--pf)); border-color: hsl(var(--pf)); }
+
+/* Utilities */
+.min-h-screen { min-height: 100vh; }
+.max-w-2xl { max-width: 42rem; }
+.h-4 { height: 1rem; }
+.w-4 { width: 1rem; }
+.h-5 { height: 1.25rem; }
+.w-5 { width: 1.25rem; }
+.gap-2 { gap: 0.5rem; }
+.justify-center { justify-content: center; }
+.text-center { text-align: center; }
+.mb-4 { margin-bottom: 1rem; }
+.mb-6 { margin-bottom: 1.5rem; }
+.mt-2 { margin-top: 0.5rem; }
+.mt-8 { margin-top: 2rem; }
+.mr-2 { margin-right: 0.5rem; }
+.p-4 { padding: 1rem; }
+.rounded-lg { border-radius: 0.5rem; }
+.bg-base-100 { background-color: hsl(var(--b1)); }
+.bg-base-200 { background-color: hsl(var(--b2)); }
+.bg-base-300 { background-color: hsl(var(--b3)); }
+.shadow-xl { box-shadow: 0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1); }
+.text-5xl { font-size: 3rem; line-height: 1; }
+.text-lg { font-size: 1.125rem; line-height: 1.75rem; }
+.text-sm { font-size: 0.875rem; line-height: 1.25rem; }
+.font-bold { font-weight: 700; }
+.opacity-75 { opacity: 0.75; }
+"""
+
+FAVICON_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="#0a84ff" '
+    'stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M13 10V3L4 14h7v7l9-11h-7z"/></svg>'
+)
+
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
 <html data-theme="thinkube">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{service.replace('-', ' ').title()} - Resource Optimized</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <link href="https://cdn.jsdelivr.net/npm/daisyui@4.4.24/dist/full.min.css" rel="stylesheet" type="text/css" />
-    <style>
-        [data-theme="thinkube"] {{
-            --p: 211 100% 50%;
-            --pf: 211 100% 45%;
-            --pc: 0 0% 100%;
-            --s: 158 64% 52%;
-            --sf: 158 64% 47%;
-            --sc: 0 0% 100%;
-            --a: 36 100% 50%;
-            --af: 36 100% 45%;
-            --ac: 0 0% 100%;
-            --n: 217 24% 17%;
-            --nf: 217 24% 12%;
-            --nc: 0 0% 100%;
-            --b1: 229 24% 21%;
-            --b2: 229 24% 17%;
-            --b3: 229 24% 13%;
-            --bc: 0 0% 100%;
-        }}
-    </style>
+    <title>{title} - {badge}</title>{refresh}
+    <link rel="icon" href="{favicon}">
+    <style>{css}</style>
 </head>
 <body class="min-h-screen bg-base-200">
     <div class="hero min-h-screen">
         <div class="hero-content text-center">
             <div class="max-w-2xl">
-                <h1 class="text-5xl font-bold mb-4">{service.replace('-', ' ').title()}</h1>
-                
+                <h1 class="text-5xl font-bold mb-4">{title}</h1>
+
                 <div class="badge badge-info badge-lg gap-2 mb-6">
                     <svg xmlns="http://www.w3.org/2000/svg" class="h-4 w-4" fill="none" viewBox="0 0 24 24" stroke="currentColor">
                         <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 10V3L4 14h7v7l9-11h-7z" />
                     </svg>
-                    Resource Optimized
+                    {badge}
                 </div>
-                
+
                 <div class="card bg-base-100 shadow-xl mb-6">
                     <div class="card-body">
                         <p class="text-lg">
-                            This service is currently <strong>paused</strong> to optimize resource allocation 
-                            for active development and experiments.
+                            {message}
                         </p>
                         <p class="text-sm opacity-75 mt-2">
-                            Enable this service from the Thinkube Control dashboard when needed.
+                            {hint}
                         </p>
                     </div>
                 </div>
-                
+
                 <div class="card bg-base-100 shadow-xl">
                     <div class="card-body">
                         <h2 class="card-title justify-center">Quick Actions</h2>
@@ -88,11 +294,11 @@ class PausedHandler(BaseHTTPRequestHandler):
                         </div>
                     </div>
                 </div>
-                
+
                 <div class="mt-8 p-4 bg-base-300 rounded-lg">
                     <p class="text-sm opacity-75">
                         <strong>Thinkube Platform</strong><br>
-                        Intelligently manages resources across development environments 
+                        Intelligently manages resources across development environments
                         to ensure optimal performance for active workloads.
                     </p>
                 </div>
@@ -101,20 +307,644 @@ class PausedHandler(BaseHTTPRequestHandler):
     </div>
 </body>
 </html>"""
-        
-        self.wfile.write(html.encode())
-    
-    def do_HEAD(self):
-        # Health check support
+
+
+class Page:
+    """A rendered page with its precomputed encodings and ETag."""
+
+    def __init__(self, body):
+        self.bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body, quality=11)
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+class Asset:
+    """A static file served from memory under a content-hashed, immutable URL."""
+
+    def __init__(self, name, content_type, body):
+        self.content_type = content_type
+        self.page = Page(body)
+        stem, _, suffix = name.rpartition('.')
+        self.path = f"/_paused/{stem}.{self.page.etag.strip(chr(34))[:12]}.{suffix}"
+
+
+STYLESHEET = minify_css(PAGE_CSS)
+FAVICON_URI = 'data:image/svg+xml,' + urllib.parse.quote(FAVICON_SVG)
+
+# Separate asset routes, for clients that fetch the stylesheet or icon directly
+ASSETS = {
+    asset.path: asset for asset in (
+        Asset('style.css', 'text/css; charset=utf-8', STYLESHEET.encode()),
+        Asset('favicon.svg', 'image/svg+xml', FAVICON_SVG.encode()),
+    )
+}
+
+
+def service_name(host):
+    # Extract service name from Host header
+    return host.split('.')[0] if '.' in host else 'service'
+
+
+def render_page(host, waking=False, ready=False):
+    service = service_name(host)
+
+    # Get domain for dashboard link
+    domain = '.'.join(host.split('.')[1:]) if '.' in host else 'thinkube.com'
+
+    # The Host header is client-controlled: escape it before it reaches the HTML
+    return PAGE_TEMPLATE.format(
+        title=html.escape(service.replace('-', ' ').title()),
+        domain=html.escape(domain, quote=True),
+        badge=WAKING_BADGE if waking else PAUSED_BADGE,
+        message=WAKING_MESSAGE if waking else PAUSED_MESSAGE,
+        hint=WAKING_HINT if waking else PAUSED_HINT,
+        refresh=(f'\n    <meta http-equiv="refresh" content="'
+                 f'{WAKE_READY_REFRESH_SECONDS if ready else WAKE_REFRESH_SECONDS}">' if waking else ''),
+        favicon=FAVICON_URI,
+        css=STYLESHEET,
+    ).encode()
+
+
+class PageCache:
+    """Thread-safe LRU of rendered pages keyed by host."""
+
+    def __init__(self, size=PAGE_CACHE_SIZE):
+        self.size = size
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, host, waking=False, ready=False):
+        key = (host, waking, ready)
+        with self.lock:
+            page = self.pages.get(key)
+            if page is not None:
+                self.pages.move_to_end(key)
+                return page
+
+        # Render outside the lock; a concurrent render of the same host is harmless
+        page = Page(render_page(host, waking, ready))
+        with self.lock:
+            self.pages[key] = page
+            if len(self.pages) > self.size:
+                self.pages.popitem(last=False)
+        return page
+
+
+pages = PageCache()
+
+
+class KubernetesWaker:
+    """Scale Deployments and StatefulSets matching WAKE_SELECTOR in WAKE_NAMESPACES up from zero."""
+
+    KINDS = ('deployments', 'statefulsets')
+
+    def __init__(self):
+        if not WAKE_NAMESPACES:
+            raise SystemExit('WAKE_MODE=kubernetes needs WAKE_NAMESPACES (see wake-rbac.yaml)')
+        host = os.environ.get('KUBERNETES_SERVICE_HOST', 'kubernetes.default.svc')
+        port = os.environ.get('KUBERNETES_SERVICE_PORT', '443')
+        self.api = f"https://{host}:{port}"
+        self.context = ssl.create_default_context(cafile=f"{SERVICE_ACCOUNT_DIR}/ca.crt")
+
+    def call(self, method, path, body=None, content_type='application/json'):
+        with open(f"{SERVICE_ACCOUNT_DIR}/token") as f:
+            token = f.read().strip()
+        request = urllib.request.Request(
+            self.api + path,
+            method=method,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers={'Authorization': f'Bearer {token}', 'Content-Type': content_type},
+        )
+        with urllib.request.urlopen(request, context=self.context, timeout=10) as response:
+            return json.load(response)
+
+    def workloads(self, service):
+        selector = urllib.parse.quote(WAKE_SELECTOR.format(service=service))
+        for namespace in WAKE_NAMESPACES:
+            for kind in self.KINDS:
+                path = f"/apis/apps/v1/namespaces/{urllib.parse.quote(namespace)}/{kind}?labelSelector={selector}"
+                for item in self.call('GET', path)['items']:
+                    yield kind, item
+
+    def wake(self, service):
+        for kind, item in self.workloads(service):
+            if item['spec'].get('replicas', 1) == 0:
+                meta = item['metadata']
+                self.call(
+                    'PATCH', f"/apis/apps/v1/namespaces/{meta['namespace']}/{kind}/{meta['name']}/scale",
+                    {'spec': {'replicas': WAKE_REPLICAS}}, 'application/merge-patch+json',
+                )
+                print(f"Scaled {kind}/{meta['namespace']}/{meta['name']} to {WAKE_REPLICAS}", flush=True)
+
+    def is_ready(self, service):
+        workloads = list(self.workloads(service))
+        return bool(workloads) and all(
+            item['status'].get('readyReplicas', 0) >= max(item['spec'].get('replicas', 1), 1)
+            for _, item in workloads
+        )
+
+
+class ControlWaker:
+    """Ask thinkube-control to start the service."""
+
+    def call(self, method, url):
+        headers = {'Authorization': f'Bearer {WAKE_CONTROL_TOKEN}'} if WAKE_CONTROL_TOKEN else {}
+        request = urllib.request.Request(url, method=method, headers=headers)
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.load(response)
+
+    def wake(self, service):
+        self.call('POST', WAKE_CONTROL_URL.format(service=urllib.parse.quote(service)))
+        print(f"Requested start of {service} from thinkube-control", flush=True)
+
+    def is_ready(self, service):
+        # Without a status endpoint readiness is unknown; the page just keeps refreshing
+        if not WAKE_CONTROL_STATUS_URL:
+            return False
+        status = self.call('GET', WAKE_CONTROL_STATUS_URL.format(service=urllib.parse.quote(service)))
+        return bool(status.get('ready') or status.get('is_ready'))
+
+
+class WakeCoordinator:
+    """Debounce wake requests per service and track which services are starting."""
+
+    # Services remembered at once; the Host header is client-controlled
+    MAX_SERVICES = 1024
+
+    def __init__(self, waker):
+        self.waker = waker
+        self.requested = OrderedDict()
+        self.lock = threading.Lock()
+        # One readiness poller per service, shared by all held requests (event loop only)
+        self.pollers = {}
+        self.waiters = {}
+
+    def wake(self, service):
+        """Trigger a wake unless one was requested within WAKE_DEBOUNCE seconds; True if triggered."""
+        now = time.monotonic()
+        with self.lock:
+            last = self.requested.get(service)
+            if last is not None and now - last < WAKE_DEBOUNCE:
+                return False
+            self.requested[service] = now
+            self.requested.move_to_end(service)
+            while len(self.requested) > self.MAX_SERVICES:
+                self.requested.popitem(last=False)
+        threading.Thread(target=self._wake, args=(service,), daemon=True).start()
+        return True
+
+    def _wake(self, service):
+        try:
+            self.waker.wake(service)
+        except Exception as e:
+            print(f"Wake of {service} failed: {e}", flush=True)
+            # Let the next request retry instead of waiting out the debounce window
+            with self.lock:
+                self.requested.pop(service, None)
+
+    async def _poll_ready(self, service):
+        """Check readiness once a second while any request waits for `service`."""
+        try:
+            while self.waiters.get(service):
+                try:
+                    # The wakers use blocking urllib calls: keep them off the event loop
+                    if await asyncio.to_thread(self.waker.is_ready, service):
+                        return True
+                except Exception as e:
+                    print(f"Readiness check of {service} failed: {e}", flush=True)
+                await asyncio.sleep(1)
+            return False
+        finally:
+            self.pollers.pop(service, None)
+
+    async def wait_ready(self, service, timeout):
+        """Wait up to `timeout` seconds for `service` to be ready; True if it is."""
+        self.waiters[service] = self.waiters.get(service, 0) + 1
+        poller = self.pollers.get(service)
+        if poller is None:
+            poller = self.pollers[service] = asyncio.create_task(self._poll_ready(service))
+        try:
+            # shield: one request timing out or disconnecting must not stop the shared poller
+            return await asyncio.wait_for(asyncio.shield(poller), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiters[service] -= 1
+            if not self.waiters[service]:
+                del self.waiters[service]
+
+
+WAKERS = {'kubernetes': KubernetesWaker, 'control': ControlWaker}
+waker = WakeCoordinator(WAKERS[WAKE_MODE]()) if WAKE_MODE in WAKERS else None
+
+
+class HostMetrics:
+    """Request count, latency histogram and last access of one host."""
+
+    def __init__(self):
+        self.requests = {}
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.last_access = 0.0
+        self.wakes = 0
+
+
+class Metrics:
+    """Per-host request metrics in the Prometheus text format."""
+
+    def __init__(self, max_hosts=METRICS_MAX_HOSTS):
+        self.max_hosts = max_hosts
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _host(self, host):
+        # The Host header is client-controlled: bound the label set
+        if host not in self.hosts and len(self.hosts) >= self.max_hosts:
+            host = 'other'
+        return self.hosts.setdefault(host, HostMetrics())
+
+    def observe(self, host, status, duration):
+        with self.lock:
+            metrics = self._host(host)
+            metrics.requests[status] = metrics.requests.get(status, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    metrics.buckets[i] += 1
+                    break
+            metrics.latency_sum += duration
+            metrics.latency_count += 1
+            metrics.last_access = time.time()
+
+    def wake(self, host):
+        with self.lock:
+            self._host(host).wakes += 1
+
+    def render(self):
+        lines = [
+            '# HELP paused_backend_requests_total Requests served for paused hosts.',
+            '# TYPE paused_backend_requests_total counter',
+        ]
+        with self.lock:
+            hosts = sorted(self.hosts.items())
+            for host, m in hosts:
+                for status, count in sorted(m.requests.items()):
+                    lines.append(f'paused_backend_requests_total{{host="{host}",code="{status}"}} {count}')
+
+            lines += [
+                '# HELP paused_backend_request_duration_seconds Time to answer a request.',
+                '# TYPE paused_backend_request_duration_seconds histogram',
+            ]
+            for host, m in hosts:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+                    cumulative += count
+                    lines.append(f'paused_backend_request_duration_seconds_bucket{{host="{host}",le="{bound}"}} {cumulative}')
+                lines.append(f'paused_backend_request_duration_seconds_bucket{{host="{host}",le="+Inf"}} {m.latency_count}')
+                lines.append(f'paused_backend_request_duration_seconds_sum{{host="{host}"}} {m.latency_sum:.6f}')
+                lines.append(f'paused_backend_request_duration_seconds_count{{host="{host}"}} {m.latency_count}')
+
+            lines += [
+                '# HELP paused_backend_last_access_timestamp_seconds Unix time of the last request for a host.',
+                '# TYPE paused_backend_last_access_timestamp_seconds gauge',
+            ]
+            lines += [f'paused_backend_last_access_timestamp_seconds{{host="{host}"}} {m.last_access:.3f}'
+                      for host, m in hosts]
+
+            lines += [
+                '# HELP paused_backend_wake_requests_total Requests that triggered a wake (debounced).',
+                '# TYPE paused_backend_wake_requests_total counter',
+            ]
+            lines += [f'paused_backend_wake_requests_total{{host="{host}"}} {m.wakes}'
+                      for host, m in hosts if m.wakes]
+        return ('\n'.join(lines) + '\n').encode()
+
+
+metrics = Metrics()
+
+
+def metric_host(host):
+    """Normalise a Host header into a safe label value."""
+    return host if re.fullmatch(r'[a-z0-9][a-z0-9.-]{0,252}', host) else 'invalid'
+
+
+def is_direct(host):
+    """True for requests addressed to the pod itself (probes, Prometheus), not via ingress."""
+    return host in ('', 'localhost') or host.replace('.', '').isdigit()
+
+
+def start_access_log():
+    """Route sampled access log lines through a queue so requests never block on stdout."""
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger('paused_backend.access')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+    return logger
+
+
+access_log = start_access_log() if ACCESS_LOG_SAMPLE_RATE > 0 else None
+
+
+def choose_encoding(accept_encoding, available):
+    """Pick br, then gzip, from an Accept-Encoding header; identity otherwise."""
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip())
+    for encoding in ('br', 'gzip'):
+        if encoding in available and (encoding in accepted or '*' in accepted):
+            return encoding
+    return 'identity'
+
+
+def etag_matches(if_none_match, etag):
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+class PausedHandler:
+    """Answer one parsed request; transport-independent, used by the asyncio server below."""
+
+    def __init__(self, method, target, headers):
+        self.command = method
+        self.path = target
+        self.headers = headers  # lower-case names
+        self.status = 0
+        self.response_headers = []
+        self.body = b''
+        self.include_body = True
+
+    def send_response(self, code):
+        self.status = code
+
+    def send_header(self, name, value):
+        self.response_headers.append((name, value))
+
+    async def send_page(self, include_body):
+        host = self.headers.get('host', '').split(':')[0].lower()
+
+        # Kubelet probes (Host is the pod IP) must not wake anything
+        waking = (waker is not None and include_body and '.' in host and not is_direct(host)
+                  and not self.headers.get('user-agent', '').startswith('kube-probe/'))
+        if waking:
+            service = service_name(host)
+            if waker.wake(service):
+                metrics.wake(metric_host(host))
+            ready = WAKE_RESPONSE == 'hold' and await waker.wait_ready(service, WAKE_HOLD_TIMEOUT)
+            # Ready: reload shortly rather than redirect, which would loop while
+            # endpoints and the ingress still route here
+            self.send_header('Retry-After', str(WAKE_READY_REFRESH_SECONDS if ready else WAKE_REFRESH_SECONDS))
+            self.send_body(pages.get(host, True, ready), 'text/html; charset=utf-8', 'no-store', include_body)
+            return
+
+        # Revalidate every time: the service may have been resumed since
+        self.send_body(pages.get(host), 'text/html; charset=utf-8', 'no-cache', include_body)
+
+    def send_asset(self, asset, include_body):
+        # The URL changes with the content, so clients may keep it forever
+        self.send_body(asset.page, asset.content_type, 'public, max-age=31536000, immutable', include_body)
+
+    def send_body(self, page, content_type, cache_control, include_body):
+        if etag_matches(self.headers.get('if-none-match', ''), page.etag):
+            self.send_response(304)
+            self.send_header('ETag', page.etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            return
+
+        encoding = choose_encoding(self.headers.get('accept-encoding', ''), page.bodies)
+
+        # Return 200 OK (not 503) so nginx knows we handled it
         self.send_response(200)
-        self.end_headers()
-    
-    def log_message(self, format, *args):
-        # Suppress logs for cleaner output (optional: can enable for debugging)
+        self.send_header('Content-Type', content_type)
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', page.etag)
+        self.send_header('Cache-Control', cache_control)
+        self.send_text(page.bodies[encoding], include_body)
+
+    def send_text(self, body, include_body):
+        # Content-Length is sent for HEAD too, so the body is only dropped at write time
+        self.body = body
+        self.include_body = include_body
+
+    def send_metrics(self, include_body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_text(metrics.render(), include_body)
+
+    def send_health(self, ok, include_body):
+        self.send_response(200 if ok else 503)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_text(b'ok\n' if ok else b'draining\n', include_body)
+
+    async def handle_request(self, include_body):
+        start = time.perf_counter()
+        host = self.headers.get('host', '').split(':')[0].lower()
+        path = self.path.split('?')[0]
+
+        # Only served to direct (pod IP) requests, so ingress users cannot list paused hosts
+        if is_direct(host) and path in ('/metrics', '/healthz', '/readyz'):
+            if path == '/metrics':
+                self.send_metrics(include_body)
+            else:
+                # Liveness only needs the event loop to answer; readiness fails while draining
+                self.send_health(path == '/healthz' or not server_state.draining, include_body)
+            return
+
+        asset = ASSETS.get(path)
+        if asset is not None:
+            self.send_asset(asset, include_body)
+        else:
+            await self.send_page(include_body)
+
+        if is_direct(host):
+            return
+        duration = time.perf_counter() - start
+        metrics.observe(metric_host(host), self.status, duration)
+        if access_log is not None and random.random() < ACCESS_LOG_SAMPLE_RATE:
+            access_log.info(json.dumps({
+                'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'host': metric_host(host),
+                'method': self.command,
+                'path': path[:256],
+                'status': self.status,
+                'duration_ms': round(duration * 1000, 3),
+                'user_agent': self.headers.get('user-agent', '')[:256],
+                'sample_rate': ACCESS_LOG_SAMPLE_RATE,
+            }))
+
+    async def respond(self):
+        if self.command == 'GET':
+            await self.handle_request(include_body=True)
+        elif self.command == 'HEAD':
+            # Health check support
+            await self.handle_request(include_body=False)
+        else:
+            self.send_response(405)
+            self.send_header('Allow', 'GET, HEAD')
+
+
+class HTTPError(Exception):
+    """A request that is answered with an error status and then closed."""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class ServerState:
+    """Open connections and the draining flag used for graceful shutdown."""
+
+    def __init__(self):
+        self.draining = False
+        self.connections = {}  # task -> True while a request is being answered
+
+    def idle_tasks(self):
+        return [task for task, busy in self.connections.items() if not busy]
+
+
+server_state = ServerState()
+
+
+async def read_request(reader):
+    """Read a request head; None when the client closed an idle connection."""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HTTPError(400)
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431)
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HTTPError(400)
+    if not version.startswith('HTTP/1.'):
+        raise HTTPError(505)
+
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise HTTPError(400)
+        headers[name.strip().lower()] = value.strip()
+
+    # GET/HEAD bodies are meaningless here: discard small ones, refuse the rest
+    if 'transfer-encoding' in headers:
+        raise HTTPError(411)
+    length = headers.get('content-length', '0')
+    if not length.isdigit() or int(length) > MAX_BODY_BYTES:
+        raise HTTPError(413)
+    if int(length):
+        await asyncio.wait_for(reader.readexactly(int(length)), IDLE_TIMEOUT)
+
+    return method, target, version, headers
+
+
+def http_date():
+    return email.utils.formatdate(usegmt=True)
+
+
+async def write_response(writer, handler, keep_alive):
+    lines = [
+        f"HTTP/1.1 {handler.status} {HTTPStatus(handler.status).phrase}",
+        f"Date: {http_date()}",
+        *(f"{name}: {value}" for name, value in handler.response_headers),
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if handler.status != 304:
+        lines.append(f"Content-Length: {len(handler.body)}")
+    body = handler.body if handler.include_body else b''
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    # Bounded by the transport's write buffer limits; a stalled reader is dropped
+    await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+
+
+async def handle_connection(reader, writer):
+    task = asyncio.current_task()
+    if len(server_state.connections) >= MAX_CONNECTIONS:
+        writer.close()
+        return
+    server_state.connections[task] = False
+    writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_BYTES)
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except HTTPError as e:
+                handler = PausedHandler('GET', '/', {})
+                handler.send_response(e.status)
+                await write_response(writer, handler, keep_alive=False)
+                break
+            if request is None:
+                break
+
+            server_state.connections[task] = True
+            method, target, version, headers = request
+            connection = headers.get('connection', '').lower()
+            keep_alive = not server_state.draining and (
+                connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+            )
+            handler = PausedHandler(method, target, headers)
+            await handler.respond()
+            await write_response(writer, handler, keep_alive)
+            server_state.connections[task] = False
+            if not keep_alive:
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    except asyncio.CancelledError:
         pass
+    finally:
+        server_state.connections.pop(task, None)
+        writer.close()
+
+
+async def serve(port):
+    server = await asyncio.start_server(
+        handle_connection, '0.0.0.0', port, limit=MAX_HEADER_BYTES, backlog=1024
+    )
+    print(f"Paused backend server listening on port {port}", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    # Fail readiness first so endpoints are updated, then stop accepting and let
+    # in-flight requests finish; idle keep-alive connections are closed at once
+    print("Shutting down: draining connections", flush=True)
+    server_state.draining = True
+    await asyncio.sleep(SHUTDOWN_DELAY)
+    server.close()
+    for task in server_state.idle_tasks():
+        task.cancel()
+    if server_state.connections:
+        await asyncio.wait(list(server_state.connections), timeout=SHUTDOWN_GRACE)
+    for task in list(server_state.connections):
+        task.cancel()
+    await server.wait_closed()
+    print("Shutdown complete", flush=True)
+
 
 if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 8080))
-    print(f"Paused backend server listening on port {port}")
-    server = HTTPServer(('0.0.0.0', port), PausedHandler)
-    server.serve_forever()
\ No newline at end of file
+    asyncio.run(serve(int(os.environ.get('PORT', 8080))))
@@ -41,6 +41,9 @@ echo "Version: $VERSION"
 echo "=============================================="
 
 BUILD_DIR="/tmp/venvs-build"
+
+# Capability manifest generator shipped in tk-jupyter-base
+MANIFEST_GENERATOR="/opt/thinkube/generate_capability_manifest.py"
 OUTPUT_DIR="${OUTPUT_DIR:-/output}"
 mkdir -p "$BUILD_DIR" "$OUTPUT_DIR"
 
@@ -161,6 +164,14 @@ package_venv() {
   # Fix the pyvenv.cfg to use relative paths
   sed -i "s|^home = .*|home = /home/thinkube/venvs/$ARCH_DIR/$name|" "$venv_path/pyvenv.cfg"
 
+  # Record installed packages and hardware features for check_jupyter_flavor
+  # (written under the venv prefix, so it moves with the venv)
+  if [ -f "$MANIFEST_GENERATOR" ]; then
+    "$venv_path/bin/python" "$MANIFEST_GENERATOR" --flavor "$name"
+  else
+    echo "Warning: $MANIFEST_GENERATOR not found, skipping capability manifest"
+  fi
+
   # Register as Jupyter kernel (kernel.json will be inside the venv)
   "$venv_path/bin/python" -m ipykernel install \
     --prefix="$venv_path" \
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the paused backend.
+
+Starts ansible/40_thinkube/core/infrastructure/paused-backend/server.py
+on a free local port (or targets --url) and drives it from keep-alive
+client threads, each request using a Host header picked from a pool of
+paused-service names. Prints requests per second and latency
+percentiles.
+
+Exit codes:
+  0 — benchmark completed without failed requests
+  1 — some requests failed
+
+Usage:
+  scripts/benchmark_paused_backend.py [--concurrency 32] [--duration 10] [--hosts 50] [--url URL]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import socket
+from pathlib import Path
+from urllib.parse import urlparse
+
+SERVER = (Path(__file__).resolve().parent.parent
+          / "ansible/40_thinkube/core/infrastructure/paused-backend/server.py")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, str(SERVER)], env={**os.environ, "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("paused backend did not start")
+
+
+def worker(host: str, port: int, hosts: list[str], deadline: float, encoding: str,
+           latencies: list[float], failures: list[int], offset: int):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    i = offset
+    while time.monotonic() < deadline:
+        headers = {"Host": hosts[i % len(hosts)], "Accept-Encoding": encoding}
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", "/", headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                failures.append(response.status)
+            if response.getheader("Connection", "").lower() == "close":
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            failures.append(0)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Load benchmark for the paused backend")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--hosts", type=int, default=50, help="Distinct paused-service hosts")
+    parser.add_argument("--encoding", default="gzip, br", help="Accept-Encoding sent by clients")
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead")
+    args = parser.parse_args(argv[1:])
+
+    process = None
+    if args.url:
+        target = urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        process = start_server(port)
+
+    hosts = [f"service-{i}.thinkube.com" for i in range(args.hosts)]
+    results = [([], []) for _ in range(args.concurrency)]
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(host, port, hosts, deadline, args.encoding, *result, i))
+        for i, result in enumerate(results)
+    ]
+    try:
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    failures = [status for result in results for status in result[1]]
+    if not latencies:
+        print("✗ No successful requests", file=sys.stderr)
+        return 1
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    print(f"Requests:     {len(latencies)} ok, {len(failures)} failed "
+          f"({args.concurrency} connections, {args.hosts} hosts, {elapsed:.1f}s)")
+    print(f"Throughput:   {len(latencies) / elapsed:.0f} req/s")
+    print(f"Latency (ms): p50 {percentile(0.50):.2f}  p90 {percentile(0.90):.2f}  "
+          f"p99 {percentile(0.99):.2f}  mean {statistics.mean(latencies) * 1000:.2f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
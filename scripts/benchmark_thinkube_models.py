@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Benchmark: run the thinkube_models pipeline end to end on CPU.
+
+Loads a tiny Llama-style model through MLflow resolution, runs a
+calibration pass, exports it to staging and registers it, with MLflow,
+Keycloak and thinkube-control replaced by an in-process stub server.
+Every run is recorded with profile_pipeline(); per-stage medians are
+printed and the full profiles written as JSON, so timings can be
+compared across base image rebuilds.
+
+Needs torch, transformers and tokenizers (the jupyter image has them).
+Nothing outside a temporary directory is touched: HOME is pointed at it
+before thinkube_models is imported, and it is removed when the run ends.
+
+Exit codes:
+  0 — benchmark completed
+  1 — a pipeline stage failed
+
+Usage:
+  scripts/benchmark_thinkube_models.py [--runs N] [--quantization BF16] [--output bench.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODULE_DIR = REPO_ROOT / "ansible/40_thinkube/core/harbor-images/base-images/files"
+
+MODEL_ID = "thinkube/bench-tiny-llama"
+EXPERIMENT_ID = "1"
+RUN_ID = "bench0000000000000000000000000000"
+CALIBRATION_TEXTS = [f"calibration sample {i} " * (4 + i % 16) for i in range(64)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal MLflow, Keycloak and thinkube-control endpoints used by the pipeline."""
+
+    protocol_version = "HTTP/1.1"
+    logged_metrics: list = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/model-versions/search"):
+            return self._send({"model_versions": [
+                {"name": MODEL_ID.replace("/", "-"), "version": "1", "run_id": RUN_ID},
+            ]})
+        if url.path.endswith("/runs/get"):
+            run_id = parse_qs(url.query)["run_id"][0]
+            return self._send({"run": {"info": {"run_id": run_id, "experiment_id": EXPERIMENT_ID}}})
+        if "/models/mirrors/" in url.path:
+            return self._send({"is_complete": True, "is_failed": False,
+                               "status": "Succeeded", "model_id": url.path.rsplit("/", 1)[-1]})
+        self._send({"error": "not found"}, 404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if url.path.endswith("/token"):
+            return self._send({"access_token": "bench", "expires_in": 300})
+        if url.path.endswith("/models/register"):
+            name = json.loads(body)["name"]
+            return self._send({"job_id": f"job-{name}", "workflow_id": f"wf-{name}",
+                               "status": "Pending", "message": "submitted"})
+        if url.path.endswith("/runs/log-batch"):
+            StubHandler.logged_metrics.extend(json.loads(body)["metrics"])
+            return self._send({})
+        self._send({"error": "not found"}, 404)
+
+
+def start_stub_server() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def build_tiny_model(model_dir: Path):
+    """Write a randomly initialised tiny Llama model and a word-level tokenizer."""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    vocab = {"<pad>": 0, "<unk>": 1, "<s>": 2, "</s>": 3}
+    for text in CALIBRATION_TEXTS:
+        for word in text.split():
+            vocab.setdefault(word, len(vocab))
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="<pad>", unk_token="<unk>",
+        bos_token="<s>", eos_token="</s>",
+    ).save_pretrained(model_dir)
+
+    config = LlamaConfig(
+        vocab_size=len(vocab), hidden_size=256, intermediate_size=512,
+        num_hidden_layers=4, num_attention_heads=4, num_key_value_heads=4,
+        max_position_embeddings=512, pad_token_id=0, bos_token_id=2, eos_token_id=3,
+    )
+    LlamaForCausalLM(config).save_pretrained(model_dir)
+
+
+def run_pipeline(tm, quantization: str, run: int):
+    with tm.profile_pipeline() as profile:
+        # Each run starts cold: fresh tokens and a fresh MLflow resolution
+        tm.get_client().invalidate_tokens()
+        tm.invalidate_model_index()
+
+        model, tokenizer = tm.load_model_for_finetuning(MODEL_ID, device_map="cpu", refresh=True)
+        calibration = tm.prepare_calibration(tokenizer, CALIBRATION_TEXTS, num_samples=64)
+        calibration(model)
+        result = tm.register_finetuned_model(
+            model, tokenizer, f"bench-run-{run}", MODEL_ID,
+            quantization=quantization, calib_data=CALIBRATION_TEXTS, num_calib_samples=64,
+        )
+        tm.wait_for_registration(result["workflow_id"], poll_interval=0.01)
+    return profile
+
+
+def run_benchmark(args, workdir: Path) -> int:
+    url = start_stub_server()
+    os.environ.update({
+        "HOME": str(workdir),
+        "XDG_CACHE_HOME": str(workdir / ".cache"),
+        "THINKUBE_MODEL_CACHE_DIR": str(workdir / "local-models"),
+        "MLFLOW_TRACKING_URI": url,
+        "MLFLOW_KEYCLOAK_TOKEN_URL": f"{url}/token",
+        "MLFLOW_AUTH_USERNAME": "bench",
+        "THINKUBE_CONTROL_URL": url,
+        "THINKUBE_CONTROL_TOKEN": "bench",
+    })
+
+    model_dir = workdir / "thinkube/mlflow/artifacts" / EXPERIMENT_ID / RUN_ID / "artifacts/model"
+    model_dir.mkdir(parents=True)
+    build_tiny_model(model_dir)
+
+    sys.path.insert(0, str(MODULE_DIR))
+    import thinkube_models as tm
+
+    profiles = []
+    try:
+        for run in range(args.runs):
+            print(f"=== Run {run + 1}/{args.runs} ===")
+            profiles.append(run_pipeline(tm, args.quantization, run))
+        profiles[-1].log_to_mlflow(RUN_ID)
+    except Exception as e:
+        print(f"✗ Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+    print()
+    print(f"Per-stage median over {len(profiles)} runs:")
+    stages = {stage for profile in profiles for stage in profile.stages()}
+    medians = {
+        stage: statistics.median(p.stages().get(stage, {}).get("wall_s", 0.0) for p in profiles)
+        for stage in stages
+    }
+    for stage, wall_s in sorted(medians.items(), key=lambda item: -item[1]):
+        print(f"  {stage:24s} {wall_s * 1000:10.1f} ms")
+    print(f"  {'total':24s} {statistics.median(p.total_s for p in profiles) * 1000:10.1f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "quantization": args.quantization,
+            "median_wall_s": medians,
+            "runs": [profile.to_dict() for profile in profiles],
+        }, indent=2, default=str))
+        print(f"✓ Profiles written to {args.output}")
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the thinkube_models pipeline on CPU")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--quantization", default="BF16",
+                        help="Export format (formats other than BF16 need modelopt)")
+    parser.add_argument("--output", type=Path, default=None, help="Write all profiles as JSON")
+    args = parser.parse_args(argv[1:])
+
+    workdir = Path(tempfile.mkdtemp(prefix="thinkube-bench-"))
+    try:
+        return run_benchmark(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
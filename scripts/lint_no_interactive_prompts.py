@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
-Quality lint: fail if any Ansible playbook contains an interactive
-`pause:` (a `prompt:` without a `seconds:` or `minutes:` timer).
+Quality lint for Ansible playbooks. By default it fails if any playbook
+contains an interactive `pause:` (a `prompt:` without a `seconds:` or
+`minutes:` timer).
 
 Thinkube playbooks are designed to be orchestrated by the installer or
 thinkube-control. Neither can respond to ansible pause prompts —
@@ -9,19 +10,47 @@ interactive prompts deadlock the orchestrator. When a destructive flow
 needs a safety gate, use the required-extra-var pattern with
 `ansible.builtin.assert` instead.
 
+Each file is read and parsed once (PyYAML node tree, so findings keep
+their line numbers) and the parsed file is handed to every registered
+rule; files PyYAML cannot parse fall back to the regex rules. Rules:
+
+  interactive-pause      (error)    pause with a prompt and no timer
+  unbounded-until        (warning)  until/retries wait longer than --max-wait
+  command-changed-when   (warning)  command/shell/raw task without changed_when
+  pull-failed-when-false (warning)  image/git pull with failed_when: false
+
+Results for all rules are cached per file (keyed by mtime, size and
+content hash) in .lint_cache/ at the repository root, so repeated runs
+from any directory only rescan files that changed. Files that do need scanning are spread over a process pool
+when there are enough of them to pay for the workers.
+
 Exit codes:
-  0 — no interactive prompts found
-  1 — one or more interactive prompts found (paths printed to stderr)
+  0 — no error-level findings (warnings too, with --strict)
+  1 — one or more error-level findings (paths printed to stderr)
+  2 — a path, rule or git revision could not be resolved
 
 Usage:
   scripts/lint_no_interactive_prompts.py [path ...]    # default: ansible/
+  scripts/lint_no_interactive_prompts.py --changed-since origin/main
+  scripts/lint_no_interactive_prompts.py --rule all --format sarif > lint.sarif
+  scripts/lint_no_interactive_prompts.py --rule unbounded-until --timings
 """
 from __future__ import annotations
 
+import argparse
+import bisect
+import hashlib
+import json
 import os
 import re
+import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
 from pathlib import Path
+from typing import Callable, Iterator
 
 # Matches every `pause:` block, with or without a preceding `- name:` and
 # with or without the `ansible.builtin.` collection prefix. Captures the
@@ -35,6 +64,312 @@ PAUSE_RE = re.compile(
 TIMER_RE = re.compile(r"^\s*(?:seconds|minutes):", re.MULTILINE)
 PROMPT_RE = re.compile(r"^\s*prompt:", re.MULTILINE)
 
+# Shell commands that pull an image, chart or repository
+PULL_COMMAND_RE = re.compile(
+    r"\b(?:podman|docker|nerdctl|crictl|ctr|buildah|skopeo|git|helm)\b[^\n;|&]*\bpull\b"
+)
+
+# Per-file result cache, in .lint_cache/ at the repository root unless LINT_CACHE_DIR is set
+CACHE_NAME = "no_interactive_prompts.json"
+
+# Cached results are only valid for the rules they were produced by
+CACHE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+# Below this many files to scan, worker start-up costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+# Directories never descended into
+SKIP_DIRS = {"node_modules"}
+
+# Rules run when --rule is not given
+DEFAULT_RULES = ["interactive-pause"]
+
+# Longest acceptable until/retries wait (retries x delay), in seconds
+MAX_WAIT_SECONDS = 3600
+
+# Ansible's delay between until retries when `delay:` is not set
+DEFAULT_UNTIL_DELAY = 5
+
+# Play and block keys whose values are task lists
+TASK_LIST_KEYS = ("pre_tasks", "tasks", "post_tasks", "handlers", "block", "rescue", "always")
+
+COMMAND_MODULES = {
+    "command", "shell", "raw",
+    "ansible.builtin.command", "ansible.builtin.shell", "ansible.builtin.raw",
+}
+PULL_MODULES = {
+    "git", "ansible.builtin.git",
+    "podman_image", "containers.podman.podman_image",
+    "docker_image", "community.docker.docker_image",
+    "docker_image_pull", "community.docker.docker_image_pull",
+}
+FALSE_VALUES = {"false", "no", "off"}
+
+
+# =============================================================================
+# Parsed files
+# =============================================================================
+
+def line_index(content: str) -> list[int]:
+    """Return the offset of every newline in `content`, for line lookups."""
+    offsets = []
+    position = content.find("\n")
+    while position != -1:
+        offsets.append(position)
+        position = content.find("\n", position + 1)
+    return offsets
+
+
+def line_number(index: list[int], offset: int) -> int:
+    """1-based line number of `offset`, given the `line_index()` of its file."""
+    return bisect.bisect_left(index, offset) + 1
+
+
+class Task:
+    """A task mapping from the YAML node tree, with its keys by name."""
+
+    def __init__(self, node):
+        self.node = node
+        self.line = node.start_mark.line + 1
+        self.keys = {key.value: value for key, value in node.value
+                     if getattr(key, "tag", "").endswith(":str")}
+
+    def module(self, names) -> tuple[str, object] | tuple[None, None]:
+        """Return the first of `names` used as a key, with its value node."""
+        for name in names:
+            if name in self.keys:
+                return name, self.keys[name]
+        return None, None
+
+    def scalar(self, key: str) -> str | None:
+        node = self.keys.get(key)
+        return node.value if node is not None and isinstance(node.value, str) else None
+
+
+class Source:
+    """One playbook or task file, read and parsed once for all rules."""
+
+    def __init__(self, path: str, text: str, max_wait: int = MAX_WAIT_SECONDS):
+        self.path = path
+        self.text = text
+        # Rule options travel with the source, so pool workers never rely on module globals
+        self.max_wait = max_wait
+        self._index = None
+        self._tasks = None
+        self.documents = self._compose()
+
+    @property
+    def parsed(self) -> bool:
+        return self.documents is not None
+
+    @property
+    def index(self) -> list[int]:
+        if self._index is None:
+            self._index = line_index(self.text)
+        return self._index
+
+    def line(self, offset: int) -> int:
+        return line_number(self.index, offset)
+
+    def _compose(self):
+        try:
+            import yaml
+        except ImportError:
+            return None
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        try:
+            return [doc for doc in yaml.compose_all(self.text, Loader=loader) if doc is not None]
+        except yaml.YAMLError:
+            return None
+
+    @property
+    def tasks(self) -> list[Task]:
+        """Every task in the file: top-level tasks and those inside plays and blocks."""
+        if self._tasks is None:
+            self._tasks = []
+            for document in self.documents or ():
+                self._collect(document)
+        return self._tasks
+
+    def _collect(self, node):
+        if node.id != "sequence":
+            return
+        for item in node.value:
+            if item.id != "mapping":
+                continue
+            task = Task(item)
+            is_play = "hosts" in task.keys or "import_playbook" in task.keys
+            if not is_play:
+                self._tasks.append(task)
+            for key in TASK_LIST_KEYS:
+                if key in task.keys:
+                    self._collect(task.keys[key])
+
+
+# =============================================================================
+# Rules
+# =============================================================================
+
+@dataclass(frozen=True)
+class Finding:
+    rule: str
+    line: int
+    message: str
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    level: str
+    description: str
+    check: Callable[[Source], Iterator[tuple[int, str]]]
+    fallback: Callable[[Source], Iterator[tuple[int, str]]] | None = None
+
+
+# All registered rules, in registration order
+RULES: dict[str, Rule] = {}
+
+
+def rule(rule_id: str, level: str, description: str, fallback=None):
+    """Register a rule.
+
+    The decorated function receives a parsed Source and yields
+    (line, message) pairs. `fallback`, if given, is run instead on files
+    PyYAML cannot parse; rules without one skip those files.
+
+    Example:
+        @rule("no-debug", "warning", "debug task left in a playbook")
+        def no_debug(source):
+            for task in source.tasks:
+                if "debug" in task.keys:
+                    yield task.line, "debug task"
+    """
+    def register(check):
+        RULES[rule_id] = Rule(rule_id, level, description, check, fallback)
+        return check
+    return register
+
+
+def _pause_regex(source: Source) -> Iterator[tuple[int, str]]:
+    if "pause:" not in source.text:
+        return
+    for m in PAUSE_RE.finditer(source.text):
+        body = m.group("body")
+        if PROMPT_RE.search(body) and not TIMER_RE.search(body):
+            yield source.line(m.start()), "pause with a prompt and no seconds/minutes timer"
+
+
+@rule("interactive-pause", "error", "Interactive pause: prompt without a timer",
+      fallback=_pause_regex)
+def interactive_pause(source: Source) -> Iterator[tuple[int, str]]:
+    if "pause" not in source.text:
+        return
+    for task in source.tasks:
+        _, args = task.module(("pause", "ansible.builtin.pause"))
+        if args is None or args.id != "mapping":
+            continue
+        keys = {key.value for key, _ in args.value}
+        if "prompt" in keys and not keys & {"seconds", "minutes"}:
+            yield task.line, "pause with a prompt and no seconds/minutes timer"
+
+
+@rule("unbounded-until", "warning", "until/retries wait longer than the wait budget")
+def unbounded_until(source: Source) -> Iterator[tuple[int, str]]:
+    if "until" not in source.text:
+        return
+    for task in source.tasks:
+        if "until" not in task.keys:
+            continue
+        retries, delay = task.scalar("retries"), task.scalar("delay")
+        # Templated values cannot be bounded statically
+        if retries is None or not retries.isdigit():
+            continue
+        if delay is not None and not delay.isdigit():
+            continue
+        wait = int(retries) * int(delay if delay is not None else DEFAULT_UNTIL_DELAY)
+        if wait > source.max_wait:
+            yield task.line, (f"until loop may wait {wait}s (retries {retries} x delay "
+                              f"{delay or DEFAULT_UNTIL_DELAY}), budget is {source.max_wait}s")
+
+
+@rule("command-changed-when", "warning", "command/shell/raw task without changed_when")
+def command_changed_when(source: Source) -> Iterator[tuple[int, str]]:
+    for task in source.tasks:
+        name, args = task.module(COMMAND_MODULES)
+        if name is None or "changed_when" in task.keys:
+            continue
+        argument_keys = set()
+        for node in (args, task.keys.get("args")):
+            if node is not None and node.id == "mapping":
+                argument_keys.update(key.value for key, _ in node.value)
+        text = args.value if isinstance(args.value, str) else ""
+        # creates/removes make the task idempotent, and so is its change status
+        if argument_keys & {"creates", "removes"} or re.search(r"\b(?:creates|removes)=", text):
+            continue
+        yield task.line, f"{name} task without changed_when"
+
+
+def _pull_command(task: Task) -> str | None:
+    name, args = task.module(PULL_MODULES)
+    if name is not None:
+        return name
+    name, args = task.module(COMMAND_MODULES)
+    if name is None:
+        return None
+    if args.id == "mapping":
+        args = dict((key.value, value) for key, value in args.value).get("cmd", args)
+    if isinstance(args.value, str) and PULL_COMMAND_RE.search(args.value):
+        return name
+    return None
+
+
+@rule("pull-failed-when-false", "warning", "Pull task with failed_when: false")
+def pull_failed_when_false(source: Source) -> Iterator[tuple[int, str]]:
+    if "failed_when" not in source.text:
+        return
+    for task in source.tasks:
+        failed_when = task.scalar("failed_when")
+        if failed_when is None or failed_when.strip().lower() not in FALSE_VALUES:
+            continue
+        module = _pull_command(task)
+        if module:
+            yield task.line, f"{module} pull with failed_when: false hides pull failures"
+
+
+# =============================================================================
+# Scanning
+# =============================================================================
+
+def lint_content(path: str, content: str,
+                 max_wait: int = MAX_WAIT_SECONDS) -> tuple[list[Finding], dict[str, float], bool]:
+    """Run every registered rule over one file.
+
+    Returns:
+        Findings sorted by line, seconds spent per rule (plus "parse"),
+        and whether the file parsed as YAML.
+    """
+    timings = {}
+    start = time.perf_counter()
+    source = Source(path, content, max_wait)
+    timings["parse"] = time.perf_counter() - start
+
+    findings = []
+    for rule_id, registered in RULES.items():
+        check = registered.check if source.parsed else registered.fallback
+        if check is None:
+            continue
+        start = time.perf_counter()
+        findings.extend(Finding(rule_id, line, message) for line, message in check(source))
+        timings[rule_id] = time.perf_counter() - start
+    findings.sort(key=lambda finding: (finding.line, finding.rule))
+    return findings, timings, source.parsed
+
+
+def scan_content(content: str) -> list[int]:
+    """Return line numbers of interactive pauses in YAML text."""
+    findings, _, _ = lint_content("<string>", content)
+    return [finding.line for finding in findings if finding.rule == "interactive-pause"]
+
 
 def scan_file(path: Path) -> list[int]:
     """Return line numbers of interactive pauses in `path`."""
@@ -42,66 +377,345 @@ def scan_file(path: Path) -> list[int]:
         content = path.read_text(encoding="utf-8", errors="replace")
     except (OSError, UnicodeDecodeError):
         return []
+    return scan_content(content)
 
-    offenders: list[int] = []
-    for m in PAUSE_RE.finditer(content):
-        body = m.group("body")
-        has_timer = bool(TIMER_RE.search(body))
-        has_prompt = bool(PROMPT_RE.search(body))
-        if has_prompt and not has_timer:
-            line_no = content[: m.start()].count("\n") + 1
-            offenders.append(line_no)
-    return offenders
 
+def _lint_bytes(path: str, data: bytes,
+                max_wait: int = MAX_WAIT_SECONDS) -> tuple[str, list[dict], dict[str, float], bool]:
+    """Worker entry point: lint already-read file contents."""
+    findings, timings, parsed = lint_content(path, data.decode("utf-8", errors="replace"), max_wait)
+    return path, [asdict(finding) for finding in findings], timings, parsed
 
-def scan_tree(roots: list[Path]) -> dict[Path, list[int]]:
-    """Walk each root, scan every *.yaml / *.yml file."""
-    results: dict[Path, list[int]] = {}
+
+def is_yaml(path: Path) -> bool:
+    return path.suffix in (".yaml", ".yml")
+
+
+def iter_yaml_files(roots: list[Path]):
+    """Yield every *.yaml / *.yml file below `roots` (files are yielded as given)."""
     for root in roots:
         if root.is_file():
-            offs = scan_file(root)
-            if offs:
-                results[root] = offs
+            yield root
             continue
         for dirpath, dirnames, filenames in os.walk(root):
             # Skip hidden / vendored / cache trees
-            dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "node_modules"]
+            dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in SKIP_DIRS]
             for fname in filenames:
-                if not (fname.endswith(".yaml") or fname.endswith(".yml")):
-                    continue
-                p = Path(dirpath) / fname
-                offs = scan_file(p)
-                if offs:
-                    results[p] = offs
-    return results
+                if fname.endswith(".yaml") or fname.endswith(".yml"):
+                    yield Path(dirpath) / fname
+
+
+def git(*args: str) -> list[str]:
+    """Run git in the working directory and return its non-empty output lines.
+
+    Raises:
+        RuntimeError: If git fails.
+    """
+    result = subprocess.run(["git", *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git {args[0]} failed")
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def repo_root() -> Path:
+    """Top of the git checkout around the working directory (the working directory outside one)."""
+    try:
+        return Path(git("rev-parse", "--show-toplevel")[0]).resolve()
+    except (OSError, RuntimeError, IndexError):
+        return Path.cwd().resolve()
+
+
+def cache_path(root: Path) -> Path:
+    override = os.environ.get("LINT_CACHE_DIR")
+    return (Path(override) if override else root / ".lint_cache") / CACHE_NAME
+
+
+def changed_files(revision: str, roots: list[Path]) -> list[Path]:
+    """YAML files under `roots` changed since `revision`, including untracked ones.
+
+    Raises:
+        RuntimeError: If git cannot resolve the revision.
+    """
+    top = Path(git("rev-parse", "--show-toplevel")[0])
+    names = git("diff", "--name-only", "--diff-filter=d", revision, "--")
+    names += git("ls-files", "--others", "--exclude-standard", "--full-name", str(top))
+
+    resolved_roots = [root.resolve() for root in roots]
+    files = []
+    for name in dict.fromkeys(names):
+        path = top / name
+        if not is_yaml(path) or not path.is_file():
+            continue
+        if any(path == root or root in path.parents for root in resolved_roots):
+            files.append(Path(os.path.relpath(path)))
+    return files
+
+
+def load_cache(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_cache(path: Path, entries: dict):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": entries}))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"lint_no_interactive_prompts: could not write cache: {e}", file=sys.stderr)
+
+
+class LintResult:
+    """Findings per file plus where the time went."""
+
+    def __init__(self):
+        self.findings: dict[Path, list[Finding]] = {}
+        self.timings: dict[str, float] = {}
+        self.files = 0
+        self.cached = 0
+        self.unparsed: list[Path] = []
+
+    def add(self, path: Path, findings: list[dict], parsed: bool):
+        self.files += 1
+        if findings:
+            self.findings[path] = [Finding(**finding) for finding in findings]
+        if not parsed:
+            self.unparsed.append(path)
+
+    def select(self, rule_ids: list[str]) -> dict[Path, list[Finding]]:
+        """Findings of the given rules only, dropping files left without any."""
+        selected = {}
+        for path, findings in self.findings.items():
+            kept = [finding for finding in findings if finding.rule in rule_ids]
+            if kept:
+                selected[path] = kept
+        return selected
+
+
+def scan_paths(paths: list[Path], cache: dict | None = None,
+               jobs: int | None = None, max_wait: int = MAX_WAIT_SECONDS,
+               root: Path | None = None) -> LintResult:
+    """Lint `paths`, reusing and updating `cache` entries for unchanged files.
+
+    A file whose mtime and size match its cache entry is not read at all;
+    one whose content hash still matches is not rescanned. Cache entries are
+    keyed by path relative to `root`, so the same file shares one entry
+    whichever directory the lint runs from.
+    """
+    result = LintResult()
+    pending: dict[str, bytes] = {}
+    stats: dict[str, tuple[int, int]] = {}
+    keys: dict[str, str] = {}
+
+    for path in paths:
+        key = os.path.relpath(path.resolve(), root) if root else str(path)
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entry = cache.get(key) if cache is not None else None
+        if not (entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size):
+            try:
+                data = path.read_bytes()
+            except OSError:
+                continue
+            if not (entry and entry["sha256"] == hashlib.sha256(data).hexdigest()):
+                pending[str(path)] = data
+                stats[str(path)] = (st.st_mtime_ns, st.st_size)
+                keys[str(path)] = key
+                continue
+            cache[key] = {**entry, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        result.add(path, entry["findings"], entry["parsed"])
+        result.cached += 1
+
+    if len(pending) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            lint = partial(_lint_bytes, max_wait=max_wait)
+            scanned = list(pool.map(lint, pending, pending.values(), chunksize=16))
+    else:
+        scanned = [_lint_bytes(key, data, max_wait) for key, data in pending.items()]
+
+    for name, findings, timings, parsed in scanned:
+        for rule, seconds in timings.items():
+            result.timings[rule] = result.timings.get(rule, 0.0) + seconds
+        if cache is not None:
+            mtime_ns, size = stats[name]
+            cache[keys[name]] = {
+                "mtime_ns": mtime_ns, "size": size,
+                "sha256": hashlib.sha256(pending[name]).hexdigest(),
+                "findings": findings, "parsed": parsed,
+            }
+        result.add(Path(name), findings, parsed)
+    return result
+
+
+def scan_tree(roots: list[Path]) -> dict[Path, list[int]]:
+    """Walk each root, scan every *.yaml / *.yml file for interactive pauses."""
+    selected = scan_paths(list(iter_yaml_files(roots))).select(["interactive-pause"])
+    return {path: [finding.line for finding in findings] for path, findings in selected.items()}
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+def timing_report(result: LintResult, rule_ids: list[str]) -> dict:
+    return {
+        "files": result.files,
+        "cached": result.cached,
+        "regex_fallback": len(result.unparsed),
+        "seconds": {name: round(result.timings.get(name, 0.0), 6)
+                    for name in ["parse", *rule_ids]},
+    }
+
+
+def to_json(findings: dict[Path, list[Finding]], timings: dict) -> dict:
+    return {
+        "findings": [
+            {"path": str(path), "level": RULES[finding.rule].level, **asdict(finding)}
+            for path in sorted(findings) for finding in findings[path]
+        ],
+        "timings": timings,
+    }
+
+
+def to_sarif(findings: dict[Path, list[Finding]], rule_ids: list[str], timings: dict) -> dict:
+    """Findings as a SARIF 2.1.0 log, for code scanning uploads."""
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "lint_no_interactive_prompts",
+                "rules": [{
+                    "id": rule_id,
+                    "shortDescription": {"text": RULES[rule_id].description},
+                    "defaultConfiguration": {"level": RULES[rule_id].level},
+                } for rule_id in rule_ids],
+            }},
+            "results": [{
+                "ruleId": finding.rule,
+                "level": RULES[finding.rule].level,
+                "message": {"text": finding.message},
+                "locations": [{"physicalLocation": {
+                    "artifactLocation": {"uri": path.as_posix()},
+                    "region": {"startLine": finding.line},
+                }}],
+            } for path in sorted(findings) for finding in findings[path]],
+            "properties": {"timings": timings},
+        }],
+    }
+
+
+def print_findings(findings: dict[Path, list[Finding]]):
+    pauses = any(finding.rule == "interactive-pause"
+                 for file_findings in findings.values() for finding in file_findings)
+    print("lint_no_interactive_prompts: FOUND lint findings:", file=sys.stderr)
+    print("", file=sys.stderr)
+    if pauses:
+        print("  All Thinkube playbooks must be orchestratable by the installer", file=sys.stderr)
+        print("  or thinkube-control. Interactive prompts deadlock the orchestrator.", file=sys.stderr)
+        print("  Use `ansible.builtin.assert` with a required extra-var instead.", file=sys.stderr)
+        print("", file=sys.stderr)
+    total = 0
+    for path in sorted(findings):
+        for finding in findings[path]:
+            level = RULES[finding.rule].level
+            print(f"  {path}:{finding.line}: {level} [{finding.rule}] {finding.message}",
+                  file=sys.stderr)
+            total += 1
+    print("", file=sys.stderr)
+    print(f"  {total} finding(s) in {len(findings)} file(s).", file=sys.stderr)
+
+
+def print_timings(timings: dict):
+    print(f"lint_no_interactive_prompts: {timings['files']} file(s), "
+          f"{timings['cached']} from cache, {timings['regex_fallback']} regex fallback",
+          file=sys.stderr)
+    for name, seconds in timings["seconds"].items():
+        print(f"  {name:24s} {seconds * 1000:10.1f} ms", file=sys.stderr)
 
 
 def main(argv: list[str]) -> int:
-    roots = [Path(a) for a in argv[1:]] or [Path("ansible")]
+    parser = argparse.ArgumentParser(description="Lint Ansible playbooks")
+    parser.add_argument("paths", nargs="*", type=Path, default=[Path("ansible")])
+    parser.add_argument("--rule", action="append", dest="rules", metavar="ID",
+                        help=f"Rule to report, repeatable, or 'all' (default: {', '.join(DEFAULT_RULES)})")
+    parser.add_argument("--list-rules", action="store_true", help="List rules and exit")
+    parser.add_argument("--format", choices=["text", "json", "sarif"], default="text")
+    parser.add_argument("--timings", action="store_true", help="Print per-rule timing to stderr")
+    parser.add_argument("--strict", action="store_true", help="Fail on warnings too")
+    parser.add_argument("--max-wait", type=int, default=MAX_WAIT_SECONDS,
+                        help="Wait budget in seconds for unbounded-until")
+    parser.add_argument("--changed-since", metavar="REV",
+                        help="Only scan YAML files changed since this git revision")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes for uncached files (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the cache")
+    args = parser.parse_args(argv[1:])
+
+    if args.list_rules:
+        for registered in RULES.values():
+            default = " (default)" if registered.id in DEFAULT_RULES else ""
+            print(f"{registered.id:24s} {registered.level:8s} {registered.description}{default}")
+        return 0
+
+    rule_ids = args.rules or DEFAULT_RULES
+    if "all" in rule_ids:
+        rule_ids = list(RULES)
+    unknown = [rule_id for rule_id in rule_ids if rule_id not in RULES]
+    if unknown:
+        print(f"lint_no_interactive_prompts: unknown rule(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    roots = args.paths
     for r in roots:
         if not r.exists():
             print(f"lint_no_interactive_prompts: path not found: {r}", file=sys.stderr)
             return 2
 
-    offenders = scan_tree(roots)
-    if not offenders:
-        print("lint_no_interactive_prompts: no interactive pause: prompts found")
-        return 0
+    if args.changed_since:
+        try:
+            paths = changed_files(args.changed_since, roots)
+        except (OSError, RuntimeError) as e:
+            print(f"lint_no_interactive_prompts: {e}", file=sys.stderr)
+            return 2
+    else:
+        paths = list(iter_yaml_files(roots))
 
-    print("lint_no_interactive_prompts: FOUND interactive `pause:` prompts:", file=sys.stderr)
-    print("", file=sys.stderr)
-    print("  All Thinkube playbooks must be orchestratable by the installer", file=sys.stderr)
-    print("  or thinkube-control. Interactive prompts deadlock the orchestrator.", file=sys.stderr)
-    print("  Use `ansible.builtin.assert` with a required extra-var instead.", file=sys.stderr)
-    print("", file=sys.stderr)
-    total = 0
-    for path in sorted(offenders):
-        for line_no in offenders[path]:
-            print(f"  {path}:{line_no}", file=sys.stderr)
-            total += 1
-    print("", file=sys.stderr)
-    print(f"  {total} interactive prompt(s) in {len(offenders)} file(s).", file=sys.stderr)
-    return 1
+    # The budget changes unbounded-until results, so only the default is cached
+    use_cache = not args.no_cache and args.max_wait == MAX_WAIT_SECONDS
+
+    root = repo_root() if use_cache else None
+    cache = load_cache(cache_path(root)) if use_cache else None
+    result = scan_paths(paths, cache, args.jobs, args.max_wait, root)
+    if cache is not None:
+        save_cache(cache_path(root), cache)
+
+    findings = result.select(rule_ids)
+    timings = timing_report(result, rule_ids)
+    failing = {"error", "warning"} if args.strict else {"error"}
+    failed = any(RULES[finding.rule].level in failing
+                 for file_findings in findings.values() for finding in file_findings)
+
+    if args.format == "json":
+        print(json.dumps(to_json(findings, timings), indent=2))
+    elif args.format == "sarif":
+        print(json.dumps(to_sarif(findings, rule_ids, timings), indent=2))
+    elif findings:
+        print_findings(findings)
+    else:
+        print(f"lint_no_interactive_prompts: no findings ({', '.join(rule_ids)})")
+
+    if args.timings:
+        print_timings(timings)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":